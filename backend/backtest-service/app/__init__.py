@@ -7,5 +7,9 @@ def create_app():
     # Register blueprints
     from .routes.backtest_controller import backtest_controller
     app.register_blueprint(backtest_controller)
-    
+
+    # Nạp sẵn nến của các cặp hay dùng (BACKTEST_WARMUP_PAIRS) ở nền
+    from .service.historical_service import start_warmup
+    start_warmup()
+
     return app
\ No newline at end of file
@@ -0,0 +1,441 @@
+"""
+In-house simulator for the strategies build_strategy produces, used when a
+request asks for engine="fast".
+
+Signals come precomputed for every bar (compute_signals), so instead of
+calling Strategy.next() once per bar the loop below jumps from one trade
+event to the next: the next entry signal and the next opposite signal are
+table lookups, and the bar a stop-loss/take-profit fills on is found with a
+vectorized scan over the trade's bars. Fills, sizing, commissions and the
+satoshi scaling reproduce FractionalBacktest(..., commission=0.001) with
+backtesting.py's default broker settings, so both engines report the same
+trades and stats.
+
+The loop can also stop after the closed candles and be continued later from
+a FastCheckpoint (run_fast_checkpointed / resume_fast), so a run whose end
+time moves forward only simulates the candles it has not seen.
+"""
+import copy
+import sys
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.domain.engine.stats import compute_stats
+from app.profiling import span, timed
+from app.domain.strategy.signals import compute_signals
+from app.domain.strategy.streaming_signals import StreamingSignals
+from app.dto.request.StrategyConfigDTO import StrategyConfigDTO
+
+# FractionalBacktest trades whole satoshis: prices are scaled by this unit
+# before the run and trade sizes/prices scaled back afterwards.
+FRACTIONAL_UNIT = 1 / 100e6
+COMMISSION = 0.001
+# Strategy.buy()/sell() default size: all available margin
+_FULL_EQUITY = 1 - sys.float_info.epsilon
+
+# Bars examined per pass when looking for the bar a SL/TP fills on; doubled
+# every pass so short trades stay cheap and long ones take few passes.
+_SCAN_CHUNK = 64
+
+# Past this many new candles, resume_fast() recomputes the signals over every
+# close in one vectorized pass instead of stepping the streaming indicators.
+_STREAM_MAX_BARS = 5000
+
+
+def _next_true(mask: np.ndarray) -> np.ndarray:
+    """For every bar, the first bar at or after it where mask is set (len(mask) if none)."""
+    n = len(mask)
+    idx = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(idx[::-1])[::-1]
+
+
+def _first_exit(high: np.ndarray, low: np.ndarray, start: int, stop: int,
+                is_long: bool, sl: Optional[float], tp: Optional[float]) -> Tuple[int, bool]:
+    """
+    First bar in [start, stop] where the stop-loss or take-profit of a trade is
+    touched, and whether the SL is among them (the broker fills the SL first).
+    Returns (stop + 1, False) when neither is hit.
+    """
+    sl_level = sl if sl is not None else (-np.inf if is_long else np.inf)
+    tp_level = tp if tp is not None else (np.inf if is_long else -np.inf)
+    lo, chunk = start, _SCAN_CHUNK
+    while lo <= stop:
+        hi = min(stop + 1, lo + chunk)
+        if is_long:
+            sl_hit = low[lo:hi] <= sl_level
+            tp_hit = high[lo:hi] >= tp_level
+        else:
+            sl_hit = high[lo:hi] >= sl_level
+            tp_hit = low[lo:hi] <= tp_level
+        hit = sl_hit | tp_hit
+        if hit.any():
+            k = int(hit.argmax())
+            return lo + k, bool(sl_hit[k])
+        lo, chunk = hi, chunk * 2
+    return stop + 1, False
+
+
+def _brackets(price: float, is_long: bool, sl_pct: float, tp_pct: float):
+    # Same levels DynamicStrategy passes to buy()/sell(); a zero level means none
+    if is_long:
+        sl, tp = price * (1 - sl_pct), price * (1 + tp_pct)
+    else:
+        sl, tp = price * (1 + sl_pct), price * (1 - tp_pct)
+    sl, tp = (sl and float(sl)) or None, (tp and float(tp)) or None
+    if (sl is not None and sl < 0) or (tp is not None and tp < 0):
+        raise ValueError("slPct and tpPct must give positive stop-loss and take-profit prices")
+    return sl, tp
+
+
+def _order_size(margin: float, price: float) -> int:
+    commission = abs(_FULL_EQUITY) * price * COMMISSION
+    price_with_commission = price + commission / abs(_FULL_EQUITY)
+    return int((margin * 1.0 * abs(_FULL_EQUITY)) // price_with_commission)
+
+
+@dataclass
+class SimState:
+    """Where _simulate() stopped, enough to carry on once more bars are known."""
+    bar: int
+    cash: float
+    trades: List[Dict]
+    cash_events: List[Tuple[int, float]]
+    # Trade left open (trades[-1]): first bar its SL/TP have not been checked on
+    scan_from: Optional[int] = None
+
+
+@timed("simulate")
+def _simulate(o, h, l, c, long_entry, short_entry, start: int, cash: float,
+              sl_pct: float, tp_pct: float, progress: Optional[Callable[[float], None]] = None,
+              state: Optional[SimState] = None):
+    """
+    Trades as dicts plus the cash balance after every cash movement, as
+    (bar, cash) pairs in order, and the SimState at the end. A trade still
+    open at the end has no exit. With `state`, the run picks up where an
+    earlier call on the first bars of the same arrays stopped, and gives
+    what one call over all the bars would.
+    """
+    n = len(c)
+    report_step = max(1, n // 100)
+    next_report = report_step
+    next_any = _next_true(long_entry | short_entry)
+    next_long = _next_true(long_entry)
+    next_short = _next_true(short_entry)
+
+    if state is None:
+        trades: List[Dict] = []
+        cash_events: List[Tuple[int, float]] = []
+        bar = start          # first bar where the strategy looks at a flat account
+        scan_from = None     # set while a trade is open
+    else:
+        # Bản sao: lệnh đang mở sẽ được ghi exit trực tiếp vào dict
+        trades = [dict(t) for t in state.trades]
+        cash_events = list(state.cash_events)
+        bar, cash, scan_from = state.bar, state.cash, state.scan_from
+    reverse_from = None  # signal bar of an entry that reverses the previous trade
+
+    while True:
+        if progress is not None and bar >= next_report:
+            progress(bar / n)
+            next_report = bar + report_step
+        if scan_from is not None:
+            trade = trades[-1]
+            is_long = trade["is_long"]
+        else:
+            if reverse_from is None:
+                signal_bar = int(next_any[bar]) if bar < n else n
+                # Orders placed on the last bar are never filled
+                if signal_bar >= n - 1:
+                    break
+                is_long = bool(long_entry[signal_bar])
+            else:
+                signal_bar, reverse_from = reverse_from, None
+                is_long = not trades[-1]["is_long"]
+
+            entry_bar = signal_bar + 1
+            price = float(o[entry_bar])
+            size = _order_size(max(0, cash), price)
+            if not size:
+                # The broker cancels the order; the strategy retries from this bar
+                bar = entry_bar
+                continue
+
+            sl, tp = _brackets(c[signal_bar], is_long, sl_pct, tp_pct)
+            open_commission = abs(size) * price * COMMISSION
+            cash -= open_commission
+            cash_events.append((entry_bar, cash))
+            trade = {"is_long": is_long, "size": size if is_long else -size, "entry_bar": entry_bar,
+                     "entry_price": price, "sl": sl, "tp": tp, "open_commission": open_commission}
+            trades.append(trade)
+            scan_from = entry_bar
+
+        sl, tp = trade["sl"], trade["tp"]
+        opposite = int((next_short if is_long else next_long)[trade["entry_bar"]])
+        exit_bar, sl_first = _first_exit(h, l, scan_from, min(opposite, n - 1), is_long, sl, tp)
+        if exit_bar < n and exit_bar <= opposite:
+            # Số float thường: trades được pickle cùng checkpoint
+            bar_open = float(o[exit_bar])
+            if sl_first:
+                exit_price = min(bar_open, sl) if is_long else max(bar_open, sl)
+            else:
+                exit_price = max(bar_open, tp) if is_long else min(bar_open, tp)
+            bar = exit_bar
+        elif opposite < n - 1:
+            # Closed at the next open, where the reversed trade is opened too
+            exit_bar = opposite + 1
+            exit_price = float(o[exit_bar])
+            reverse_from = opposite
+        else:
+            # Every bar so far has been checked for this trade's SL/TP
+            scan_from = n
+            break
+        scan_from = None
+
+        exit_commission = abs(trade["size"]) * exit_price * COMMISSION
+        cash += trade["size"] * (exit_price - trade["entry_price"]) - exit_commission
+        cash_events.append((exit_bar, cash))
+        trade.update(exit_bar=exit_bar, exit_price=exit_price, exit_commission=exit_commission)
+
+    end = SimState(bar, cash, [dict(t) for t in trades], list(cash_events), scan_from)
+    return trades, cash_events, end
+
+
+def _equity_curve(c: np.ndarray, start: int, cash: float, trades: List[Dict],
+                  cash_events: List[Tuple[int, float]]) -> np.ndarray:
+    n = len(c)
+    event_bars = np.array([-1] + [b for b, _ in cash_events], dtype=np.int64)
+    event_cash = np.array([cash] + [v for _, v in cash_events], dtype=float)
+    cash_at = event_cash[np.searchsorted(event_bars, np.arange(n), side="right") - 1]
+
+    # Size and cost of the trade held at each bar's close
+    position = np.zeros(n)
+    cost = np.zeros(n)
+    for t in trades:
+        end = t.get("exit_bar", n)
+        position[t["entry_bar"]:end] = t["size"]
+        cost[t["entry_bar"]:end] = t["size"] * t["entry_price"]
+
+    equity = cash_at + (c * position - cost)
+    equity[:start] = equity[start] if start < n else cash
+    return equity
+
+
+def _stop_when_broke(c: np.ndarray, start: int, equity: np.ndarray, trades: List[Dict]) -> List[Dict]:
+    """
+    backtesting.py closes everything at the close of the first bar with no
+    equity left and ends the run there.
+    """
+    broke = np.flatnonzero(equity[start:] <= 0)
+    if not len(broke):
+        return trades
+    bar = start + int(broke[0])
+    kept = [t for t in trades if t["entry_bar"] <= bar]
+    last = kept[-1] if kept else None
+    if last is not None and last.get("exit_bar", len(c)) > bar:
+        exit_commission = abs(last["size"]) * c[bar] * COMMISSION
+        last.update(exit_bar=bar, exit_price=c[bar], exit_commission=exit_commission)
+    equity[bar:] = 0
+    return kept
+
+
+def _trades_frame(trades: List[Dict], index: pd.Index, indicators: List[np.ndarray]) -> pd.DataFrame:
+    closed = [t for t in trades if "exit_bar" in t]
+    size = np.array([t["size"] for t in closed], dtype=np.int64)
+    entry_bar = np.array([t["entry_bar"] for t in closed], dtype=np.int64)
+    exit_bar = np.array([t["exit_bar"] for t in closed], dtype=np.int64)
+    entry_price = np.array([t["entry_price"] for t in closed], dtype=float)
+    exit_price = np.array([t["exit_price"] for t in closed], dtype=float)
+    commissions = np.array([t["exit_commission"] + t["open_commission"] for t in closed], dtype=float)
+
+    trades_df = pd.DataFrame({
+        "Size": size,
+        "EntryBar": entry_bar,
+        "ExitBar": exit_bar,
+        "EntryPrice": entry_price,
+        "ExitPrice": exit_price,
+        "SL": [t["sl"] for t in closed],
+        "TP": [t["tp"] for t in closed],
+        "PnL": size * (exit_price - entry_price) - commissions,
+        "Commission": commissions,
+        "ReturnPct": np.sign(size) * (exit_price / entry_price - 1) - commissions / (np.abs(size) * entry_price),
+        # Lists, like backtesting.py: with no trades Duration stays object dtype and its max NaN
+        "EntryTime": list(index[entry_bar]),
+        "ExitTime": list(index[exit_bar]),
+    })
+    trades_df["Duration"] = trades_df["ExitTime"] - trades_df["EntryTime"]
+    trades_df["Tag"] = None
+    # backtesting.py names every indicator "fn(C)", so only the last one shows
+    if len(trades_df) and indicators:
+        trades_df["Entry_fn(C)"] = indicators[-1][entry_bar]
+        trades_df["Exit_fn(C)"] = indicators[-1][exit_bar]
+    return trades_df
+
+
+@dataclass
+class FastCheckpoint:
+    """
+    A run stopped after its last closed candle: the simulator state, the
+    streaming signals at that bar and what the stats need about the bars
+    already done. Prices are in FRACTIONAL_UNIT like everything else here.
+    """
+    index: pd.DatetimeIndex
+    close: np.ndarray
+    long_entry: np.ndarray
+    short_entry: np.ndarray
+    # Last indicator, for the trade table's Entry_fn/Exit_fn; None without indicators
+    last_indicator: Optional[np.ndarray]
+    signals: StreamingSignals
+    sim: SimState
+    warmup: int
+    cash: float
+
+    @property
+    def bars(self) -> int:
+        return len(self.close)
+
+
+def _scaled(data: pd.DataFrame):
+    return (data[col].to_numpy(dtype=float) * FRACTIONAL_UNIT for col in ("Open", "High", "Low", "Close"))
+
+
+@timed("stats")
+def _stats(index: pd.Index, c: np.ndarray, warmup: int, cash: float, trades: List[Dict],
+           cash_events: List[Tuple[int, float]], indicators: List[np.ndarray]) -> pd.Series:
+    start = 1 + warmup
+    equity = _equity_curve(c, start, cash, trades, cash_events)
+    trades = _stop_when_broke(c, start, equity, trades)
+
+    trades_df = _trades_frame(trades, index, indicators)
+    stats = compute_stats(trades_df, equity, c, index, warmup)
+
+    trades_df["Size"] = trades_df["Size"] * FRACTIONAL_UNIT
+    trades_df[["EntryPrice", "ExitPrice", "TP", "SL"]] = (
+        trades_df[["EntryPrice", "ExitPrice", "TP", "SL"]].astype(float) / FRACTIONAL_UNIT)
+    return stats
+
+
+def run_fast(cfg: StrategyConfigDTO, data: pd.DataFrame, indicator_cache: Optional[Dict] = None,
+             progress: Optional[Callable[[float], None]] = None) -> pd.Series:
+    """Same contract as backtest_service.simulate(): stats keyed like backtesting.py's."""
+    return _run_fast(cfg, data, indicator_cache, progress)[0]
+
+
+def run_fast_checkpointed(cfg: StrategyConfigDTO, data: pd.DataFrame, closed_bars: int,
+                          progress: Optional[Callable[[float], None]] = None
+                          ) -> Tuple[pd.Series, Optional[FastCheckpoint]]:
+    """run_fast() plus the checkpoint after the first closed_bars candles (None for 0)."""
+    return _run_fast(cfg, data, None, progress, closed_bars)
+
+
+def _run_fast(cfg: StrategyConfigDTO, data: pd.DataFrame, indicator_cache: Optional[Dict],
+              progress: Optional[Callable[[float], None]], closed_bars: int = 0):
+    if len(data) == 0:
+        raise ValueError("No candles to backtest")
+    o, h, l, c = _scaled(data)
+    signals = compute_signals(cfg, c, indicator_cache)
+
+    warmup = max((int(np.isnan(ind).argmin()) for ind in signals.indicators), default=0)
+    start = 1 + warmup
+    cash = float(cfg.lots)
+    long_entry, short_entry = signals.long_entry, signals.short_entry
+
+    checkpoint = None
+    with np.errstate(invalid="ignore"):
+        state = None
+        if closed_bars > 0:
+            k = closed_bars
+            *_, state = _simulate(o[:k], h[:k], l[:k], c[:k], long_entry[:k], short_entry[:k],
+                                  start, cash, cfg.slPct, cfg.tpPct)
+            with span("checkpoint"):
+                stream = StreamingSignals([cfg])
+                stream.warm(c[:k])
+            checkpoint = FastCheckpoint(
+                index=data.index[:k], close=c[:k].copy(),
+                long_entry=long_entry[:k].copy(), short_entry=short_entry[:k].copy(),
+                last_indicator=signals.indicators[-1][:k].copy() if signals.indicators else None,
+                signals=stream, sim=state, warmup=warmup, cash=cash)
+        trades, cash_events, _ = _simulate(o, h, l, c, long_entry, short_entry,
+                                           start, cash, cfg.slPct, cfg.tpPct, progress, state)
+    return _stats(data.index, c, warmup, cash, trades, cash_events, signals.indicators), checkpoint
+
+
+@timed("resume_signals")
+def _new_signals(cfg: StrategyConfigDTO, checkpoint: FastCheckpoint, c_new: np.ndarray, closed_bars: int):
+    """
+    Entry signals and last indicator for the candles after checkpoint, plus
+    the streaming signals after the first closed_bars of them (None for 0).
+    """
+    m = len(c_new)
+    if m > _STREAM_MAX_BARS:
+        c = np.concatenate([checkpoint.close, c_new])
+        signals = compute_signals(cfg, c)
+        n0 = checkpoint.bars
+        ind_new = signals.indicators[-1][n0:] if signals.indicators else np.zeros(m)
+        closed_stream = None
+        if closed_bars > 0:
+            closed_stream = StreamingSignals([cfg])
+            closed_stream.warm(c[:n0 + closed_bars])
+        return signals.long_entry[n0:], signals.short_entry[n0:], ind_new, closed_stream
+
+    stream = copy.deepcopy(checkpoint.signals)
+    long_new = np.zeros(m, dtype=bool)
+    short_new = np.zeros(m, dtype=bool)
+    ind_new = np.zeros(m)
+    closed_stream = stream if closed_bars >= m else None
+    for i, close in enumerate(c_new):
+        if i == closed_bars > 0:
+            closed_stream = copy.deepcopy(stream)
+        [(long_new[i], short_new[i])] = stream.update(close)
+        values = stream.indicator_values()
+        if values:
+            ind_new[i] = values[-1]
+    return long_new, short_new, ind_new, closed_stream
+
+
+def resume_fast(cfg: StrategyConfigDTO, checkpoint: FastCheckpoint, data: pd.DataFrame, closed_bars: int,
+                progress: Optional[Callable[[float], None]] = None
+                ) -> Tuple[pd.Series, Optional[FastCheckpoint]]:
+    """
+    Continues the run saved in `checkpoint` over `data`, the candles that
+    follow it, and returns the stats of the whole range plus the checkpoint
+    after the first closed_bars of `data` (None for 0). Signals of the new
+    candles come from the streaming indicators, so only those candles are
+    looked at (up to _STREAM_MAX_BARS); the stats are recomputed over every
+    bar.
+    """
+    if len(data) == 0:
+        raise ValueError("No candles to backtest")
+    o_new, h_new, l_new, c_new = _scaled(data)
+    m = len(c_new)
+    long_new, short_new, ind_new, closed_stream = _new_signals(cfg, checkpoint, c_new, closed_bars)
+
+    n0 = checkpoint.bars
+    # Nến cũ chỉ cần Close: checkpoint đã xử lý xong mọi lệnh và tín hiệu trước n0
+    unused = np.full(n0, np.nan)
+    o, h, l = (np.concatenate([unused, x]) for x in (o_new, h_new, l_new))
+    c = np.concatenate([checkpoint.close, c_new])
+    long_entry = np.concatenate([checkpoint.long_entry, long_new])
+    short_entry = np.concatenate([checkpoint.short_entry, short_new])
+    last_indicator = (np.concatenate([checkpoint.last_indicator, ind_new])
+                      if checkpoint.last_indicator is not None else None)
+    index = checkpoint.index.append(data.index)
+    start, cash = 1 + checkpoint.warmup, checkpoint.cash
+
+    nxt = None
+    with np.errstate(invalid="ignore"):
+        state = checkpoint.sim
+        if closed_bars > 0:
+            k = n0 + min(closed_bars, m)
+            *_, state = _simulate(o[:k], h[:k], l[:k], c[:k], long_entry[:k], short_entry[:k],
+                                  start, cash, cfg.slPct, cfg.tpPct, state=state)
+            nxt = FastCheckpoint(
+                index=index[:k], close=c[:k], long_entry=long_entry[:k], short_entry=short_entry[:k],
+                last_indicator=last_indicator[:k] if last_indicator is not None else None,
+                signals=closed_stream, sim=state, warmup=checkpoint.warmup, cash=cash)
+        trades, cash_events, _ = _simulate(o, h, l, c, long_entry, short_entry,
+                                           start, cash, cfg.slPct, cfg.tpPct, progress, state)
+    indicators = [last_indicator] if last_indicator is not None else []
+    return _stats(index, c, checkpoint.warmup, cash, trades, cash_events, indicators), nxt
@@ -0,0 +1,131 @@
+"""
+Vectorized version of backtesting.py's compute_stats, limited to the figures
+StatDTO reports. Given the same trades and equity curve it returns the same
+values under the same keys, so convert_stats() and convert_backtest_result()
+work on either engine's output.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _data_period(index: pd.Index):
+    return pd.Series(index[-100:]).diff().dropna().median()
+
+
+def _geometric_mean(returns: pd.Series) -> float:
+    returns = returns.fillna(0) + 1
+    if np.any(returns <= 0):
+        return 0
+    return np.exp(np.log(returns).sum() / (len(returns) or np.nan)) - 1
+
+
+def drawdown_duration_peaks(dd: np.ndarray, index: pd.Index):
+    """
+    Duration and deepest point of every drawdown, placed on the bar where it
+    ends (NaN elsewhere). Same result as backtesting.py's per-row apply, with
+    the peaks taken by one np.maximum.reduceat.
+    """
+    n = len(dd)
+    iloc = np.unique(np.r_[np.flatnonzero(dd == 0), n - 1])
+    keep = iloc[1:] > iloc[:-1] + 1
+    ends, starts = iloc[1:][keep], iloc[:-1][keep]
+    if not len(ends):
+        blank = pd.Series(dd, index=index).replace(0, np.nan)
+        return blank, blank
+
+    duration = pd.Series(index[ends] - index[starts], index=index[ends]).reindex(index)
+
+    # reduceat over [start, end] pairs; the slots between pairs are discarded
+    bounds = np.empty(2 * len(ends), dtype=np.int64)
+    bounds[0::2] = starts
+    bounds[1::2] = ends + 1
+    peaks = np.full(n, np.nan)
+    peaks[ends] = np.maximum.reduceat(np.r_[dd, 0.0], bounds)[0::2]
+    return duration, pd.Series(peaks, index=index)
+
+
+def compute_stats(trades: pd.DataFrame, equity: np.ndarray, close: np.ndarray,
+                  index: pd.Index, first_trading_bar: int = 0) -> pd.Series:
+    """
+    trades holds backtesting.py's `_trades` columns for the closed trades,
+    equity the account value after every bar.
+    """
+    equity = np.asarray(equity, dtype=float)
+    dd = 1 - equity / np.maximum.accumulate(equity)
+    dd_dur, dd_peaks = drawdown_duration_peaks(dd, index)
+    equity_df = pd.DataFrame({
+        "Equity": equity,
+        "DrawdownPct": dd,
+        "DrawdownDuration": dd_dur},
+        index=index)
+
+    pl = trades["PnL"]
+    returns = trades["ReturnPct"]
+    durations = trades["Duration"]
+    period = _data_period(index)
+
+    def round_timedelta(value):
+        if not isinstance(value, pd.Timedelta):
+            return value
+        return value.ceil(getattr(period, "resolution_string", None) or period.resolution)
+
+    s = {}
+    s["Start"] = index[0]
+    s["End"] = index[-1]
+    s["Duration"] = s["End"] - s["Start"]
+
+    # +1 where a trade starts, -1 after the bar it ends: bars in a trade sum above 0
+    edges = np.zeros(len(index) + 1, dtype=np.int64)
+    np.add.at(edges, trades["EntryBar"].to_numpy(dtype=np.int64), 1)
+    np.add.at(edges, trades["ExitBar"].to_numpy(dtype=np.int64) + 1, -1)
+    have_position = np.cumsum(edges[:-1]) > 0
+
+    s["Exposure Time [%]"] = have_position.mean() * 100
+    s["Equity Final [$]"] = equity[-1]
+    s["Equity Peak [$]"] = equity.max()
+    s["Return [%]"] = (equity[-1] - equity[0]) / equity[0] * 100
+    c = close
+    s["Buy & Hold Return [%]"] = (c[-1] - c[first_trading_bar]) / c[first_trading_bar] * 100
+
+    gmean_day_return = 0
+    day_returns = np.array(np.nan)
+    annual_trading_days = np.nan
+    if isinstance(index, pd.DatetimeIndex):
+        freq_days = period.days
+        have_weekends = index.dayofweek.to_series().between(5, 6).mean() > 2 / 7 * .6
+        annual_trading_days = (
+            52 if freq_days == 7 else
+            12 if freq_days == 31 else
+            1 if freq_days == 365 else
+            (365 if have_weekends else 252))
+        freq = {7: "W", 31: "ME", 365: "YE"}.get(freq_days, "D")
+        day_returns = equity_df["Equity"].resample(freq).last().dropna().pct_change().dropna()
+        gmean_day_return = _geometric_mean(day_returns)
+
+    annualized_return = (1 + gmean_day_return) ** annual_trading_days - 1
+    s["Return (Ann.) [%]"] = annualized_return * 100
+    s["Volatility (Ann.) [%]"] = np.sqrt(
+        (day_returns.var(ddof=int(bool(day_returns.shape))) + (1 + gmean_day_return) ** 2) ** annual_trading_days
+        - (1 + gmean_day_return) ** (2 * annual_trading_days)) * 100
+    s["Sharpe Ratio"] = s["Return (Ann.) [%]"] / (s["Volatility (Ann.) [%]"] or np.nan)
+    with np.errstate(divide="ignore"):
+        s["Sortino Ratio"] = annualized_return / (
+            np.sqrt(np.mean(day_returns.clip(-np.inf, 0) ** 2)) * np.sqrt(annual_trading_days))
+
+    s["Max. Drawdown [%]"] = -np.nan_to_num(dd.max()) * 100
+    s["Avg. Drawdown [%]"] = -dd_peaks.mean() * 100
+    s["Max. Drawdown Duration"] = round_timedelta(dd_dur.max())
+    s["Avg. Drawdown Duration"] = round_timedelta(dd_dur.mean())
+    s["# Trades"] = n_trades = len(trades)
+    s["Win Rate [%]"] = (np.nan if not n_trades else (pl > 0).mean()) * 100
+    s["Best Trade [%]"] = returns.max() * 100
+    s["Worst Trade [%]"] = returns.min() * 100
+    s["Avg. Trade [%]"] = _geometric_mean(returns) * 100
+    s["Max. Trade Duration"] = round_timedelta(durations.max())
+    s["Avg. Trade Duration"] = round_timedelta(durations.mean())
+    s["Expectancy [%]"] = returns.mean() * 100
+    s["SQN"] = np.sqrt(n_trades) * pl.mean() / (pl.std() or np.nan)
+
+    s["_equity_curve"] = equity_df
+    s["_trades"] = trades
+    return pd.Series(s, dtype=object)
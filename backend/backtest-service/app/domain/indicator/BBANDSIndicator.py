@@ -1,6 +1,5 @@
-import pandas as pd
+from app.domain.indicator import numpy_ta
 from app.domain.indicator.Indicator import Indicator
-import pandas_ta as ta
 class BBANDSIndicator(Indicator):
     def __init__(self, window: int, band: str = "middle"):
         super().__init__(window, "BBANDS", f"Bollinger Bands ({band})")
@@ -13,22 +12,6 @@ class BBANDSIndicator(Indicator):
         L, which = self.window, self.band
 
         def fn(close_np, *args):
-            close_series = pd.Series(close_np)
-            df = ta.bbands(close_series, length=L)
-            if df is None or df.empty:
-                return self._series_out(pd.Series(index=close_series.index, dtype=float))
+            return self._array_out(numpy_ta.bbands(close_np, L)[which])
 
-            if which == "lower":
-                col = next(c for c in df.columns if c.startswith("BBL_"))
-            elif which == "middle":
-                col = next(c for c in df.columns if c.startswith("BBM_"))
-            elif which == "upper":
-                col = next(c for c in df.columns if c.startswith("BBU_"))
-            elif which == "bandwidth":
-                col = next(c for c in df.columns if c.startswith("BBB_"))
-            else:
-                col = next(c for c in df.columns if c.startswith("BBP_"))
-
-            return self._series_out(df[col])
-
-        return fn, ()
\ No newline at end of file
+        return fn, ()
@@ -1,6 +1,5 @@
+from app.domain.indicator import numpy_ta
 from app.domain.indicator.Indicator import Indicator
-import pandas_ta as ta
-import pandas as pd
 
 class EMAIndicator(Indicator):
     def __init__(self, window: int):
@@ -8,7 +7,5 @@ class EMAIndicator(Indicator):
     def bt_callable(self):
         L = self.window
         def fn(close_np, *args):
-            close_series = pd.Series(close_np)
-            result = ta.ema(close_series, length=L)
-            return self._series_out(result)
+            return self._array_out(numpy_ta.ema(close_np, L))
         return fn, ()
\ No newline at end of file
@@ -1,6 +1,5 @@
 from abc import ABC, abstractmethod
 from typing import Callable, Tuple, Any
-import pandas as pd
 import numpy as np
 
 
@@ -16,8 +15,8 @@ class Indicator(ABC):
         self.description = description
         self.window = window
     
-    def _series_out(self, series: pd.Series) -> np.ndarray:
-        return series.fillna(0).to_numpy()
+    def _array_out(self, values: np.ndarray) -> np.ndarray:
+        return np.where(np.isnan(values), 0.0, values)
 
     @abstractmethod
     def bt_callable(self) -> Tuple[Callable, Tuple[Any, ...]]:
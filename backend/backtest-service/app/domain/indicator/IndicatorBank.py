@@ -0,0 +1,70 @@
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from app.domain.indicator import numpy_ta
+from app.factory.IndicatorFactory import IndicatorFactory
+
+# Loại indicator -> hàm tính cả ma trận; BBANDS của IndicatorFactory là dải
+# giữa, tức SMA
+_BANKS = {
+    "SMA": numpy_ta.sma_bank,
+    "BBANDS": numpy_ta.sma_bank,
+    "EMA": numpy_ta.ema_bank,
+    "RSI": numpy_ta.rsi_bank,
+    "MOM": numpy_ta.mom_bank,
+    "ROC": numpy_ta.roc_bank,
+    "MACD": numpy_ta.macd_bank,
+}
+# Có thể ra NaN sau giai đoạn khởi động (0/0), cần thay bằng 0
+_MAY_NAN = {"RSI", "ROC"}
+
+
+class IndicatorBank:
+    """
+    One indicator type for many windows, as a (len(windows), n_bars) matrix
+    computed in one pass. row(window) is a view into the matrix and holds
+    what IndicatorFactory.create(type, window).bt_callable() gives for the
+    same closes, so rows can go straight into an indicator_cache.
+    """
+
+    def __init__(self, indicator_type: str, windows: List[int], values: np.ndarray):
+        if values.shape[0] != len(windows):
+            raise ValueError("values must have one row per window")
+        self.type = indicator_type
+        self.windows = list(windows)
+        self.values = values
+        self._rows = {w: i for i, w in enumerate(self.windows)}
+
+    @classmethod
+    def compute(cls, indicator_type: str, windows: Iterable[int], close: np.ndarray) -> "IndicatorBank":
+        windows = sorted({int(w) for w in windows})
+        # Kiểm tra loại và window giống IndicatorFactory
+        for w in windows:
+            IndicatorFactory.create(indicator_type, w)
+        bank = _BANKS.get(indicator_type)
+        if bank is not None:
+            # Giai đoạn khởi động = 0, như Indicator._array_out
+            values = bank(close, windows, warmup=0.0)
+            if indicator_type in _MAY_NAN:
+                np.nan_to_num(values, copy=False, nan=0.0, posinf=np.inf, neginf=-np.inf)
+        else:
+            values = np.empty((len(windows), len(close)))
+            for i, w in enumerate(windows):
+                fn, args = IndicatorFactory.create(indicator_type, w).bt_callable()
+                values[i] = fn(close, *args)
+        return cls(indicator_type, windows, values)
+
+    def row(self, window: int) -> np.ndarray:
+        try:
+            return self.values[self._rows[window]]
+        except KeyError:
+            raise ValueError(f"{self.type} bank has no window {window}")
+
+    def as_cache(self) -> Dict[Tuple[str, int], np.ndarray]:
+        """(type, window) -> row view, the key layout build_strategy's indicator_cache uses."""
+        return {(self.type, w): self.values[i] for w, i in self._rows.items()}
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
@@ -0,0 +1,27 @@
+from app.domain.indicator import numpy_ta
+from app.domain.indicator.Indicator import Indicator
+
+
+class MACDIndicator(Indicator):
+    """
+    MACD with the classic 12/26 EMAs; `window` is the signal line length.
+    Defaults to the histogram (MACD - signal) so a rule like
+    "MACD CrossesUp CONST 0" is the usual signal-line crossover.
+    """
+    def __init__(self, window: int, line: str = "histogram", fast: int = 12, slow: int = 26):
+        super().__init__(window, "MACD", f"MACD ({line})")
+        line = line.lower()
+        if line not in {"macd", "signal", "histogram"}:
+            raise ValueError("line must be one of macd|signal|histogram")
+        self.line = line
+        self.fast = fast
+        self.slow = slow
+
+    def bt_callable(self):
+        L, which = self.window, self.line
+        fast, slow = self.fast, self.slow
+
+        def fn(close_np, *args):
+            return self._array_out(numpy_ta.macd(close_np, fast, slow, L)[which])
+
+        return fn, ()
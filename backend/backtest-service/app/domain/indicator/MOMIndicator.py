@@ -1,6 +1,5 @@
+from app.domain.indicator import numpy_ta
 from app.domain.indicator.Indicator import Indicator
-import pandas_ta as ta
-import pandas as pd
 
 class MOMIndicator(Indicator):
     def __init__(self, window: int):
@@ -8,7 +7,5 @@ class MOMIndicator(Indicator):
     def bt_callable(self):
         L = self.window
         def fn(close_np, *args):
-            close_series = pd.Series(close_np)
-            result = ta.mom(close_series, length=L)
-            return self._series_out(result)
+            return self._array_out(numpy_ta.mom(close_np, L))
         return fn, ()
\ No newline at end of file
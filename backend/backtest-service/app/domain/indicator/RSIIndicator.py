@@ -1,6 +1,5 @@
+from app.domain.indicator import numpy_ta
 from app.domain.indicator.Indicator import Indicator
-import pandas_ta as ta
-import pandas as pd
 
 
 class RSIIndicator(Indicator):
@@ -9,7 +8,5 @@ class RSIIndicator(Indicator):
     def bt_callable(self):
         L = self.window
         def fn(close_np, *args):
-            close_series = pd.Series(close_np)
-            result = ta.rsi(close_series, length=L)
-            return self._series_out(result)
+            return self._array_out(numpy_ta.rsi(close_np, L))
         return fn, ()
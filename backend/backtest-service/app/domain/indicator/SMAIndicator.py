@@ -1,7 +1,5 @@
-
-import pandas_ta as ta
+from app.domain.indicator import numpy_ta
 from app.domain.indicator.Indicator import Indicator
-import pandas as pd
 
 class SMAIndicator(Indicator):
     def __init__(self, window: int):
@@ -9,7 +7,5 @@ class SMAIndicator(Indicator):
     def bt_callable(self):
         L = self.window
         def fn(close_np, *args):
-            close_series = pd.Series(close_np)
-            result = ta.sma(close_series, length=L)
-            return self._series_out(result)
+            return self._array_out(numpy_ta.sma(close_np, L))
         return fn, ()
\ No newline at end of file
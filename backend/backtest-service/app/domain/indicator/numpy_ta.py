@@ -0,0 +1,313 @@
+"""
+Pure NumPy implementations of the indicators we used to take from pandas_ta.
+
+Every function takes a 1-D close array and returns float64 arrays of the same
+length with NaN for the warm-up bars, matching pandas_ta 0.3.14b0 output.
+A 2-D array is taken as one series per row and processed along the last
+axis, giving every row what the 1-D call would.
+"""
+import sys
+from typing import Dict
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Older inputs weighted below this no longer change a float64 sum of
+# comparable magnitude.
+_NEGLIGIBLE = 1e-18
+
+
+def _as_close(close) -> np.ndarray:
+    return np.ascontiguousarray(close, dtype=np.float64)
+
+
+def _decay_scan(x: np.ndarray, beta: float, y0: float = 0.0, floor: float = _NEGLIGIBLE) -> np.ndarray:
+    """
+    Solves y[t] = beta * y[t-1] + x[t] with y[-1] = y0 for the whole array.
+
+    Uses a doubling scan: after the pass with span d every y[t] holds the sum
+    of its last 2*d weighted inputs, so ~log2(memory of the filter) vectorized
+    passes replace a per-bar Python loop. Passes stop once the weight of the
+    remaining history drops below `floor`.
+    """
+    y = np.array(x, dtype=np.float64)
+    if y.size == 0:
+        return y
+    n = y.shape[-1]
+    y[..., 0] += beta * y0
+    tmp = np.empty_like(y)
+    weight, span = beta, 1
+    while span < n and weight > floor:
+        part = tmp[..., :n - span]
+        np.multiply(y[..., :-span], weight, out=part)
+        y[..., span:] += part
+        weight *= weight
+        span *= 2
+    return y
+
+
+def _rolling_moments(close: np.ndarray, length: int):
+    """
+    Rolling mean and population variance from cumulative sums.
+
+    Sums are taken per block of bars, each centered on its own mean, so the
+    running totals stay small and E[x^2] - E[x]^2 does not lose precision on
+    long series of large prices.
+    """
+    n = close.size
+    mean = np.full(n, np.nan)
+    var = np.full(n, np.nan)
+    if n < length:
+        return mean, var
+
+    n_out = n - length + 1
+    block = max(1024, 4 * length)
+    n_blocks = -(-n_out // block)
+    pad = n_blocks * block + length - 1 - n
+    padded = np.concatenate([close, np.full(pad, close[-1])]) if pad else close
+
+    rows = sliding_window_view(padded, block + length - 1)[::block]
+    ref = rows.mean(axis=1, keepdims=True)
+    dev = rows - ref
+
+    csum = np.zeros((n_blocks, block + length))
+    np.cumsum(dev, axis=1, out=csum[:, 1:])
+    csum_sq = np.zeros((n_blocks, block + length))
+    np.cumsum(dev * dev, axis=1, out=csum_sq[:, 1:])
+
+    m = (csum[:, length:] - csum[:, :-length]) / length
+    v = (csum_sq[:, length:] - csum_sq[:, :-length]) / length - m * m
+
+    mean[length - 1:] = (m + ref).ravel()[:n_out]
+    var[length - 1:] = np.maximum(v, 0.0).ravel()[:n_out]
+    return mean, var
+
+
+def _non_zero_range(high: np.ndarray, low: np.ndarray) -> np.ndarray:
+    # pandas_ta nudges the whole series by epsilon when any value is zero.
+    diff = high - low
+    if np.any(diff == 0):
+        diff = diff + sys.float_info.epsilon
+    return diff
+
+
+def sma(close, length: int) -> np.ndarray:
+    close = _as_close(close)
+    n = close.shape[-1]
+    out = np.full(close.shape, np.nan)
+    if n < length:
+        return out
+    # Centering keeps the running total small enough for ~1e-12 relative error.
+    ref = close.mean(axis=-1, keepdims=True)
+    csum = np.empty(close.shape[:-1] + (n + 1,))
+    csum[..., 0] = 0.0
+    np.cumsum(close - ref, axis=-1, out=csum[..., 1:])
+    out[..., length - 1:] = (csum[..., length:] - csum[..., :-length]) / length + ref
+    return out
+
+
+def ema(close, length: int) -> np.ndarray:
+    """EMA seeded with the SMA of the first `length` bars."""
+    close = _as_close(close)
+    out = np.full(close.shape, np.nan)
+    if close.shape[-1] < length:
+        return out
+    alpha = 2.0 / (length + 1)
+    seed = close[..., :length].mean(axis=-1)
+    out[..., length - 1] = seed
+    out[..., length:] = _decay_scan(alpha * close[..., length:], 1.0 - alpha, seed)
+    return out
+
+
+def rsi(close, length: int) -> np.ndarray:
+    """
+    RSI on pandas_ta's rma (an adjusted EWM with alpha = 1/length). The
+    normalizing weights are the same for gains and losses, so the ratio only
+    needs the two decayed sums.
+    """
+    close = _as_close(close)
+    out = np.full(close.shape, np.nan)
+    if close.shape[-1] <= length:
+        return out
+    diff = np.diff(close, axis=-1)
+    beta = 1.0 - 1.0 / length
+    # Keep decaying until underflow: after a run of unchanged closes the ratio
+    # is taken between what is left of much older moves.
+    floor = np.finfo(np.float64).tiny
+    gains = _decay_scan(np.maximum(diff, 0.0), beta, floor=floor)
+    losses = _decay_scan(-np.minimum(diff, 0.0), beta, floor=floor)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out[..., length:] = (100.0 * gains / (gains + losses))[..., length - 1:]
+    return out
+
+
+def mom(close, length: int) -> np.ndarray:
+    close = _as_close(close)
+    out = np.full(close.shape, np.nan)
+    out[..., length:] = close[..., length:] - close[..., :-length]
+    return out
+
+
+def roc(close, length: int) -> np.ndarray:
+    close = _as_close(close)
+    out = np.full(close.shape, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out[..., length:] = 100.0 * (close[..., length:] - close[..., :-length]) / close[..., :-length]
+    return out
+
+
+def bbands(close, length: int, std: float = 2.0) -> Dict[str, np.ndarray]:
+    """Bollinger Bands around an SMA with population standard deviation."""
+    close = _as_close(close)
+    if close.ndim > 1:
+        # Rolling variance is taken per row
+        rows = [bbands(row, length, std) for row in close.reshape(-1, close.shape[-1])]
+        return {k: np.stack([r[k] for r in rows]).reshape(close.shape) for k in rows[0]}
+    mid = sma(close, length)
+    _, var = _rolling_moments(close, length)
+    dev = std * np.sqrt(var)
+    lower = mid - dev
+    upper = mid + dev
+    width = _non_zero_range(upper, lower)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "lower": lower,
+            "middle": mid,
+            "upper": upper,
+            "bandwidth": 100.0 * width / mid,
+            "percent": _non_zero_range(close, lower) / width,
+        }
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, np.ndarray]:
+    close = _as_close(close)
+    if slow < fast:
+        fast, slow = slow, fast
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = np.full(close.shape, np.nan)
+    first = slow - 1
+    if close.shape[-1] > first:
+        signal_line[..., first:] = ema(line[..., first:], signal)
+    return {
+        "macd": line,
+        "signal": signal_line,
+        "histogram": line - signal_line,
+    }
+
+
+# Indicator banks: one indicator for many windows as a (len(lengths), n)
+# matrix, sharing whatever does not depend on the window. Row i equals the
+# single-window function called with lengths[i], with its warm-up bars set to
+# `warmup`. Rows are written in place to keep memory traffic to one pass.
+
+def _lengths(lengths) -> np.ndarray:
+    return np.asarray(lengths, dtype=np.int64).reshape(-1)
+
+
+def _bank(lengths: np.ndarray, n: int, warmup: float) -> np.ndarray:
+    if warmup == 0.0:
+        return np.zeros((lengths.size, n))
+    return np.full((lengths.size, n), warmup)
+
+
+def sma_bank(close, lengths, warmup: float = np.nan) -> np.ndarray:
+    close = _as_close(close)
+    lengths = _lengths(lengths)
+    out = _bank(lengths, close.size, warmup)
+    if close.size == 0:
+        return out
+    # One centered cumulative sum for every window, as in sma()
+    ref = close.mean()
+    csum = np.empty(close.size + 1)
+    csum[0] = 0.0
+    np.cumsum(close - ref, out=csum[1:])
+    for i, length in enumerate(lengths):
+        if close.size >= length:
+            row = out[i, length - 1:]
+            np.subtract(csum[length:], csum[:-length], out=row)
+            row /= length
+            row += ref
+    return out
+
+
+def ema_bank(close, lengths, warmup: float = np.nan) -> np.ndarray:
+    close = _as_close(close)
+    lengths = _lengths(lengths)
+    out = _bank(lengths, close.size, warmup)
+    # Recursive filters are scanned row by row straight into the matrix; a
+    # single 2-D scan over all windows moves far more memory and is slower
+    for i, length in enumerate(lengths):
+        if close.size >= length:
+            alpha = 2.0 / (length + 1)
+            seed = close[:length].mean()
+            out[i, length - 1] = seed
+            out[i, length:] = _decay_scan(alpha * close[length:], 1.0 - alpha, seed)
+    return out
+
+
+def rsi_bank(close, lengths, warmup: float = np.nan) -> np.ndarray:
+    close = _as_close(close)
+    lengths = _lengths(lengths)
+    out = _bank(lengths, close.size, warmup)
+    if close.size < 2:
+        return out
+    # Gains and losses are the same for every window; only the decay differs
+    diff = np.diff(close)
+    up = np.maximum(diff, 0.0)
+    down = -np.minimum(diff, 0.0)
+    floor = np.finfo(np.float64).tiny
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for i, length in enumerate(lengths):
+            if close.size > length:
+                beta = 1.0 - 1.0 / length
+                gains = _decay_scan(up, beta, floor=floor)
+                losses = _decay_scan(down, beta, floor=floor)
+                out[i, length:] = (100.0 * gains / (gains + losses))[length - 1:]
+    return out
+
+
+def mom_bank(close, lengths, warmup: float = np.nan) -> np.ndarray:
+    close = _as_close(close)
+    lengths = _lengths(lengths)
+    out = _bank(lengths, close.size, warmup)
+    for i, length in enumerate(lengths):
+        if close.size > length:
+            np.subtract(close[length:], close[:-length], out=out[i, length:])
+    return out
+
+
+def roc_bank(close, lengths, warmup: float = np.nan) -> np.ndarray:
+    close = _as_close(close)
+    lengths = _lengths(lengths)
+    out = _bank(lengths, close.size, warmup)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for i, length in enumerate(lengths):
+            if close.size > length:
+                row = out[i, length:]
+                np.subtract(close[length:], close[:-length], out=row)
+                row *= 100.0
+                row /= close[:-length]
+    return out
+
+
+def macd_bank(close, signals, fast: int = 12, slow: int = 26, which: str = "histogram",
+              warmup: float = np.nan) -> np.ndarray:
+    """MACD for many signal lengths; the fast/slow EMA line is computed once."""
+    close = _as_close(close)
+    signals = _lengths(signals)
+    if slow < fast:
+        fast, slow = slow, fast
+    line = ema(close, fast) - ema(close, slow)
+    out = _bank(signals, close.size, warmup)
+    first = slow - 1
+    if which == "macd":
+        out[:, first:] = line[first:]
+    elif close.size > first:
+        signal_lines = ema_bank(line[first:], signals, warmup)
+        if which == "histogram":
+            np.subtract(line[first:], signal_lines, out=signal_lines)
+            # Warm-up of the signal line stays warm-up in the histogram
+            for i, length in enumerate(signals):
+                signal_lines[i, :length - 1] = warmup
+        out[:, first:] = signal_lines
+    return out
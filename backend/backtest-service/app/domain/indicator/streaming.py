@@ -0,0 +1,329 @@
+"""
+Streaming counterparts of the indicators: update(close) takes one new close
+and returns the value the batch indicator (IndicatorFactory ...bt_callable())
+gives on that bar, including 0.0 during warm-up, in O(1) time and memory
+per indicator. Values agree with the batch ones to float rounding.
+
+warm(closes) brings an indicator to the state it has after update() on
+every close, computed with the vectorized numpy_ta functions.
+"""
+import math
+import sys
+from abc import ABC, abstractmethod
+from collections import deque
+
+import numpy as np
+
+from app.domain.indicator import numpy_ta
+
+_NAN = float("nan")
+
+
+def _out(value: float) -> float:
+    # Như Indicator._array_out: NaN (khởi động, 0/0) thành 0
+    return 0.0 if math.isnan(value) else value
+
+
+class StreamingIndicator(ABC):
+    def __init__(self, window: int):
+        if not isinstance(window, int) or window <= 0:
+            raise ValueError("window must be a positive integer")
+        self.window = window
+        self.value = 0.0
+        self.count = 0
+
+    @abstractmethod
+    def update(self, close: float) -> float:
+        ...
+
+    def warm(self, closes: np.ndarray) -> float:
+        """Same as update() on each close in turn; returns the last value."""
+        for close in closes:
+            self.update(float(close))
+        return self.value
+
+
+class _RollingSum:
+    """Sum and sum of squares of the last `window` values, offset by the first one."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.ref = None
+        self.total = 0.0
+        self.total_sq = 0.0
+        self._since_resum = 0
+
+    def push(self, x: float) -> None:
+        if self.ref is None:
+            self.ref = x
+        d = x - self.ref
+        if len(self.values) == self.window:
+            old = self.values[0] - self.ref
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(x)
+        self.total += d
+        self.total_sq += d * d
+        self._since_resum += 1
+        # Cộng lại từ đầu mỗi `window` bước để sai số không tích luỹ; O(1) trung bình
+        if self._since_resum >= self.window:
+            self._since_resum = 0
+            devs = [v - self.ref for v in self.values]
+            self.total = math.fsum(devs)
+            self.total_sq = math.fsum(d * d for d in devs)
+
+    def warm(self, xs: np.ndarray) -> None:
+        self.values.extend(float(x) for x in xs[-self.window:])
+        if not self.values:
+            return
+        self.ref = self.values[0]
+        devs = [v - self.ref for v in self.values]
+        self.total = math.fsum(devs)
+        self.total_sq = math.fsum(d * d for d in devs)
+        self._since_resum = 0
+
+    def full(self) -> bool:
+        return len(self.values) == self.window
+
+    def mean(self) -> float:
+        return self.total / self.window + self.ref
+
+    def var(self) -> float:
+        m = self.total / self.window
+        return max(self.total_sq / self.window - m * m, 0.0)
+
+
+class StreamingSMA(StreamingIndicator):
+    def __init__(self, window: int):
+        super().__init__(window)
+        self._sum = _RollingSum(window)
+
+    def update(self, close: float) -> float:
+        self.count += 1
+        self._sum.push(close)
+        self.value = self._sum.mean() if self._sum.full() else 0.0
+        return self.value
+
+    def warm(self, closes: np.ndarray) -> float:
+        self.count += len(closes)
+        self._sum.warm(closes)
+        self.value = self._sum.mean() if self._sum.full() else 0.0
+        return self.value
+
+
+class StreamingBBANDS(StreamingIndicator):
+    """Bollinger band `band` (lower|middle|upper|percent|bandwidth), population std."""
+
+    def __init__(self, window: int, band: str = "middle", std: float = 2.0):
+        super().__init__(window)
+        band = band.lower()
+        if band not in {"lower", "middle", "upper", "percent", "bandwidth"}:
+            raise ValueError("band must be one of lower|middle|upper|percent|bandwidth")
+        self.band = band
+        self.std = std
+        self._sum = _RollingSum(window)
+
+    def update(self, close: float) -> float:
+        self.count += 1
+        self._sum.push(close)
+        self.value = self._band(close)
+        return self.value
+
+    def warm(self, closes: np.ndarray) -> float:
+        self.count += len(closes)
+        self._sum.warm(closes)
+        if len(closes):
+            self.value = self._band(float(closes[-1]))
+        return self.value
+
+    def _band(self, close: float) -> float:
+        if not self._sum.full():
+            return 0.0
+        mid = self._sum.mean()
+        dev = self.std * math.sqrt(self._sum.var())
+        lower, upper = mid - dev, mid + dev
+        # numpy_ta cộng epsilon khi độ rộng bằng 0; ở đây chỉ áp dụng cho nến hiện tại
+        width = (upper - lower) or sys.float_info.epsilon
+        value = {
+            "lower": lower,
+            "middle": mid,
+            "upper": upper,
+            "bandwidth": 100.0 * width / mid if mid else _NAN,
+            "percent": ((close - lower) or sys.float_info.epsilon) / width,
+        }[self.band]
+        return _out(value)
+
+
+class _EMA:
+    """EMA seeded with the mean of the first `length` inputs; NaN before that."""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self.seen = 0
+        self.seed_sum = 0.0
+        self.value = _NAN
+
+    def push(self, x: float) -> float:
+        self.seen += 1
+        if self.seen < self.length:
+            self.seed_sum += x
+        elif self.seen == self.length:
+            self.value = (self.seed_sum + x) / self.length
+        else:
+            self.value = self.alpha * x + (1.0 - self.alpha) * self.value
+        return self.value
+
+    def warm(self, xs: np.ndarray) -> np.ndarray:
+        """push() on every x; returns the whole EMA series of xs."""
+        if self.seen:
+            raise ValueError("warm() needs a fresh EMA")
+        series = numpy_ta.ema(xs, self.length)
+        self.seen = len(xs)
+        if self.seen < self.length:
+            self.seed_sum = float(np.sum(xs))
+        else:
+            self.value = float(series[-1])
+        return series
+
+
+class StreamingEMA(StreamingIndicator):
+    def __init__(self, window: int):
+        super().__init__(window)
+        self._ema = _EMA(window)
+
+    def update(self, close: float) -> float:
+        self.count += 1
+        self.value = _out(self._ema.push(close))
+        return self.value
+
+    def warm(self, closes: np.ndarray) -> float:
+        if self.count:
+            return super().warm(closes)
+        self.count = len(closes)
+        self._ema.warm(closes)
+        self.value = _out(self._ema.value)
+        return self.value
+
+
+class StreamingRSI(StreamingIndicator):
+    """RSI on decayed gain/loss sums (pandas_ta's rma), as numpy_ta.rsi."""
+
+    def __init__(self, window: int):
+        super().__init__(window)
+        self._beta = 1.0 - 1.0 / window
+        self._gains = 0.0
+        self._losses = 0.0
+        self._prev = None
+
+    def update(self, close: float) -> float:
+        self.count += 1
+        if self._prev is not None:
+            diff = close - self._prev
+            self._gains = self._beta * self._gains + max(diff, 0.0)
+            self._losses = self._beta * self._losses + max(-diff, 0.0)
+        self._prev = close
+        self.value = self._rsi()
+        return self.value
+
+    def warm(self, closes: np.ndarray) -> float:
+        if self.count:
+            return super().warm(closes)
+        closes = np.asarray(closes, dtype=np.float64)
+        self.count = len(closes)
+        if self.count:
+            diff = np.diff(closes)
+            # Cùng tổng suy giảm như numpy_ta.rsi
+            floor = np.finfo(np.float64).tiny
+            if len(diff):
+                self._gains = float(numpy_ta._decay_scan(np.maximum(diff, 0.0), self._beta, floor=floor)[-1])
+                self._losses = float(numpy_ta._decay_scan(-np.minimum(diff, 0.0), self._beta, floor=floor)[-1])
+            self._prev = float(closes[-1])
+        self.value = self._rsi()
+        return self.value
+
+    def _rsi(self) -> float:
+        if self.count <= self.window:
+            return 0.0
+        total = self._gains + self._losses
+        return 100.0 * self._gains / total if total else 0.0
+
+
+class StreamingMACD(StreamingIndicator):
+    """MACD 12/26; `window` is the signal length, as MACDIndicator."""
+
+    def __init__(self, window: int, line: str = "histogram", fast: int = 12, slow: int = 26):
+        super().__init__(window)
+        line = line.lower()
+        if line not in {"macd", "signal", "histogram"}:
+            raise ValueError("line must be one of macd|signal|histogram")
+        if slow < fast:
+            fast, slow = slow, fast
+        self.line = line
+        self._fast = _EMA(fast)
+        self._slow = _EMA(slow)
+        self._signal = _EMA(window)
+
+    def update(self, close: float) -> float:
+        self.count += 1
+        macd = self._fast.push(close) - self._slow.push(close)
+        signal = self._signal.push(macd) if not math.isnan(macd) else _NAN
+        self.value = self._line(macd, signal)
+        return self.value
+
+    def warm(self, closes: np.ndarray) -> float:
+        if self.count:
+            return super().warm(closes)
+        self.count = len(closes)
+        macd = self._fast.warm(closes) - self._slow.warm(closes)
+        self._signal.warm(macd[~np.isnan(macd)])
+        if self.count:
+            self.value = self._line(float(macd[-1]), self._signal.value)
+        return self.value
+
+    def _line(self, macd: float, signal: float) -> float:
+        return _out({"macd": macd, "signal": signal, "histogram": macd - signal}[self.line])
+
+
+class _Lagged(StreamingIndicator):
+    """Keeps the last window + 1 closes in a ring buffer."""
+
+    def __init__(self, window: int):
+        super().__init__(window)
+        self._closes = deque(maxlen=window + 1)
+
+    def update(self, close: float) -> float:
+        self.count += 1
+        self._closes.append(close)
+        if len(self._closes) <= self.window:
+            self.value = 0.0
+        else:
+            self.value = _out(self._change(close, self._closes[0]))
+        return self.value
+
+    def warm(self, closes: np.ndarray) -> float:
+        self.count += len(closes)
+        self._closes.extend(float(c) for c in closes[-(self.window + 1):])
+        if len(self._closes) <= self.window:
+            self.value = 0.0
+        else:
+            self.value = _out(self._change(self._closes[-1], self._closes[0]))
+        return self.value
+
+    @abstractmethod
+    def _change(self, close: float, past: float) -> float:
+        ...
+
+
+class StreamingMOM(_Lagged):
+    def _change(self, close: float, past: float) -> float:
+        return close - past
+
+
+class StreamingROC(_Lagged):
+    def _change(self, close: float, past: float) -> float:
+        if not past:
+            # Như numpy: x/0 = ±inf, 0/0 = NaN
+            return math.copysign(math.inf, close) if close else _NAN
+        return 100.0 * (close - past) / past
@@ -1,3 +1,4 @@
+import math
 
 import numpy as np
 from app.domain.method.Method import Method
@@ -9,4 +10,10 @@ class BelowOrEqual(Method):
     def compare(self, a, b):
         a1 = float(a[-1]); b1 = float(b[-1] if hasattr(b, "__len__") else b)
         if not (np.isfinite(a1) and np.isfinite(b1)): return False
-        return a1 <= b1
\ No newline at end of file
+        return a1 <= b1
+    def compare_all(self, a, b):
+        a, b = self._as_arrays(a, b)
+        with np.errstate(invalid="ignore"):
+            return np.isfinite(a) & np.isfinite(b) & (a <= b)
+    def compare_step(self, prev_a, a, prev_b, b):
+        return math.isfinite(a) and math.isfinite(b) and a <= b
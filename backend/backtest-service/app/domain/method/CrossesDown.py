@@ -1,4 +1,5 @@
 
+import numpy as np
 from backtesting.lib import crossover
 from app.domain.method.Method import Method
 
@@ -8,4 +9,12 @@ class CrossesDown(Method):
     def __init__(self):
         super().__init__("CrossesDown")
     def compare(self, a, b):
-        return bool(crossover(b, a))
\ No newline at end of file
+        return bool(crossover(b, a))
+    def compare_all(self, a, b):
+        a, b = self._as_arrays(a, b)
+        out = np.zeros(a.shape, dtype=bool)
+        with np.errstate(invalid="ignore"):
+            out[1:] = (b[:-1] < a[:-1]) & (b[1:] > a[1:])
+        return out
+    def compare_step(self, prev_a, a, prev_b, b):
+        return prev_b < prev_a and b > a
@@ -1,3 +1,4 @@
+import numpy as np
 from app.domain.method.Method import Method
 from backtesting.lib import crossover
 
@@ -6,4 +7,12 @@ class CrossesUp(Method):
     def __init__(self):
         super().__init__("CrossesUp")
     def compare(self, a, b):
-        return bool(crossover(a, b))
\ No newline at end of file
+        return bool(crossover(a, b))
+    def compare_all(self, a, b):
+        a, b = self._as_arrays(a, b)
+        out = np.zeros(a.shape, dtype=bool)
+        with np.errstate(invalid="ignore"):
+            out[1:] = (a[:-1] < b[:-1]) & (a[1:] > b[1:])
+        return out
+    def compare_step(self, prev_a, a, prev_b, b):
+        return prev_a < prev_b and a > b
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 import numpy as np
-from typing import Union
+from typing import Tuple, Union
 
 class Method(ABC):
     def __init__(self, name: str):
@@ -9,4 +9,19 @@ class Method(ABC):
 
     @abstractmethod
     def compare(self, a: np.ndarray, b: Union[np.ndarray, float]) -> bool:
-        ...
\ No newline at end of file
+        ...
+
+    @abstractmethod
+    def compare_all(self, a: np.ndarray, b: Union[np.ndarray, float]) -> np.ndarray:
+        """Vectorized compare(): element i is the result compare() gives on bar i."""
+        ...
+
+    def compare_step(self, prev_a: float, a: float, prev_b: float, b: float) -> bool:
+        """compare_all() for the newest bar only, given it and the one before."""
+        return bool(self.compare_all(np.array([prev_a, a]), np.array([prev_b, b]))[-1])
+
+    @staticmethod
+    def _as_arrays(a, b) -> Tuple[np.ndarray, np.ndarray]:
+        a = np.asarray(a, dtype=float)
+        b = np.broadcast_to(np.asarray(b, dtype=float), a.shape)
+        return a, b
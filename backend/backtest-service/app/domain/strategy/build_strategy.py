@@ -1,25 +1,41 @@
-import re
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Optional, Tuple
 from backtesting import Strategy
 import numpy as np
 
 from app.domain.method import Method
+from app.domain.strategy.signal_compiler import compile_condition, evaluate_rule
+from app.domain.strategy.signals import indicator_key
 from app.dto.request.Side import Side
 from app.dto.request.StrategyConfigDTO import StrategyConfigDTO
 from app.factory.IndicatorFactory import IndicatorFactory
 from app.factory.MethodFactory import MethodFactory
+from app.profiling import span
+
+# Số bar giữa hai lần gọi progress
+PROGRESS_EVERY = 1000
+
+def build_strategy(cfg: StrategyConfigDTO, indicator_cache: Optional[Dict[Tuple[str, int], np.ndarray]] = None,
+                   progress: Optional[Callable[[int], None]] = None):
+    """
+    indicator_cache, when given, maps (type, window) to indicator values already
+    computed on the same candles, and is filled with the ones computed here.
+    progress, when given, is called with the current bar index every
+    PROGRESS_EVERY bars; an exception it raises aborts the run.
+    """
+    rule_ids = {f"s{i}" for i in range(len(cfg.rules))}
+    buy_condition = compile_condition(cfg.buyCondition, rule_ids)
+    sell_condition = compile_condition(cfg.sellCondition, rule_ids)
 
-def build_strategy(cfg: StrategyConfigDTO):
     class DynamicStrategy(Strategy):
         def init(self):
             self._rules: Dict[str, Tuple[Method, str, str]] = {}
-            self._buy_rule_ids: List[str] = self._extract_rule_ids(cfg.buyCondition)
-            self._sell_rule_ids: List[str] = self._extract_rule_ids(cfg.sellCondition)
 
             
             def get_attr_name(side: Side) -> str:
                 if side.type == "CONST":
                     return f"CONST_{str(side.const).replace('.', '_')}"
+                if side.timeframe:
+                    return f"{side.type}_{side.window}_{side.timeframe}"
                 return f"{side.type}_{side.window}"
 
             
@@ -28,11 +44,23 @@ def build_strategy(cfg: StrategyConfigDTO):
                 if not hasattr(self, attr_name):
                     if side.type == "CONST":
                         setattr(self, attr_name, np.full(len(self.data.Close), side.const))
+                    elif indicator_cache is not None and indicator_key(side) in indicator_cache:
+                        # Named like the computed path ("fn(C)") so trade rows keep Entry_fn/Exit_fn
+                        def fn(_, values=indicator_cache[indicator_key(side)]):
+                            return values
+                        indicator_proxy = self.I(fn, self.data.Close)
+                        setattr(self, attr_name, indicator_proxy)
+                    elif side.timeframe:
+                        raise ValueError(f"{side.type} {side.window} on {side.timeframe} needs candle times, "
+                                         "which only the backtest runs have")
                     else:
                         ind = IndicatorFactory.create(side.type, side.window)
                         fn, args = ind.bt_callable()
-                        indicator_proxy = self.I(fn, self.data.Close, *args)
+                        with span("indicator", f"{side.type}_{side.window}"):
+                            indicator_proxy = self.I(fn, self.data.Close, *args)
                         setattr(self, attr_name, indicator_proxy)
+                        if indicator_cache is not None:
+                            indicator_cache[indicator_key(side)] = np.asarray(indicator_proxy)
                 return attr_name
 
             cnt = 0
@@ -43,50 +71,23 @@ def build_strategy(cfg: StrategyConfigDTO):
                 self._rules[f"s{cnt}"] = (method, lk_attr, rk_attr)
                 cnt += 1
 
-            self._buy_rule_ids  = self._extract_rule_ids(cfg.buyCondition)
-            self._sell_rule_ids = self._extract_rule_ids(cfg.sellCondition)
-        def _has_nan_for_rules(self, rule_ids):
-            for rid in rule_ids:
-                method, lk_key, rk_key = self._rules[rid]
-                lk_val = getattr(self, lk_key)[-1]
-                rk_val = getattr(self, rk_key)[-1]
-                if not np.isfinite(lk_val) or not np.isfinite(rk_val):
-                    return True
-            return False
-        def _extract_rule_ids(self, expr: str) -> List[str]:
-            return sorted(set(re.findall(r"\bs\d+\b", expr or "")))
-
-        def _eval_rule(self, rid: str) -> bool:
-            method, lk_attr, rk_attr = self._rules[rid]
-            a = getattr(self, lk_attr)
-            b = getattr(self, rk_attr)
-            return bool(method.compare(a, b))
-        
-        def _eval_expr_bool(self, expr: str) -> bool:
-            if not re.fullmatch(r"[()\s!&|s\d]+", expr or ""):
-                raise ValueError("Invalid characters in logical expression")
-            expr_py = (
-                (expr or "")
-                .replace("&", " and ")
-                .replace("|", " or ")
-                .replace("!", " not ")
-            )
-            def repl(m):
-                return str(self._eval_rule(m.group(0)))
-            expr_py = re.sub(r"\bs\d+\b", repl, expr_py)
-            return bool(eval(expr_py, {"__builtins__": None}, {}))
+            # Every rule is evaluated once over the full indicator arrays;
+            # next() only looks up the current bar.
+            rule_values: Dict[str, np.ndarray] = {}
+            rule_ready: Dict[str, np.ndarray] = {}
+            for rid, (method, lk_attr, rk_attr) in self._rules.items():
+                rule_values[rid], rule_ready[rid] = evaluate_rule(
+                    method, getattr(self, lk_attr), getattr(self, rk_attr)
+                )
+            self._long_signal = buy_condition.evaluate(rule_values, rule_ready)
+            self._short_signal = sell_condition.evaluate(rule_values, rule_ready)
 
         def next(self):
-            long_entry = False
-            short_entry = False
-
-            buy_ready = not self._has_nan_for_rules(self._buy_rule_ids)
-            if buy_ready:
-                long_entry = self._eval_expr_bool(cfg.buyCondition)
-
-            sell_ready = not self._has_nan_for_rules(self._sell_rule_ids)
-            if sell_ready:
-                short_entry = self._eval_expr_bool(cfg.sellCondition)
+            i = len(self.data) - 1
+            if progress is not None and i % PROGRESS_EVERY == 0:
+                progress(i)
+            long_entry = bool(self._long_signal[i])
+            short_entry = bool(self._short_signal[i])
 
             price = self.data.Close[-1]
             
@@ -0,0 +1,192 @@
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, List, Set
+
+import numpy as np
+
+_ALLOWED = re.compile(r"[()\s!&|s\d]+")
+_TOKEN = re.compile(r"\s*(s\d+|[()!&|])")
+
+
+class Node(ABC):
+    @abstractmethod
+    def evaluate(self, rule_values: Dict[str, np.ndarray]) -> np.ndarray:
+        """The expression over whole arrays of rule results."""
+        ...
+
+    @abstractmethod
+    def evaluate_bar(self, rule_values: Dict[str, bool]) -> bool:
+        """The expression on one bar's rule results."""
+        ...
+
+    @abstractmethod
+    def rule_ids(self) -> Set[str]:
+        ...
+
+
+class RuleRef(Node):
+    def __init__(self, rule_id: str):
+        self.rule_id = rule_id
+
+    def evaluate(self, rule_values):
+        return rule_values[self.rule_id]
+
+    def evaluate_bar(self, rule_values):
+        return rule_values[self.rule_id]
+
+    def rule_ids(self):
+        return {self.rule_id}
+
+
+class Not(Node):
+    def __init__(self, operand: Node):
+        self.operand = operand
+
+    def evaluate(self, rule_values):
+        return ~self.operand.evaluate(rule_values)
+
+    def evaluate_bar(self, rule_values):
+        return not self.operand.evaluate_bar(rule_values)
+
+    def rule_ids(self):
+        return self.operand.rule_ids()
+
+
+class And(Node):
+    def __init__(self, left: Node, right: Node):
+        self.left = left
+        self.right = right
+
+    def evaluate(self, rule_values):
+        return self.left.evaluate(rule_values) & self.right.evaluate(rule_values)
+
+    def evaluate_bar(self, rule_values):
+        return self.left.evaluate_bar(rule_values) and self.right.evaluate_bar(rule_values)
+
+    def rule_ids(self):
+        return self.left.rule_ids() | self.right.rule_ids()
+
+
+class Or(Node):
+    def __init__(self, left: Node, right: Node):
+        self.left = left
+        self.right = right
+
+    def evaluate(self, rule_values):
+        return self.left.evaluate(rule_values) | self.right.evaluate(rule_values)
+
+    def evaluate_bar(self, rule_values):
+        return self.left.evaluate_bar(rule_values) or self.right.evaluate_bar(rule_values)
+
+    def rule_ids(self):
+        return self.left.rule_ids() | self.right.rule_ids()
+
+
+def _tokenize(expr: str) -> List[str]:
+    tokens, pos = [], 0
+    expr = expr.rstrip()
+    while pos < len(expr):
+        m = _TOKEN.match(expr, pos)
+        if not m:
+            raise ValueError(f"Invalid token in logical expression at position {pos}: {expr!r}")
+        tokens.append(m.group(1))
+        pos = m.end()
+    return tokens
+
+
+class _Parser:
+    # Same precedence as the python expression the conditions used to be
+    # rewritten to: "!" -> not, "&" -> and, "|" -> or.
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _take(self):
+        tok = self._peek()
+        if tok is None:
+            raise ValueError("Unexpected end of logical expression")
+        self.pos += 1
+        return tok
+
+    def parse(self) -> Node:
+        node = self._or()
+        if self._peek() is not None:
+            raise ValueError(f"Unexpected token in logical expression: {self._peek()}")
+        return node
+
+    def _or(self) -> Node:
+        node = self._and()
+        while self._peek() == "|":
+            self._take()
+            node = Or(node, self._and())
+        return node
+
+    def _and(self) -> Node:
+        node = self._not()
+        while self._peek() == "&":
+            self._take()
+            node = And(node, self._not())
+        return node
+
+    def _not(self) -> Node:
+        if self._peek() == "!":
+            self._take()
+            return Not(self._not())
+        return self._atom()
+
+    def _atom(self) -> Node:
+        tok = self._take()
+        if tok == "(":
+            node = self._or()
+            if self._take() != ")":
+                raise ValueError("Unbalanced parentheses in logical expression")
+            return node
+        if tok.startswith("s"):
+            return RuleRef(tok)
+        raise ValueError(f"Unexpected token in logical expression: {tok}")
+
+
+class CompiledCondition:
+    """A buy/sell condition parsed once and evaluated over whole arrays."""
+
+    def __init__(self, expr: str):
+        if not _ALLOWED.fullmatch(expr or ""):
+            raise ValueError("Invalid characters in logical expression")
+        self.expr = expr
+        self.tree = _Parser(_tokenize(expr)).parse()
+        self.rule_ids: List[str] = sorted(self.tree.rule_ids())
+
+    def evaluate(self, rule_values: Dict[str, np.ndarray], rule_ready: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Boolean signal per bar. A bar only fires when every rule referenced by
+        the condition has finite inputs on that bar.
+        """
+        signal = self.tree.evaluate(rule_values)
+        for rid in self.rule_ids:
+            signal = signal & rule_ready[rid]
+        return signal
+
+    def evaluate_bar(self, rule_values: Dict[str, bool], rule_ready: Dict[str, bool]) -> bool:
+        """evaluate() for a single bar, on plain bools."""
+        return all(rule_ready[rid] for rid in self.rule_ids) and self.tree.evaluate_bar(rule_values)
+
+
+def compile_condition(expr: str, known_rule_ids=None) -> CompiledCondition:
+    cond = CompiledCondition(expr)
+    if known_rule_ids is not None:
+        unknown = [rid for rid in cond.rule_ids if rid not in known_rule_ids]
+        if unknown:
+            raise ValueError(f"Unknown rule ids in logical expression: {', '.join(unknown)}")
+    return cond
+
+
+def evaluate_rule(method, a, b):
+    """Returns (values, ready) arrays for one rule over every bar."""
+    a = np.asarray(a, dtype=float)
+    b = np.broadcast_to(np.asarray(b, dtype=float), a.shape)
+    values = np.asarray(method.compare_all(a, b), dtype=bool)
+    ready = np.isfinite(a) & np.isfinite(b)
+    return values, ready
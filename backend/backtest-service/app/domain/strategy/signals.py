@@ -0,0 +1,123 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.domain.strategy.signal_compiler import compile_condition, evaluate_rule
+from app.dto.request.Side import Side
+from app.dto.request.StrategyConfigDTO import StrategyConfigDTO
+from app.factory.IndicatorFactory import IndicatorFactory
+from app.factory.MethodFactory import MethodFactory
+from app.profiling import span
+
+
+@dataclass
+class StrategySignals:
+    long_entry: np.ndarray
+    short_entry: np.ndarray
+    # Indicator arrays in creation order, as build_strategy registers them
+    indicators: List[np.ndarray] = field(default_factory=list)
+
+
+def indicator_key(side: Side) -> tuple:
+    """
+    indicator_cache key: (type, window) on the config's candles, (type,
+    window, timeframe) for an indicator on a higher timeframe.
+    """
+    if side.timeframe:
+        return side.type, side.window, side.timeframe
+    return side.type, side.window
+
+
+def compute_indicator(side: Side, close: np.ndarray,
+                      indicator_cache: Optional[Dict[tuple, np.ndarray]] = None) -> np.ndarray:
+    key = indicator_key(side)
+    if indicator_cache is not None and key in indicator_cache:
+        return indicator_cache[key]
+    if side.timeframe:
+        # Cần thời gian của nến để resample; xem timeframes.timeframe_indicators
+        raise ValueError(f"{side.type} {side.window} on {side.timeframe} needs candle times, "
+                         "which only the backtest runs have")
+    fn, args = IndicatorFactory.create(side.type, side.window).bt_callable()
+    with span("indicator", f"{side.type}_{side.window}"):
+        values = np.asarray(fn(close, *args), dtype=float)
+    if indicator_cache is not None:
+        indicator_cache[key] = values
+    return values
+
+
+def compute_signals(cfg: StrategyConfigDTO, close: np.ndarray,
+                    indicator_cache: Optional[Dict[Tuple[str, int], np.ndarray]] = None) -> StrategySignals:
+    """
+    Long/short entry signal for every bar of `close`, without a backtesting.py
+    Strategy. Gives the same arrays DynamicStrategy precomputes in init().
+    """
+    close = np.asarray(close, dtype=float)
+    rule_ids = {f"s{i}" for i in range(len(cfg.rules))}
+    buy_condition = compile_condition(cfg.buyCondition, rule_ids)
+    sell_condition = compile_condition(cfg.sellCondition, rule_ids)
+
+    sides: Dict[Tuple[str, object], np.ndarray] = {}
+    indicators: List[np.ndarray] = []
+
+    def side_values(side: Side) -> np.ndarray:
+        key = ("CONST", side.const) if side.type == "CONST" else indicator_key(side)
+        if key not in sides:
+            if side.type == "CONST":
+                sides[key] = np.full(len(close), side.const, dtype=float)
+            else:
+                sides[key] = compute_indicator(side, close, indicator_cache)
+                indicators.append(sides[key])
+        return sides[key]
+
+    rule_values: Dict[str, np.ndarray] = {}
+    rule_ready: Dict[str, np.ndarray] = {}
+    for i, rule in enumerate(cfg.rules):
+        a = side_values(rule.left)
+        b = side_values(rule.right)
+        rule_values[f"s{i}"], rule_ready[f"s{i}"] = evaluate_rule(MethodFactory.create(rule.op), a, b)
+
+    return StrategySignals(
+        long_entry=buy_condition.evaluate(rule_values, rule_ready),
+        short_entry=sell_condition.evaluate(rule_values, rule_ready),
+        indicators=indicators,
+    )
+
+
+def latest_signals(cfg: StrategyConfigDTO, closes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Long/short entry signal on the last bar of every row of `closes`
+    (symbols x bars). Indicators are computed over the whole matrix at once;
+    rules are evaluated on the last two bars only, which is all the methods
+    look at.
+    """
+    closes = np.asarray(closes, dtype=float)
+    rule_ids = {f"s{i}" for i in range(len(cfg.rules))}
+    buy_condition = compile_condition(cfg.buyCondition, rule_ids)
+    sell_condition = compile_condition(cfg.sellCondition, rule_ids)
+
+    tail = min(2, closes.shape[1])
+    sides: Dict[Tuple[str, object], np.ndarray] = {}
+
+    def side_values(side: Side) -> np.ndarray:
+        # (bars x symbols): methods compare along axis 0
+        if side.timeframe:
+            raise ValueError("Rules on another timeframe are not supported here")
+        key = ("CONST", side.const) if side.type == "CONST" else (side.type, side.window)
+        if key not in sides:
+            if side.type == "CONST":
+                sides[key] = np.full((tail, closes.shape[0]), side.const, dtype=float)
+            else:
+                fn, args = IndicatorFactory.create(side.type, side.window).bt_callable()
+                sides[key] = np.asarray(fn(closes, *args), dtype=float)[:, -tail:].T
+        return sides[key]
+
+    rule_values: Dict[str, np.ndarray] = {}
+    rule_ready: Dict[str, np.ndarray] = {}
+    for i, rule in enumerate(cfg.rules):
+        a = side_values(rule.left)
+        b = side_values(rule.right)
+        rule_values[f"s{i}"], rule_ready[f"s{i}"] = evaluate_rule(MethodFactory.create(rule.op), a, b)
+
+    return (buy_condition.evaluate(rule_values, rule_ready)[-1],
+            sell_condition.evaluate(rule_values, rule_ready)[-1])
@@ -0,0 +1,105 @@
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.domain.indicator.streaming import StreamingIndicator
+from app.domain.method.Method import Method
+from app.domain.strategy.signal_compiler import CompiledCondition, compile_condition
+from app.dto.request.Side import Side
+from app.dto.request.StrategyConfigDTO import StrategyConfigDTO
+from app.factory.IndicatorFactory import IndicatorFactory
+from app.factory.MethodFactory import MethodFactory
+
+_SideKey = Tuple[str, object]
+
+
+class _Rule:
+    __slots__ = ("id", "method", "left", "right")
+
+    def __init__(self, rule_id: str, method: Method, left: _SideKey, right: _SideKey):
+        self.id = rule_id
+        self.method = method
+        self.left = left
+        self.right = right
+
+
+class StreamingSignals:
+    """
+    Buy/sell signals of many configs over one stream of closes, bar by bar.
+
+    Every distinct (type, window) is a streaming indicator updated once per
+    bar and shared by all configs; rules only look at the current and the
+    previous value of their two sides. update() gives, per config, what
+    compute_signals() gives on the newest bar of the same closes.
+    """
+
+    def __init__(self, configs: List[StrategyConfigDTO]):
+        self._indicators: Dict[_SideKey, StreamingIndicator] = {}
+        self._current: Dict[_SideKey, float] = {}
+        self._previous: Dict[_SideKey, float] = {}
+        self._finite: Dict[_SideKey, bool] = {}
+        self._strategies: List[Tuple[List[_Rule], CompiledCondition, CompiledCondition]] = []
+        for cfg in configs:
+            rule_ids = {f"s{i}" for i in range(len(cfg.rules))}
+            rules = [
+                _Rule(f"s{i}", MethodFactory.create(r.op), self._side(r.left), self._side(r.right))
+                for i, r in enumerate(cfg.rules)
+            ]
+            self._strategies.append((
+                rules,
+                compile_condition(cfg.buyCondition, rule_ids),
+                compile_condition(cfg.sellCondition, rule_ids),
+            ))
+
+    def _side(self, side: Side) -> _SideKey:
+        if side.type == "CONST":
+            key = ("CONST", side.const)
+            self._current[key] = self._previous[key] = float(side.const)
+            self._finite[key] = math.isfinite(float(side.const))
+        else:
+            if side.timeframe:
+                raise ValueError("Streaming signals do not support rules on another timeframe")
+            key = (side.type, side.window)
+            if key not in self._indicators:
+                self._indicators[key] = IndicatorFactory.create_streaming(side.type, side.window)
+                self._current[key] = math.nan
+        return key
+
+    @property
+    def indicator_count(self) -> int:
+        return len(self._indicators)
+
+    def indicator_values(self) -> List[float]:
+        """Current indicator values, in the order compute_signals() lists them for a single config."""
+        return [self._current[key] for key in self._indicators]
+
+    def warm(self, closes: np.ndarray) -> None:
+        """Brings the state to what update() on every close gives, without the per-bar loop."""
+        if len(closes) == 0:
+            return
+        # Tới nến áp chót bằng numpy, nến cuối qua update() để có giá trị trước đó
+        if len(closes) > 1:
+            for key, ind in self._indicators.items():
+                self._current[key] = ind.warm(closes[:-1])
+        self.update(closes[-1])
+
+    def update(self, close: float) -> List[Tuple[bool, bool]]:
+        """Feeds one closed bar; returns (long_entry, short_entry) per config."""
+        close = float(close)
+        cur, prev, finite = self._current, self._previous, self._finite
+        for key, ind in self._indicators.items():
+            prev[key] = cur[key]
+            cur[key] = value = ind.update(close)
+            finite[key] = math.isfinite(value)
+
+        out = []
+        for rules, buy, sell in self._strategies:
+            values: Dict[str, bool] = {}
+            ready: Dict[str, bool] = {}
+            for r in rules:
+                left, right = r.left, r.right
+                values[r.id] = r.method.compare_step(prev[left], cur[left], prev[right], cur[right])
+                ready[r.id] = finite[left] and finite[right]
+            out.append((buy.evaluate_bar(values, ready), sell.evaluate_bar(values, ready)))
+        return out
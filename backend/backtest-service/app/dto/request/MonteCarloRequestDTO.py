@@ -0,0 +1,15 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+@dataclass
+class MonteCarloRequestDTO:
+    # ReturnPct của từng lệnh (phân số, 0.01 = 1%), theo thứ tự đã khớp
+    returns: List[float]
+    runs: int = 1000
+    # "bootstrap": rút có hoàn lại; "shuffle": hoán vị thứ tự các lệnh
+    method: str = "bootstrap"
+    # Vốn ban đầu; 1.0 = equity tính theo bội số vốn
+    cash: float = 1.0
+    seed: Optional[int] = None
+    percentiles: List[float] = field(default_factory=lambda: [5.0, 25.0, 50.0, 75.0, 95.0])
@@ -0,0 +1,23 @@
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from app.dto.request.StrategyConfigDTO import StrategyConfigDTO
+
+
+@dataclass
+class OptimizeRequestDTO:
+    config: StrategyConfigDTO
+    # "SMA_10" -> candidate windows for every rule side using SMA 10
+    windows: Dict[str, List[int]] = field(default_factory=dict)
+    slPct: List[float] = field(default_factory=list)
+    tpPct: List[float] = field(default_factory=list)
+    objective: str = "sharpe_ratio"
+    maximize: bool = True
+    topN: int = 10
+    # "grid": mọi tổ hợp trên toàn bộ nến; "halving": successive halving,
+    # loại dần ứng viên trên các đoạn nến gần nhất dài dần
+    method: str = "grid"
+    # halving: mỗi vòng giữ 1/eta ứng viên và dùng gấp eta lần số nến
+    eta: int = 3
+    # halving: số nến của vòng đầu tiên (tối thiểu)
+    minBars: int = 2000
@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.dto.request.StrategyConfigDTO import StrategyConfigDTO
+
+
+@dataclass
+class ScanRequestDTO:
+    # Rule và điều kiện mua/bán; symbol, thời gian, lots, slPct, tpPct không dùng
+    config: StrategyConfigDTO
+    symbols: List[str]
+    # Số nến lịch sử cho mỗi symbol; None = đủ cho window lớn nhất
+    lookback: Optional[int] = None
+    # Bỏ nến đang hình thành để tín hiệu không đổi trong lúc nến chạy
+    closedOnly: bool = True
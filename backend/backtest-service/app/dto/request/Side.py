@@ -1,7 +1,11 @@
 from dataclasses import dataclass
+from typing import Optional
 
 @dataclass
 class Side:
     type: str
     window: int = 0
-    const: float = 0.0
\ No newline at end of file
+    const: float = 0.0
+    # Khung thời gian của indicator ("1h", "4h"...), tính lại từ nến gốc;
+    # None = interval của config
+    timeframe: Optional[str] = None
@@ -18,3 +18,5 @@ class StrategyConfigDTO:
     sellCondition: str
     startTime: Optional[datetime] = None
     endTime: Optional[datetime] = None
+    # "backtesting" (backtesting.py) hoặc "fast" (app.domain.engine.fast_engine)
+    engine: str = "backtesting"
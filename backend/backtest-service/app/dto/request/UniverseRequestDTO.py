@@ -0,0 +1,11 @@
+from dataclasses import dataclass
+from typing import List
+
+from app.dto.request.StrategyConfigDTO import StrategyConfigDTO
+
+
+@dataclass
+class UniverseRequestDTO:
+    # Bộ rule chung; config.symbol bị thay bằng từng symbol trong symbols
+    config: StrategyConfigDTO
+    symbols: List[str]
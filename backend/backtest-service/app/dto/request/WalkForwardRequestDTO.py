@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from app.dto.request.OptimizeRequestDTO import OptimizeRequestDTO
+
+
+@dataclass
+class WalkForwardRequestDTO:
+    # Lưới tham số, objective và config như /backtest/optimize
+    optimize: OptimizeRequestDTO
+    folds: int = 5
+    # Tỷ lệ in-sample trong mỗi cửa sổ train + test
+    trainRatio: float = 0.75
+    # Đặt cả hai thì bỏ qua folds/trainRatio: số fold là số cửa sổ vừa khoảng thời gian
+    trainBars: Optional[int] = None
+    testBars: Optional[int] = None
+    # True: in-sample luôn bắt đầu từ nến đầu tiên (cửa sổ mở rộng)
+    anchored: bool = False
@@ -1,15 +1,52 @@
-from typing import List
-from dataclasses import asdict, dataclass
+import json
+from typing import Dict, Iterator, List, Optional
+from dataclasses import asdict, dataclass, fields
 
+from app.dto.response.EquityCurveDTO import EquityCurveDTO
 from app.dto.response.StatDTO import StatDTO
 from app.dto.response.TradeDTO import TradeDTO
 
+TRADE_FIELDS = [f.name for f in fields(TradeDTO)]
+
 @dataclass
 class BacktestResultDTO:
-    trades: List[TradeDTO]
+    # Một list cho mỗi trường của TradeDTO, cùng độ dài
+    trades: Dict[str, List]
     stats: StatDTO
+    # None khi client không yêu cầu (equityPoints=0)
+    equity: Optional[EquityCurveDTO] = None
+
+    def trade_count(self) -> int:
+        return len(self.trades[TRADE_FIELDS[0]]) if self.trades else 0
+
+    def _with_equity(self, d: dict) -> dict:
+        if self.equity is not None:
+            d["equity"] = asdict(self.equity)
+        return d
+
     def to_dict(self):
-        return {
-            "trades": [asdict(t) for t in self.trades],
+        columns = [self.trades[f] for f in TRADE_FIELDS]
+        return self._with_equity({
+            "trades": [dict(zip(TRADE_FIELDS, row)) for row in zip(*columns)],
             "stats": asdict(self.stats)
-        }
\ No newline at end of file
+        })
+
+    def to_columnar_dict(self):
+        return self._with_equity({
+            "format": "columnar",
+            "trades": self.trades,
+            "stats": asdict(self.stats)
+        })
+
+    @classmethod
+    def from_columnar_dict(cls, d: dict) -> "BacktestResultDTO":
+        equity = EquityCurveDTO.from_dict(d["equity"]) if d.get("equity") else None
+        return cls(trades=d["trades"], stats=StatDTO(**d["stats"]), equity=equity)
+
+    def iter_ndjson(self, chunk: int = 1000) -> Iterator[str]:
+        """Stats header line, then one line per trade, `chunk` trades per yielded string."""
+        yield json.dumps(self._with_equity({"stats": asdict(self.stats), "tradeCount": self.trade_count()})) + "\n"
+        columns = [self.trades[f] for f in TRADE_FIELDS]
+        for start in range(0, self.trade_count(), chunk):
+            rows = zip(*(c[start:start + chunk] for c in columns))
+            yield "".join(json.dumps(dict(zip(TRADE_FIELDS, row))) + "\n" for row in rows)
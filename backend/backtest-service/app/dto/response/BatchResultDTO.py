@@ -0,0 +1,14 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+
+@dataclass
+class BatchResultDTO:
+    # Số nhóm (symbol, interval, khoảng thời gian) đã tải nến
+    groups: int
+    # Số indicator (type, window) thực sự được tính, sau khi gộp trong nhóm
+    indicators: int
+    # Theo đúng thứ tự configs gửi lên; config lỗi cho {"error": ...}
+    results: List[Dict[str, Any]]
+    def to_dict(self):
+        return {"groups": self.groups, "indicators": self.indicators, "results": self.results}
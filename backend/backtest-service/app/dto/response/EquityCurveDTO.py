@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+from typing import List
+
+
+@dataclass
+class SeriesDTO:
+    # Thời gian (epoch ms) và giá trị, cùng độ dài
+    time: List[int]
+    value: List[float]
+
+
+@dataclass
+class EquityCurveDTO:
+    equity: SeriesDTO
+    # Drawdown theo %, <= 0, cùng quy ước với max_drawdown_pct
+    drawdown: SeriesDTO
+    # Số nến trước khi rút gọn
+    bars: int
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "EquityCurveDTO":
+        return cls(equity=SeriesDTO(**d["equity"]), drawdown=SeriesDTO(**d["drawdown"]), bars=d["bars"])
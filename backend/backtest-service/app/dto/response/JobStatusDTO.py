@@ -0,0 +1,19 @@
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class JobStatusDTO:
+    id: str
+    # queued | running | cancelling | done | failed | cancelled
+    status: str
+    progress: float
+    createdAt: str
+    startedAt: Optional[str] = None
+    finishedAt: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    def to_dict(self):
+        # Không dùng asdict: nó deep-copy cả result
+        values = ((f.name, getattr(self, f.name)) for f in fields(self))
+        return {k: v for k, v in values if v is not None}
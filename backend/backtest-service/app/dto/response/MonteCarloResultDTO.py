@@ -0,0 +1,34 @@
+from dataclasses import asdict, dataclass
+from typing import Dict, List
+
+
+@dataclass
+class DistributionDTO:
+    mean: float
+    std: float
+    min: float
+    max: float
+    # "p5" -> giá trị ở phân vị 5
+    percentiles: Dict[str, float]
+
+
+@dataclass
+class MonteCarloResultDTO:
+    method: str
+    runs: int
+    trades: int
+    # Chỉ số trên chuỗi lệnh gốc, để so với phân phối
+    original: Dict[str, float]
+    final_equity: DistributionDTO
+    # Drawdown lớn nhất theo %, <= 0, cùng quy ước với max_drawdown_pct
+    max_drawdown_pct: DistributionDTO
+    # Sharpe theo lệnh: trung bình / độ lệch chuẩn của ReturnPct, không quy năm
+    sharpe: DistributionDTO
+    # Tỉ lệ lần chạy kết thúc dưới vốn ban đầu
+    prob_loss: float
+    # Equity sau lệnh thứ steps[i] ở từng phân vị
+    steps: List[int]
+    equity_bands: Dict[str, List[float]]
+
+    def to_dict(self):
+        return asdict(self)
@@ -0,0 +1,41 @@
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from app.dto.response.StatDTO import StatDTO
+
+
+@dataclass
+class OptimizeCandidateDTO:
+    params: Dict[str, Any]
+    stats: StatDTO
+
+
+@dataclass
+class HalvingStageDTO:
+    # Đoạn nến gần nhất mà vòng này chạy trên đó
+    bars: int
+    start: str
+    candidates: int
+
+
+@dataclass
+class OptimizeResultDTO:
+    objective: str
+    evaluated: int
+    results: List[OptimizeCandidateDTO]
+    method: str = "grid"
+    # Chỉ với method "halving"
+    stages: Optional[List[HalvingStageDTO]] = None
+    # Số nến đã mô phỏng so với chạy cả lưới trên toàn bộ nến
+    work_ratio: float = 1.0
+    def to_dict(self):
+        res = {
+            "objective": self.objective,
+            "method": self.method,
+            "evaluated": self.evaluated,
+            "work_ratio": self.work_ratio,
+            "results": [asdict(r) for r in self.results],
+        }
+        if self.stages is not None:
+            res["stages"] = [asdict(s) for s in self.stages]
+        return res
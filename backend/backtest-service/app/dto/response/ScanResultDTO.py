@@ -0,0 +1,32 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass
+class ScanSymbolDTO:
+    symbol: str
+    # Thời gian mở của nến được đánh giá
+    time: Optional[str] = None
+    close: Optional[float] = None
+    buy: bool = False
+    sell: bool = False
+    error: Optional[str] = None
+    def to_dict(self):
+        if self.error is not None:
+            return {"symbol": self.symbol, "error": self.error}
+        return {"symbol": self.symbol, "time": self.time, "close": self.close, "buy": self.buy, "sell": self.sell}
+
+
+@dataclass
+class ScanResultDTO:
+    interval: str
+    lookback: int
+    results: List[ScanSymbolDTO]
+    def to_dict(self):
+        return {
+            "interval": self.interval,
+            "lookback": self.lookback,
+            "buy": [r.symbol for r in self.results if r.buy],
+            "sell": [r.symbol for r in self.results if r.sell],
+            "results": [r.to_dict() for r in self.results],
+        }
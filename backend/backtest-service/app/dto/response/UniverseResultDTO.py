@@ -0,0 +1,32 @@
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+
+from app.dto.response.EquityCurveDTO import EquityCurveDTO
+from app.dto.response.StatDTO import StatDTO
+
+
+@dataclass
+class UniverseSymbolDTO:
+    symbol: str
+    stats: Optional[StatDTO] = None
+    error: Optional[str] = None
+    def to_dict(self):
+        if self.error is not None:
+            return {"symbol": self.symbol, "error": self.error}
+        return {"symbol": self.symbol, "stats": asdict(self.stats)}
+
+
+@dataclass
+class UniverseResultDTO:
+    symbols: List[UniverseSymbolDTO]
+    # Danh mục chia đều vốn (lots) cho các symbol
+    portfolio: StatDTO
+    equity: Optional[EquityCurveDTO] = None
+    def to_dict(self):
+        d = {
+            "symbols": [s.to_dict() for s in self.symbols],
+            "portfolio": asdict(self.portfolio),
+        }
+        if self.equity is not None:
+            d["equity"] = asdict(self.equity)
+        return d
@@ -0,0 +1,36 @@
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List
+
+from app.dto.response.StatDTO import StatDTO
+
+
+@dataclass
+class WalkForwardFoldDTO:
+    fold: int
+    trainStart: str
+    trainEnd: str
+    testStart: str
+    testEnd: str
+    # Tham số tốt nhất trên in-sample, dùng lại cho out-of-sample
+    params: Dict[str, Any]
+    inSample: StatDTO
+    outOfSample: StatDTO
+
+
+@dataclass
+class WalkForwardResultDTO:
+    objective: str
+    evaluated: int
+    folds: List[WalkForwardFoldDTO]
+    # Lợi nhuận out-of-sample nối các fold lại (gộp kép), %
+    oos_return_pct: float
+    # Walk-forward efficiency: return_ann_pct trung bình out-of-sample / in-sample
+    efficiency: float
+    def to_dict(self):
+        return {
+            "objective": self.objective,
+            "evaluated": self.evaluated,
+            "oos_return_pct": self.oos_return_pct,
+            "efficiency": self.efficiency,
+            "folds": [asdict(f) for f in self.folds],
+        }
@@ -1,10 +1,13 @@
 from app.domain.indicator import Indicator
 from app.domain.indicator.BBANDSIndicator import BBANDSIndicator
 from app.domain.indicator.EMAIndicator import EMAIndicator
+from app.domain.indicator.MACDIndicator import MACDIndicator
 from app.domain.indicator.MOMIndicator import MOMIndicator
 from app.domain.indicator.ROCIndicator import ROCIndicator
 from app.domain.indicator.RSIIndicator import RSIIndicator
 from app.domain.indicator.SMAIndicator import SMAIndicator
+from app.domain.indicator.streaming import (StreamingBBANDS, StreamingEMA, StreamingIndicator, StreamingMACD,
+                                            StreamingMOM, StreamingROC, StreamingRSI, StreamingSMA)
 
 class IndicatorFactory:
     @staticmethod
@@ -15,6 +18,8 @@ class IndicatorFactory:
             return EMAIndicator(window)
         elif indicator_type == "RSI":
             return RSIIndicator(window)
+        elif indicator_type == "MACD":
+            return MACDIndicator(window)
         elif indicator_type == "BBANDS":
             return BBANDSIndicator(window)
         elif indicator_type == "MOM":
@@ -22,4 +27,23 @@ class IndicatorFactory:
         elif indicator_type == "ROC":
             return ROCIndicator(window)
         else:
-            raise ValueError(f"Unknown indicator type: {indicator_type}")
\ No newline at end of file
+            raise ValueError(f"Unknown indicator type: {indicator_type}")
+
+    @staticmethod
+    def create_streaming(indicator_type: str, window: int) -> StreamingIndicator:
+        if indicator_type == "SMA":
+            return StreamingSMA(window)
+        elif indicator_type == "EMA":
+            return StreamingEMA(window)
+        elif indicator_type == "RSI":
+            return StreamingRSI(window)
+        elif indicator_type == "MACD":
+            return StreamingMACD(window)
+        elif indicator_type == "BBANDS":
+            return StreamingBBANDS(window)
+        elif indicator_type == "MOM":
+            return StreamingMOM(window)
+        elif indicator_type == "ROC":
+            return StreamingROC(window)
+        else:
+            raise ValueError(f"Unknown indicator type: {indicator_type}")
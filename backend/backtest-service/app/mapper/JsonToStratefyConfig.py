@@ -1,17 +1,27 @@
+import math
+
+from app.dto.request.MonteCarloRequestDTO import MonteCarloRequestDTO
+from app.dto.request.OptimizeRequestDTO import OptimizeRequestDTO
 from app.dto.request.RuleDTO import RuleDTO
 from app.dto.request.RuleDTO import RuleDTO
+from app.dto.request.ScanRequestDTO import ScanRequestDTO
 from app.dto.request.Side import Side
 from app.dto.request.StrategyConfigDTO import StrategyConfigDTO
+from app.dto.request.UniverseRequestDTO import UniverseRequestDTO
+from app.dto.request.WalkForwardRequestDTO import WalkForwardRequestDTO
 
 
 def parse_strategy_config(dto: dict) -> StrategyConfigDTO:
     from dateutil import parser
 
     def parse_side(side: dict) -> Side:
+        timeframe = side.get("timeframe") or None
         return Side(
             type=side["type"],
             window=side.get("window"),
-            const=side.get("const")
+            const=side.get("const"),
+            # Cùng interval với config thì không cần resample
+            timeframe=None if side["type"] == "CONST" or timeframe == dto["interval"] else timeframe
         )
 
     rules = [
@@ -33,5 +43,106 @@ def parse_strategy_config(dto: dict) -> StrategyConfigDTO:
         tpPct=dto["tpPct"],
         rules=rules,
         buyCondition=dto["buyCondition"],
-        sellCondition=dto["sellCondition"]
-    )
\ No newline at end of file
+        sellCondition=dto["sellCondition"],
+        engine=dto.get("engine") or "backtesting"
+    )
+
+def parse_value_range(spec, typ=float) -> list:
+    """A list of values, or {"start", "stop", "step"} with stop included."""
+    if spec is None:
+        return []
+    if isinstance(spec, dict):
+        start, stop, step = typ(spec["start"]), typ(spec["stop"]), typ(spec.get("step", 1))
+        if step <= 0:
+            raise ValueError("step must be positive")
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        return [typ(round(start + i * step, 10)) for i in range(max(count, 0))]
+    if isinstance(spec, list):
+        return [typ(v) for v in spec]
+    return [typ(spec)]
+
+
+def parse_optimize_request(dto: dict) -> OptimizeRequestDTO:
+    return OptimizeRequestDTO(
+        config=parse_strategy_config(dto["config"]),
+        windows={k: parse_value_range(v, int) for k, v in (dto.get("windows") or {}).items()},
+        slPct=parse_value_range(dto.get("slPct")),
+        tpPct=parse_value_range(dto.get("tpPct")),
+        objective=dto.get("objective", "sharpe_ratio"),
+        maximize=bool(dto.get("maximize", True)),
+        topN=int(dto.get("topN", 10)),
+        method=dto.get("method", "grid"),
+        eta=int(dto.get("eta", 3)),
+        minBars=int(dto.get("minBars", 2000)),
+    )
+
+
+def parse_batch_request(dto) -> list:
+    """{"configs": [...]} or a bare list of strategy configs."""
+    configs = dto.get("configs") if isinstance(dto, dict) else dto
+    if not isinstance(configs, list) or not configs:
+        raise ValueError("configs must be a non-empty list")
+    return [parse_strategy_config(c) for c in configs]
+
+
+def parse_walkforward_request(dto: dict) -> WalkForwardRequestDTO:
+    return WalkForwardRequestDTO(
+        optimize=parse_optimize_request(dto),
+        folds=int(dto.get("folds", 5)),
+        trainRatio=float(dto.get("trainRatio", 0.75)),
+        trainBars=int(dto["trainBars"]) if dto.get("trainBars") is not None else None,
+        testBars=int(dto["testBars"]) if dto.get("testBars") is not None else None,
+        anchored=bool(dto.get("anchored", False)),
+    )
+
+
+def parse_universe_request(dto: dict) -> UniverseRequestDTO:
+    """A strategy config whose "symbol" is replaced by a "symbols" list."""
+    symbols = dto.get("symbols")
+    if not isinstance(symbols, list) or not symbols:
+        raise ValueError("symbols must be a non-empty list")
+    symbols = list(dict.fromkeys(str(s).upper() for s in symbols))
+    return UniverseRequestDTO(
+        config=parse_strategy_config({**dto, "symbol": symbols[0]}),
+        symbols=symbols,
+    )
+
+
+def parse_scan_request(dto: dict) -> ScanRequestDTO:
+    # lots/slPct/tpPct không ảnh hưởng tín hiệu nên không bắt buộc
+    universe = parse_universe_request({"lots": 0, "slPct": 0, "tpPct": 0, **dto})
+    return ScanRequestDTO(
+        config=universe.config,
+        symbols=universe.symbols,
+        lookback=int(dto["lookback"]) if dto.get("lookback") is not None else None,
+        closedOnly=bool(dto.get("closedOnly", True)),
+    )
+
+
+def parse_montecarlo_request(dto: dict) -> MonteCarloRequestDTO:
+    """
+    "trades" as /backtest returns them: a list of trade objects, or the
+    columnar form (one list per field). Only ReturnPct is used.
+    """
+    trades = dto.get("trades")
+    if isinstance(trades, dict):
+        returns = trades.get("ReturnPct")
+    elif isinstance(trades, list):
+        returns = [t.get("ReturnPct") if isinstance(t, dict) else None for t in trades]
+    else:
+        returns = None
+    if not isinstance(returns, list):
+        raise ValueError("trades must be a list of trades or a columnar trades object with ReturnPct")
+    percentiles = dto.get("percentiles")
+    if percentiles is not None and not isinstance(percentiles, list):
+        raise ValueError("percentiles must be a list")
+    req = MonteCarloRequestDTO(
+        returns=[float(r) for r in returns if r is not None],
+        runs=int(dto.get("runs", 1000)),
+        method=dto.get("method", "bootstrap"),
+        cash=float(dto.get("cash", 1.0)),
+        seed=int(dto["seed"]) if dto.get("seed") is not None else None,
+    )
+    if percentiles is not None:
+        req.percentiles = [float(p) for p in percentiles]
+    return req
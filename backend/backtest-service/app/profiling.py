@@ -0,0 +1,243 @@
+"""
+Where a request spends its time.
+
+span() times one phase of the work (fetch, indicator, simulate...). Every
+span feeds the latency histograms /metrics exports; inside a
+collect_timings() block it is also added to that block's Timings, which
+the response can carry. Spans may nest: the "simulate" span of the
+backtesting engine contains its "indicator" spans.
+
+profile_call() runs a function under cProfile, one request at a time.
+"""
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Cho phép ?profile=true; đặt "0" để tắt trên production
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "1") == "1"
+# Số hàm (theo thời gian cộng dồn) trả về trong khối profile
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "30"))
+# Thư mục lưu file .prof đầy đủ (xem bằng snakeviz); rỗng = không lưu
+PROFILE_DIR = os.getenv("PROFILE_DIR", "")
+
+# Giây; mốc cuối +Inf được thêm khi xuất
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Cumulative histogram per label value, in the Prometheus text format."""
+
+    def __init__(self, name: str, doc: str, label: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.doc = doc
+        self.label = label
+        self.buckets = tuple(buckets)
+        # nhãn -> (số mẫu theo bucket, tổng, số mẫu)
+        self._series: Dict[str, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label: str, value: float) -> None:
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = ([0] * len(self.buckets), [0.0, 0])
+            counts, total = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            total[0] += value
+            total[1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: (list(c), list(t)) for k, (c, t) in self._series.items()}
+        for label in sorted(series):
+            counts, (total, n) = series[label]
+            tag = f'{self.label}="{label}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{tag},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{tag},le="+Inf"}} {n}')
+            lines.append(f"{self.name}_sum{{{tag}}} {total!r}")
+            lines.append(f"{self.name}_count{{{tag}}} {n}")
+        return lines
+
+
+class Counter:
+    """Running totals per label value, in the Prometheus text format."""
+
+    def __init__(self, name: str, doc: str, label: str):
+        self.name = name
+        self.doc = doc
+        self.label = label
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label: str, value: float = 1) -> None:
+        with self._lock:
+            self._values[label] = self._values.get(label, 0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for label in sorted(values):
+            lines.append(f'{self.name}{{{self.label}="{label}"}} {values[label]!r}')
+        return lines
+
+
+phase_seconds = Histogram("backtest_phase_seconds", "Time spent in one phase of a request.", "phase")
+request_seconds = Histogram("backtest_request_seconds", "Time to answer a request.", "endpoint")
+work_total = Counter("backtest_work_total", "Work done for requests (pages and bytes fetched...).", "kind")
+
+
+def render_metrics() -> str:
+    lines = phase_seconds.render() + request_seconds.render() + work_total.render()
+    return "\n".join(lines) + "\n"
+
+
+class Timings:
+    """Spans and counters of one request. Safe to add to from several threads."""
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        # tên span -> [giây, số lần]
+        self._spans: Dict[str, List[float]] = {}
+        self._counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._spans.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def count(self, name: str, value: float) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "total_ms": (time.perf_counter() - self._started) * 1000,
+                "spans": {k: {"ms": s * 1000, "calls": n} for k, (s, n) in self._spans.items()},
+                "counters": dict(self._counters),
+            }
+
+
+_current: ContextVar[Optional[Timings]] = ContextVar("timings", default=None)
+
+
+@contextmanager
+def collect_timings() -> Iterator[Timings]:
+    """Collects the spans and counters of everything run inside the block."""
+    timings = Timings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(phase: str, detail: str = "") -> Iterator[None]:
+    """Times the block. The histogram is per phase; the request's Timings also keep `detail` ("indicator:SMA_20")."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        phase_seconds.observe(phase, elapsed)
+        timings = _current.get()
+        if timings is not None:
+            timings.add_span(f"{phase}:{detail}" if detail else phase, elapsed)
+
+
+def timed(phase: str) -> Callable[[Callable], Callable]:
+    """Decorator: every call of the function is a span of `phase`."""
+    def wrap(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            with span(phase):
+                return fn(*args, **kwargs)
+        return run
+    return wrap
+
+
+def count(kind: str, value: float = 1) -> None:
+    work_total.inc(kind, value)
+    timings = _current.get()
+    if timings is not None:
+        timings.count(kind, value)
+
+
+def in_context(fn: Callable) -> Callable:
+    """fn bound to a copy of the caller's context, so pool threads report to the same request."""
+    ctx = copy_context()
+
+    def run(*args, **kwargs):
+        return ctx.copy().run(fn, *args, **kwargs)
+    return run
+
+
+_profile_lock = threading.Lock()
+
+
+def profile_call(fn: Callable[[], Any], label: str = "request") -> Tuple[Any, dict]:
+    """
+    (fn(), profile) with fn run under cProfile. Up to Python 3.11 only the
+    calling thread is profiled (not the candle download pool); from 3.12
+    cProfile hooks into sys.monitoring, which is process-wide, so other
+    threads busy at the same time show up too, including other requests'.
+    A single profile runs at a time; a concurrent call runs fn unprofiled
+    and says so.
+    """
+    if not PROFILE_ENABLED:
+        return fn(), {"error": "profiling is disabled (PROFILE_ENABLED=0)"}
+    if not _profile_lock.acquire(blocking=False):
+        return fn(), {"error": "another request is being profiled"}
+    try:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            result = fn()
+        finally:
+            profiler.disable()
+    finally:
+        _profile_lock.release()
+    return result, _profile_summary(profiler, label)
+
+
+def _profile_summary(profiler: cProfile.Profile, label: str) -> dict:
+    stats = pstats.Stats(profiler, stream=io.StringIO()).sort_stats("cumulative")
+    top = []
+    for func in stats.fcn_list[:PROFILE_TOP]:
+        primitive, calls, own, cumulative, _ = stats.stats[func]
+        filename, line, name = func
+        top.append({
+            "function": name if filename == "~" else f"{name} ({filename}:{line})",
+            "calls": calls,
+            "primitive_calls": primitive,
+            "own_ms": own * 1000,
+            "cumulative_ms": cumulative * 1000,
+        })
+    summary = {"total_ms": stats.total_tt * 1000, "top": top}
+    if PROFILE_DIR:
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"{label}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.prof")
+            stats.dump_stats(path)
+            summary["file"] = path
+        except OSError:
+            pass
+    return summary
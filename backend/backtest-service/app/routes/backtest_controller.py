@@ -1,24 +1,187 @@
-from flask import Blueprint, jsonify, request
+import time
+
+from flask import Blueprint, Response, g, jsonify, request, stream_with_context
 
 from app.domain.strategy.build_strategy import build_strategy
 from app.dto.request import StrategyConfigDTO
-from app.mapper.JsonToStratefyConfig import parse_strategy_config
-from app.service.backtest_service import run_backtest_strategy
+from app.mapper.JsonToStratefyConfig import (parse_batch_request, parse_montecarlo_request, parse_optimize_request,
+                                             parse_strategy_config, parse_scan_request, parse_universe_request,
+                                             parse_walkforward_request)
+from app.profiling import collect_timings, profile_call, render_metrics, request_seconds, span
+from app.service.backtest_service import (checkpoints, parse_equity_points, result_cache, run_backtest_result,
+                                          run_backtest_strategy)
+from app.service.batch_service import run_batch
+from app.service.historical_service import warm_candles
+from app.service.job_service import JobQueueFull, job_manager
+from app.service.montecarlo_service import run_montecarlo
+from app.service.optimize_service import run_optimization
+from app.service.scan_service import run_scan
+from app.service.universe_service import run_universe
+from app.service.walkforward_service import run_walkforward
 
 backtest_controller = Blueprint('backtest', __name__)
 
+@backtest_controller.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@backtest_controller.after_request
+def observe_request(response):
+    started = g.get("request_started")
+    if started is not None and request.endpoint:
+        request_seconds.observe(request.endpoint, time.perf_counter() - started)
+    return response
+
+def _flag(name: str) -> bool:
+    return request.args.get(name, "").lower() in ("1", "true", "yes")
+
 @backtest_controller.route('/')
 def index():
     return "Hello, Backtest!"
 
+@backtest_controller.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4"), 200
+
+@backtest_controller.route('/ready', methods=['GET'])
+def ready():
+    # 503 tới khi mọi cặp warmup đã được nạp xong lần đầu
+    status = warm_candles.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
 @backtest_controller.route('/backtest', methods=['POST'])
 def run_backtest():
     try:
-        json_data = request.get_json()
-        print(f"Received JSON data: {json_data}")
-        cfg = parse_strategy_config(json_data)
-        res = run_backtest_strategy(cfg)
+        with collect_timings() as timings:
+            with span("parse"):
+                json_data = request.get_json()
+                print(f"Received JSON data: {json_data}")
+                cfg = parse_strategy_config(json_data)
+            # ?format=rows (mặc định) | columnar | ndjson
+            fmt = request.args.get("format", "rows")
+            # ?equityPoints=N: số điểm tối đa của equity/drawdown, 0 = bỏ
+            points = parse_equity_points(request.args.get("equityPoints"))
+            if fmt == "ndjson":
+                res = run_backtest_result(cfg, equity_points=points)
+                return Response(stream_with_context(res.iter_ndjson()), mimetype="application/x-ndjson"), 200
+            # ?profile=true: chạy dưới cProfile, thêm khối "profile"
+            if _flag("profile"):
+                res, profile = profile_call(lambda: run_backtest_strategy(cfg, fmt=fmt, equity_points=points),
+                                            label="backtest")
+                res["profile"] = profile
+            else:
+                res = run_backtest_strategy(cfg, fmt=fmt, equity_points=points)
+            # ?timings=true: thời gian từng bước (parse, fetch, indicator, simulate...)
+            if _flag("timings"):
+                res["timings"] = timings.to_dict()
+            # Thời gian mã hoá JSON chỉ có trong /metrics: nó đến sau khối timings
+            with span("serialize"):
+                response = jsonify(res)
+        return response, 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@backtest_controller.route('/backtest/optimize', methods=['POST'])
+def optimize_backtest():
+    try:
+        req = parse_optimize_request(request.get_json())
+        res = run_optimization(req)
+        return jsonify(res), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@backtest_controller.route('/backtest/scan', methods=['POST'])
+def scan_symbols():
+    try:
+        req = parse_scan_request(request.get_json())
+        res = run_scan(req)
         return jsonify(res), 200
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+@backtest_controller.route('/backtest/universe', methods=['POST'])
+def universe_backtest():
+    try:
+        req = parse_universe_request(request.get_json())
+        points = parse_equity_points(request.args.get("equityPoints"))
+        res = run_universe(req, points)
+        return jsonify(res), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@backtest_controller.route('/backtest/walkforward', methods=['POST'])
+def walkforward_backtest():
+    try:
+        req = parse_walkforward_request(request.get_json())
+        res = run_walkforward(req)
+        return jsonify(res), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@backtest_controller.route('/backtest/montecarlo', methods=['POST'])
+def montecarlo_backtest():
+    try:
+        req = parse_montecarlo_request(request.get_json())
+        res = run_montecarlo(req)
+        return jsonify(res), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@backtest_controller.route('/backtest/batch', methods=['POST'])
+def batch_backtest():
+    try:
+        configs = parse_batch_request(request.get_json())
+        points = parse_equity_points(request.args.get("equityPoints"))
+        res = run_batch(configs, request.args.get("format", "rows"), points)
+        return jsonify(res), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@backtest_controller.route('/backtest/cache', methods=['GET'])
+def cache_stats():
+    checkpoint_stats = {"enabled": True, **checkpoints.stats()} if checkpoints is not None else {"enabled": False}
+    if result_cache is None:
+        return jsonify({"enabled": False, "checkpoints": checkpoint_stats}), 200
+    return jsonify({"enabled": True, **result_cache.stats(), "checkpoints": checkpoint_stats}), 200
+
+@backtest_controller.route('/backtest/cache', methods=['DELETE'])
+def clear_cache():
+    if result_cache is not None:
+        result_cache.clear()
+    if checkpoints is not None:
+        checkpoints.clear()
+    return jsonify({"cleared": result_cache is not None}), 200
+
+@backtest_controller.route('/backtest/jobs', methods=['POST'])
+def submit_job():
+    try:
+        cfg = parse_strategy_config(request.get_json())
+        points = parse_equity_points(request.args.get("equityPoints"))
+        job = job_manager.submit(cfg, request.args.get("format", "rows"), points)
+        return jsonify(job.to_dict()), 202
+
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 429
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@backtest_controller.route('/backtest/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.status(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict()), 200
+
+@backtest_controller.route('/backtest/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict()), 200
@@ -1,22 +1,195 @@
-from typing import Dict, List, Tuple
+from datetime import datetime
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
 import numpy as np
+from app.domain.engine.fast_engine import resume_fast, run_fast, run_fast_checkpointed
 from app.domain.method import Method
 from app.domain.strategy.build_strategy import build_strategy
 from app.dto.request.StrategyConfigDTO import StrategyConfigDTO
+from app.profiling import span, timed
 import pandas as pd
 from backtesting.lib import FractionalBacktest
 from app.dto.response.BacktestResultDTO import BacktestResultDTO
+from app.dto.response.EquityCurveDTO import EquityCurveDTO, SeriesDTO
 
 from app.dto.response.StatDTO import StatDTO
-from app.dto.response.TradeDTO import TradeDTO
-from app.service.historical_service import fetch_all_ohlcv
+from app.service.checkpoint_store import CheckpointStore
+from app.service.downsample import lttb
+from app.service.historical_service import datetime_to_millis, fetch_all_ohlcv, interval_to_millis
+from app.service.result_cache import ResultCache, config_hash
+from app.service.timeframes import timeframe_indicators, uses_timeframes
 
-def run_backtest_strategy(cfg: StrategyConfigDTO) -> pd.DataFrame:
-    data = fetch_all_ohlcv(cfg.symbol, cfg.interval, cfg.startTime, cfg.endTime)
-    strategy = build_strategy(cfg)
+# Cache kết quả backtest trong RAM (MB); RESULT_CACHE_MB=0 để tắt.
+# RESULT_CACHE_DIR bật thêm tầng lưu trên đĩa.
+_cache_mb = float(os.getenv("RESULT_CACHE_MB", "256"))
+result_cache: Optional[ResultCache] = ResultCache(
+    max_bytes=int(_cache_mb * 1024 * 1024),
+    disk_dir=os.getenv("RESULT_CACHE_DIR", ""),
+    disk_max_bytes=int(float(os.getenv("RESULT_CACHE_DISK_MB", "2048")) * 1024 * 1024),
+) if _cache_mb > 0 else None
+
+# Checkpoint của engine "fast" (MB); CHECKPOINT_CACHE_MB=0 để tắt.
+# CHECKPOINT_DIR lưu thêm trên đĩa.
+_checkpoint_mb = float(os.getenv("CHECKPOINT_CACHE_MB", "256"))
+checkpoints: Optional[CheckpointStore] = CheckpointStore(
+    max_bytes=int(_checkpoint_mb * 1024 * 1024),
+    disk_dir=os.getenv("CHECKPOINT_DIR", ""),
+) if _checkpoint_mb > 0 else None
+
+def _checkpointable(cfg: StrategyConfigDTO) -> bool:
+    # Checkpoint chỉ giữ trạng thái của các indicator trên nến gốc
+    return checkpoints is not None and cfg.engine == "fast" and not uses_timeframes(cfg)
+
+def _series(cfg: StrategyConfigDTO) -> str:
+    """Everything that decides a run except its end time."""
+    return f"{config_hash(cfg)}|{cfg.symbol.upper()}|{cfg.interval}|{datetime_to_millis(cfg.startTime)}"
+
+def _open_ended_series(cfg: StrategyConfigDTO, end_time: datetime) -> Optional[str]:
+    """Identifies a range that still grows as candles close, None for a closed range."""
+    interval_ms = interval_to_millis(cfg.interval) or 0
+    now_ms = int(time.time() * 1000)
+    if cfg.endTime is not None and datetime_to_millis(end_time) + interval_ms < now_ms:
+        return None
+    return _series(cfg)
+
+def _closed_bars(cfg: StrategyConfigDTO, data: pd.DataFrame) -> int:
+    """Number of leading candles of data that are closed and will not change any more."""
+    interval_ms = interval_to_millis(cfg.interval)
+    if interval_ms is None or not len(data):
+        return 0
+    now_ms = int(time.time() * 1000)
+    open_ms = data.index.values.astype("datetime64[ms]").astype(np.int64)
+    return int(np.searchsorted(open_ms, now_ms - now_ms % interval_ms, side="left"))
+
+Progress = Callable[[float], None]
+
+# Số điểm mặc định của equity/drawdown trả về; 0 = không trả series
+DEFAULT_EQUITY_POINTS = 1000
+MAX_EQUITY_POINTS = 20000
+
+def parse_equity_points(value: Optional[str]) -> int:
+    if value is None or value == "":
+        return DEFAULT_EQUITY_POINTS
+    try:
+        points = int(value)
+    except ValueError:
+        raise ValueError(f"equityPoints must be an integer, got {value!r}")
+    if points < 0 or points > MAX_EQUITY_POINTS:
+        raise ValueError(f"equityPoints must be between 0 and {MAX_EQUITY_POINTS}")
+    return points
+
+def _no_progress(_: float) -> None:
+    pass
+
+def run_backtest_result(cfg: StrategyConfigDTO, progress: Optional[Progress] = None,
+                        equity_points: int = DEFAULT_EQUITY_POINTS) -> BacktestResultDTO:
+    """
+    progress, when given, receives the completed fraction (0..1) as the run
+    advances. equity_points is the point budget of the equity and drawdown
+    series; 0 leaves them out.
+    """
+    report = progress or _no_progress
+    # Không có endTime -> chạy tới hiện tại
+    end_time = cfg.endTime or datetime.now()
+    if _checkpointable(cfg):
+        res = _resume(cfg, end_time, equity_points, report)
+        if res is not None:
+            return res
+    data = fetch_all_ohlcv(cfg.symbol, cfg.interval, cfg.startTime, end_time)
+    report(0.1)
+    return backtest_on(cfg, data, end_time, equity_points,
+                       progress=lambda f: report(0.1 + 0.9 * f), checkpoint=True)
+
+def _resume(cfg: StrategyConfigDTO, end_time: datetime, equity_points: int,
+            report: Progress) -> Optional[BacktestResultDTO]:
+    """
+    Continues the checkpoint of an earlier run of the same series when
+    end_time goes past it: only the candles after the checkpoint are fetched
+    and simulated. None when there is nothing to continue.
+    """
+    series = _series(cfg)
+    checkpoint = checkpoints.get(series)
+    if checkpoint is None:
+        return None
+    last_ms = int(checkpoint.index[-1].value // 1_000_000)
+    if datetime_to_millis(end_time) <= last_ms:
+        return None
+    # Cùng quy ước giờ địa phương với datetime_to_millis
+    data = fetch_all_ohlcv(cfg.symbol, cfg.interval, datetime.fromtimestamp((last_ms + 1) / 1000), end_time)
+    if not len(data):
+        return None
+    report(0.1)
+    stats, nxt = resume_fast(cfg, checkpoint, data, _closed_bars(cfg, data),
+                             progress=lambda f: report(0.1 + 0.8 * f))
+    if nxt is not None:
+        checkpoints.put(series, nxt)
+    res = backtest_result(stats, equity_points)
+    report(1.0)
+    return res
+
+def backtest_on(cfg: StrategyConfigDTO, data: pd.DataFrame, end_time: datetime,
+                equity_points: int = DEFAULT_EQUITY_POINTS, indicator_cache: Optional[Dict] = None,
+                progress: Optional[Progress] = None, checkpoint: bool = False) -> BacktestResultDTO:
+    """
+    Result of cfg over candles already loaded for [cfg.startTime, end_time],
+    served from result_cache when possible. indicator_cache is passed on to
+    simulate() so callers running several configs on the same candles can
+    share indicators. checkpoint=True saves where a "fast" run stood after
+    the last closed candle, for _resume() to pick up later.
+    """
+    report = progress or _no_progress
+
+    def run() -> BacktestResultDTO:
+        sim_progress = lambda f: report(0.9 * f)
+        if checkpoint and _checkpointable(cfg):
+            stats, saved = run_fast_checkpointed(cfg, data, _closed_bars(cfg, data), sim_progress)
+            if saved is not None:
+                checkpoints.put(_series(cfg), saved)
+        else:
+            stats = simulate(cfg, data, indicator_cache, progress=sim_progress)
+        res = backtest_result(stats, equity_points)
+        report(1.0)
+        return res
+
+    if result_cache is None:
+        return run()
+    key = f"columnar-{equity_points}-{result_cache.key(cfg, data)}"
+    cached = result_cache.get(key)
+    if cached is not None:
+        report(1.0)
+        return BacktestResultDTO.from_columnar_dict(cached)
+    res = run()
+    result_cache.put(key, res.to_columnar_dict(), series=_open_ended_series(cfg, end_time))
+    return res
+
+def run_backtest_strategy(cfg: StrategyConfigDTO, progress: Optional[Progress] = None,
+                          fmt: str = "rows", equity_points: int = DEFAULT_EQUITY_POINTS) -> dict:
+    """fmt "rows" gives one object per trade, "columnar" one array per trade field."""
+    if fmt not in ("rows", "columnar"):
+        raise ValueError(f"Unknown result format: {fmt}")
+    res = run_backtest_result(cfg, progress, equity_points)
+    return res.to_columnar_dict() if fmt == "columnar" else res.to_dict()
+
+def simulate(cfg: StrategyConfigDTO, data: pd.DataFrame, indicator_cache: Optional[Dict] = None,
+             progress: Optional[Progress] = None) -> pd.Series:
+    """Runs cfg over already loaded candles and returns backtesting.py's raw stats."""
+    if uses_timeframes(cfg):
+        if indicator_cache is None:
+            indicator_cache = {}
+        timeframe_indicators(cfg, data, indicator_cache)
+    if cfg.engine == "fast":
+        return run_fast(cfg, data, indicator_cache, progress)
+    if cfg.engine != "backtesting":
+        raise ValueError(f"Unknown engine: {cfg.engine}")
+    if (data.dtypes == np.float32).any():
+        # Nến float32 chỉ là cách lưu gọn; backtesting.py tính trên float64 như engine nhanh
+        data = data.astype(np.float64)
+    n = max(1, len(data))
+    strategy = build_strategy(cfg, indicator_cache, (lambda i: progress(i / n)) if progress else None)
     bt = FractionalBacktest(data, strategy, cash=cfg.lots, commission=0.001)
-    stats = bt.run()
-    return convert_backtest_result(stats)
+    with span("simulate"):
+        return bt.run()
 def _num(v, typ=float, default=0.0):
     try:
         if v is None or (isinstance(v, float) and np.isnan(v)):
@@ -25,31 +198,63 @@ def _num(v, typ=float, default=0.0):
     except Exception:
         return default
 
-def convert_backtest_result(stats) -> BacktestResultDTO:
-    trades_df: pd.DataFrame = stats._trades.fillna(np.nan)
-
-    trades = []
-    for _, row in trades_df.iterrows():
-        trades.append(TradeDTO(
-            Size=row["Size"],
-            EntryBar=row["EntryBar"],
-            ExitBar=row["ExitBar"],
-            EntryPrice=row["EntryPrice"],
-            ExitPrice=row["ExitPrice"],
-            SL=row["SL"],
-            TP=row["TP"],
-            ReturnPct=row["ReturnPct"],
-            EntryTime=str(row["EntryTime"]),
-            ExitTime=str(row["ExitTime"]),
-            Duration=str(row["Duration"]),
-            Tag=row.get("Tag"),
-            Entry_fn=row.get("Entry_fn(C)"),
-            Exit_fn=row.get("Exit_fn(C)")
-        ))
+def _trade_column(trades_df: pd.DataFrame, name: str, as_str: bool = False) -> list:
+    if name not in trades_df:
+        return [None] * len(trades_df)
+    col = trades_df[name]
+    if as_str:
+        return col.astype(str).tolist()
+    if col.dtype == object:
+        col = col.fillna(np.nan)
+    return col.tolist()
+
+def equity_curve(stats, points: int) -> EquityCurveDTO:
+    """
+    Equity and drawdown (%) per bar from stats._equity_curve, each reduced
+    to at most `points` points with LTTB.
+    """
+    curve: pd.DataFrame = stats._equity_curve
+    equity = curve["Equity"].to_numpy(dtype=np.float64)
+    time_ms = curve.index.values.astype("datetime64[ms]").astype(np.int64)
+    peak = np.maximum.accumulate(equity)
+    drawdown = np.divide(equity, peak, out=np.ones_like(equity), where=peak > 0) * 100 - 100
 
+    def series(values: np.ndarray) -> SeriesDTO:
+        idx = lttb(time_ms, values, points)
+        return SeriesDTO(time=time_ms[idx].tolist(), value=values[idx].tolist())
+
+    return EquityCurveDTO(equity=series(equity), drawdown=series(drawdown), bars=len(equity))
+
+@timed("result")
+def backtest_result(stats, equity_points: int = 0) -> BacktestResultDTO:
+    """Trades taken column by column from stats._trades; no per-row objects."""
+    trades_df: pd.DataFrame = stats._trades
+    columns = {
+        "Size": _trade_column(trades_df, "Size"),
+        "EntryBar": _trade_column(trades_df, "EntryBar"),
+        "ExitBar": _trade_column(trades_df, "ExitBar"),
+        "EntryPrice": _trade_column(trades_df, "EntryPrice"),
+        "ExitPrice": _trade_column(trades_df, "ExitPrice"),
+        "SL": _trade_column(trades_df, "SL"),
+        "TP": _trade_column(trades_df, "TP"),
+        "ReturnPct": _trade_column(trades_df, "ReturnPct"),
+        "EntryTime": _trade_column(trades_df, "EntryTime", as_str=True),
+        "ExitTime": _trade_column(trades_df, "ExitTime", as_str=True),
+        "Duration": _trade_column(trades_df, "Duration", as_str=True),
+        "Tag": _trade_column(trades_df, "Tag"),
+        "Entry_fn": _trade_column(trades_df, "Entry_fn(C)"),
+        "Exit_fn": _trade_column(trades_df, "Exit_fn(C)"),
+    }
+    equity = equity_curve(stats, equity_points) if equity_points > 0 else None
+    return BacktestResultDTO(trades=columns, stats=convert_stats(stats), equity=equity)
+
+def convert_backtest_result(stats) -> dict:
+    return backtest_result(stats).to_dict()
+
+def convert_stats(stats) -> StatDTO:
     sdict = stats.to_dict()
 
-    stats_dto = StatDTO(
+    return StatDTO(
         # thời gian
         start=str(sdict.get("Start", "")),
         end=str(sdict.get("End", "")),
@@ -83,5 +288,3 @@ def convert_backtest_result(stats) -> BacktestResultDTO:
         worst_trade=_num(sdict.get("Worst Trade [%]")),
         trades_count=int(sdict.get("# Trades", 0) or 0),
     )
-
-    return BacktestResultDTO(trades=trades, stats=stats_dto).to_dict()
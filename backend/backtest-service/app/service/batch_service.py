@@ -0,0 +1,68 @@
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.domain.strategy.build_strategy import build_strategy
+from app.dto.request.StrategyConfigDTO import StrategyConfigDTO
+from app.dto.response.BatchResultDTO import BatchResultDTO
+from app.service.backtest_service import DEFAULT_EQUITY_POINTS, backtest_on
+from app.service.historical_service import fetch_all_ohlcv
+
+BATCH_MAX_CONFIGS = int(os.getenv("BATCH_MAX_CONFIGS", "200"))
+
+GroupKey = Tuple[str, str, Optional[datetime], datetime]
+
+
+def group_configs(configs: List[StrategyConfigDTO], now: datetime) -> "OrderedDict[GroupKey, List[int]]":
+    """Indices of configs grouped by the candles they need, in first-seen order."""
+    groups: "OrderedDict[GroupKey, List[int]]" = OrderedDict()
+    for i, cfg in enumerate(configs):
+        key = (cfg.symbol.upper(), cfg.interval, cfg.startTime, cfg.endTime or now)
+        groups.setdefault(key, []).append(i)
+    return groups
+
+
+def run_batch(configs: List[StrategyConfigDTO], fmt: str = "rows",
+              equity_points: int = DEFAULT_EQUITY_POINTS) -> dict:
+    """
+    Backtests every config, fetching candles once per (symbol, interval,
+    range) group and computing each (type, window) indicator once per group.
+    A config that fails gets {"error": ...} in its place; the rest still run.
+    """
+    if fmt not in ("rows", "columnar"):
+        raise ValueError(f"Unknown result format: {fmt}")
+    if len(configs) > BATCH_MAX_CONFIGS:
+        raise ValueError(f"Too many configs: {len(configs)} > {BATCH_MAX_CONFIGS}")
+
+    results: List[Optional[dict]] = [None] * len(configs)
+    # Điều kiện sai báo lỗi riêng cho config đó, không cần tải nến
+    for i, cfg in enumerate(configs):
+        try:
+            build_strategy(cfg)
+        except Exception as e:
+            results[i] = {"error": str(e)}
+
+    # Cùng một "hiện tại" cho mọi config không có endTime
+    groups = group_configs(configs, datetime.now())
+    computed = 0
+    for (symbol, interval, start, end), indices in groups.items():
+        indices = [i for i in indices if results[i] is None]
+        if not indices:
+            continue
+        try:
+            data = fetch_all_ohlcv(symbol, interval, start, end)
+        except Exception as e:
+            for i in indices:
+                results[i] = {"error": str(e)}
+            continue
+        indicators: Dict = {}
+        for i in indices:
+            try:
+                res = backtest_on(configs[i], data, end, equity_points, indicators)
+                results[i] = res.to_columnar_dict() if fmt == "columnar" else res.to_dict()
+            except Exception as e:
+                results[i] = {"error": str(e)}
+        computed += len(indicators)
+
+    return BatchResultDTO(groups=len(groups), indicators=computed, results=results).to_dict()
@@ -0,0 +1,181 @@
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: chỉ còn khoá giữa các thread
+    fcntl = None
+
+COLUMNS = ("open_time", "open", "high", "low", "close", "volume")
+DTYPES = {"open_time": np.int64, "open": np.float64, "high": np.float64,
+          "low": np.float64, "close": np.float64, "volume": np.float64}
+
+Columns = Dict[str, np.ndarray]
+# fetch(start_ms, end_ms) -> columns for candles with start_ms <= openTime < end_ms
+Fetcher = Callable[[int, int], Columns]
+
+# File khoá trong thư mục của mỗi (symbol, interval), dùng chung giữa các process
+LOCK_FILE = ".lock"
+
+
+def empty_columns() -> Columns:
+    return {c: np.empty(0, dtype=DTYPES[c]) for c in COLUMNS}
+
+
+def concat_columns(parts: List[Columns]) -> Columns:
+    """Concatenates column sets, sorts by open time and keeps the last copy of duplicates."""
+    parts = [p for p in parts if len(p["open_time"])]
+    if not parts:
+        return empty_columns()
+    if len(parts) == 1:
+        merged = parts[0]
+    else:
+        merged = {c: np.concatenate([p[c] for p in parts]) for c in COLUMNS}
+    t = merged["open_time"]
+    if len(t) > 1 and not np.all(t[1:] > t[:-1]):
+        order = np.argsort(t, kind="stable")
+        t = t[order]
+        keep = np.ones(len(t), dtype=bool)
+        keep[:-1] = t[1:] != t[:-1]
+        idx = order[keep]
+        merged = {c: merged[c][idx] for c in COLUMNS}
+    return merged
+
+
+class CandleStore:
+    """
+    On-disk columnar candle cache, one directory per (symbol, interval).
+
+    Every column is a .npy file opened as a read-only memory map, and meta.json
+    records the contiguous [start, end) range of open times that has been
+    downloaded. Range queries slice the maps without copying, and only the part
+    of a request outside that range is fetched from upstream.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _dir(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, symbol.upper(), interval)
+
+    @staticmethod
+    @contextmanager
+    def _dir_lock(path: str):
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, LOCK_FILE), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _replace(path: str, name: str, write: Callable) -> None:
+        # Ghi vào tên tạm riêng của process rồi đổi tên: file đã công bố (và
+        # đang được mmap) không bao giờ bị ghi đè dở dang
+        tmp = os.path.join(path, f"{name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                write(f)
+            os.replace(tmp, os.path.join(path, name))
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _load(self, path: str, retries: int = 3) -> Tuple[Optional[dict], Columns]:
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            return None, empty_columns()
+        with open(meta_path) as f:
+            meta = json.load(f)
+        cols = {}
+        try:
+            for c in COLUMNS:
+                file = os.path.join(path, meta["files"][c])
+                # Empty arrays cannot be memory-mapped.
+                cols[c] = np.load(file, mmap_mode="r") if os.path.getsize(file) > 128 else np.load(file)
+        except FileNotFoundError:
+            # Another process replaced this version between reading meta.json
+            # and opening the columns.
+            if retries <= 0:
+                raise
+            return self._load(path, retries - 1)
+        return meta, cols
+
+    def _save(self, path: str, meta: dict, cols: Columns) -> None:
+        os.makedirs(path, exist_ok=True)
+        # New files per version: open memory maps of the previous version stay
+        # valid, and meta.json is swapped in last so readers never see a mix.
+        version = meta.get("version", 0) + 1
+        files = {}
+        for c in COLUMNS:
+            name = f"{c}.{version}.npy"
+            values = np.ascontiguousarray(cols[c], dtype=DTYPES[c])
+            self._replace(path, name, lambda f, values=values: np.save(f, values))
+            files[c] = name
+        old_files = meta.get("files", {}).values()
+        new_meta = {"start": meta["start"], "end": meta["end"], "version": version, "files": files}
+        self._replace(path, "meta.json", lambda f: f.write(json.dumps(new_meta).encode()))
+        for name in old_files:
+            try:
+                os.remove(os.path.join(path, name))
+            except OSError:
+                pass
+
+    @staticmethod
+    def _slice(cols: Columns, start_ms: int, end_ms: int) -> Columns:
+        t = cols["open_time"]
+        lo = int(np.searchsorted(t, start_ms, side="left"))
+        hi = int(np.searchsorted(t, end_ms, side="left"))
+        return {c: cols[c][lo:hi] for c in COLUMNS}
+
+    def get_range(self, symbol: str, interval: str, start_ms: int, end_ms: int,
+                  fetch: Fetcher, closed_before_ms: int) -> Columns:
+        """
+        Candles with start_ms <= openTime < end_ms. Candles opening at or after
+        closed_before_ms may still change, so they are fetched but not stored.
+        """
+        path = self._dir(symbol, interval)
+        stored_end = min(end_ms, closed_before_ms)
+        with self._lock((symbol.upper(), interval)), self._dir_lock(path):
+            meta, cols = self._load(path)
+            if start_ms < stored_end:
+                if meta is None:
+                    missing = [(start_ms, stored_end)]
+                else:
+                    missing = []
+                    if start_ms < meta["start"]:
+                        missing.append((start_ms, meta["start"]))
+                    if stored_end > meta["end"]:
+                        missing.append((meta["end"], stored_end))
+                if missing:
+                    fetched = [fetch(s, e) for s, e in missing]
+                    cols = concat_columns([cols] + fetched)
+                    meta = dict(meta or {})
+                    meta["start"] = min(start_ms, meta.get("start", start_ms))
+                    meta["end"] = max(stored_end, meta.get("end", stored_end))
+                    self._save(path, meta, cols)
+                    meta, cols = self._load(path)
+
+        stored = self._slice(cols, start_ms, stored_end) if start_ms < stored_end else empty_columns()
+        if end_ms <= closed_before_ms:
+            return stored
+        live = fetch(max(start_ms, closed_before_ms), end_ms)
+        return concat_columns([stored, live])
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.domain.engine.fast_engine import FastCheckpoint
+
+
+class CheckpointStore:
+    """
+    The furthest FastCheckpoint of every backtest series (config, symbol,
+    interval and start time; the end time is what varies), pickled into an
+    LRU bounded by total bytes and optionally written to `disk_dir` so it
+    survives restarts. Only files this service wrote are ever read back.
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir or None
+        # series -> (số nến, checkpoint đã pickle)
+        self._entries: "OrderedDict[str, Tuple[int, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "saves": 0, "evictions": 0}
+
+    def _disk_path(self, series: str) -> str:
+        name = hashlib.sha256(series.encode()).hexdigest()[:32]
+        return os.path.join(self.disk_dir, f"{name}.ckpt")
+
+    def get(self, series: str) -> Optional[FastCheckpoint]:
+        with self._lock:
+            entry = self._entries.get(series)
+            if entry is not None:
+                self._entries.move_to_end(series)
+        if entry is None and self.disk_dir:
+            try:
+                with open(self._disk_path(series), "rb") as f:
+                    bars = int.from_bytes(f.read(8), "little")
+                    entry = (bars, f.read())
+            except OSError:
+                entry = None
+            if entry is not None:
+                with self._lock:
+                    self._insert(series, entry)
+        with self._lock:
+            self._counters["hits" if entry is not None else "misses"] += 1
+        return pickle.loads(entry[1]) if entry is not None else None
+
+    def put(self, series: str, checkpoint: FastCheckpoint) -> None:
+        """Keeps checkpoint unless the series already has one over more candles."""
+        entry = (checkpoint.bars, pickle.dumps(checkpoint, protocol=pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            current = self._entries.get(series)
+            if current is not None and current[0] > entry[0]:
+                return
+            self._insert(series, entry)
+            self._counters["saves"] += 1
+        if self.disk_dir:
+            self._write_disk(series, entry)
+
+    def _insert(self, series: str, entry: Tuple[int, bytes]) -> None:
+        if len(entry[1]) > self.max_bytes:
+            return
+        self._remove(series)
+        self._entries[series] = entry
+        self._bytes += len(entry[1])
+        while self._bytes > self.max_bytes:
+            _, (_, old) = self._entries.popitem(last=False)
+            self._bytes -= len(old)
+            self._counters["evictions"] += 1
+
+    def _remove(self, series: str) -> None:
+        old = self._entries.pop(series, None)
+        if old is not None:
+            self._bytes -= len(old[1])
+
+    def _write_disk(self, series: str, entry: Tuple[int, bytes]) -> None:
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            path = self._disk_path(series)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(entry[0].to_bytes(8, "little"))
+                f.write(entry[1])
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.disk_dir and os.path.isdir(self.disk_dir):
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(".ckpt"):
+                    try:
+                        os.remove(os.path.join(self.disk_dir, name))
+                    except OSError:
+                        pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk_dir": self.disk_dir,
+            }
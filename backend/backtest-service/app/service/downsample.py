@@ -0,0 +1,40 @@
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the points Largest-Triangle-Three-Buckets keeps when reducing
+    (x, y) to n_out points. First and last point are always kept; every
+    bucket in between contributes the point forming the largest triangle
+    with the point kept from the previous bucket and the mean of the next.
+    """
+    n = len(y)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])[:max(n_out, 0)]
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket boundaries over the inner points 1..n-2, plus the means of every
+    # bucket, computed once from cumulative sums
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    sx = np.concatenate([[0.0], np.cumsum(x)])
+    sy = np.concatenate([[0.0], np.cumsum(y)])
+    counts = np.diff(edges)
+    mean_x = np.append((sx[edges[1:]] - sx[edges[:-1]]) / counts, x[-1])
+    mean_y = np.append((sy[edges[1:]] - sy[edges[:-1]]) / counts, y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        bx, by = x[lo:hi], y[lo:hi]
+        ax, ay = x[a], y[a]
+        cx, cy = mean_x[i + 1], mean_y[i + 1]
+        # Twice the triangle area; the factor does not change the argmax
+        area = np.abs((ax - cx) * (by - ay) - (ax - bx) * (cy - ay))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
@@ -1,7 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import os
+import tempfile
+import threading
+import time
+import numpy as np
 import pandas as pd
-from typing import Union
+from typing import List, Optional, Tuple, Union
 import requests
+from requests.adapters import HTTPAdapter
+
+from app.profiling import count, in_context, span
+from app.service.candle_store import CandleStore, Columns
+from app.service.warm_candles import WarmCandles, parse_pairs
 def datetime_to_millis(dt: Union[str, datetime]) -> int:
     if isinstance(dt, str):
         for fmt in ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"):
@@ -14,39 +25,96 @@ def datetime_to_millis(dt: Union[str, datetime]) -> int:
             raise ValueError(f"Invalid datetime format: {dt}")
     return int(dt.timestamp() * 1000)
 
-def fetch_all_ohlcv(
-    symbol: str,
-    interval: str,
-    start_time: Union[str, datetime],
-    end_time: Union[str, datetime],
-) -> pd.DataFrame:
-    start_ms = datetime_to_millis(start_time)
-    end_ms = datetime_to_millis(end_time)
+MARKET_HISTORY_URL = "http://market-service:8085/market/history"
+PAGE_LIMIT = 1000
+# Số trang tải song song tối đa (dùng chung cho mọi request)
+FETCH_WORKERS = int(os.getenv("MARKET_FETCH_WORKERS", "8"))
+# Kiểu số của khung nến: "float32" tốn một nửa bộ nhớ, giá còn ~7 chữ số có nghĩa
+CANDLE_DTYPE = os.getenv("CANDLE_DTYPE", "float64")
+
+_INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000,
+    "8h": 28_800_000, "12h": 43_200_000, "1d": 86_400_000, "3d": 259_200_000,
+    "1w": 604_800_000,
+}
+
+# Thư mục cache nến trên đĩa; đặt CANDLE_STORE_DIR="" để tắt
+_store_dir = os.getenv("CANDLE_STORE_DIR", os.path.join(tempfile.gettempdir(), "backtest-candles"))
+candle_store: Optional[CandleStore] = CandleStore(_store_dir) if _store_dir else None
+
+# Cặp nạp sẵn vào bộ nhớ khi khởi động, vd. "BTCUSDT:1m,ETHUSDT:1h"; rỗng = tắt
+WARMUP_PAIRS = os.getenv("BACKTEST_WARMUP_PAIRS", "")
+# Số ngày nến gần nhất giữ sẵn cho mỗi cặp
+WARMUP_DAYS = float(os.getenv("BACKTEST_WARMUP_DAYS", "365"))
+# Chu kỳ nạp thêm các nến mới đóng (giây)
+WARMUP_REFRESH_SECONDS = float(os.getenv("BACKTEST_WARMUP_REFRESH", "300"))
+
+
+def interval_to_millis(interval: str) -> Optional[int]:
+    """Length of one candle in ms, None for calendar intervals such as 1M."""
+    return _INTERVAL_MS.get(interval)
+
+
+def _warmup_pairs(spec: str) -> List[Tuple[str, str, int]]:
+    pairs = []
+    for symbol, interval in parse_pairs(spec):
+        if interval_to_millis(interval) is None:
+            raise ValueError(f"Unsupported warmup interval: {interval}")
+        pairs.append((symbol, interval, interval_to_millis(interval)))
+    return pairs
+
+
+warm_candles = WarmCandles(_warmup_pairs(WARMUP_PAIRS), int(WARMUP_DAYS * 86_400_000), WARMUP_REFRESH_SECONDS)
 
-    if start_ms >= end_ms:
-        raise ValueError("start_time must be before end_time")
 
+_http_lock = threading.Lock()
+_http_state = {"pid": None, "session": None, "pool": None}
+
+
+def _http():
+    """Keep-alive session and page download pool, created lazily per process."""
+    with _http_lock:
+        if _http_state["pid"] != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=FETCH_WORKERS)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _http_state.update(
+                pid=os.getpid(),
+                session=session,
+                pool=ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="candle-fetch"),
+            )
+        return _http_state["session"], _http_state["pool"]
+
+
+def _get_page(symbol: str, interval: str, start_ms: int, end_ms: int) -> List[dict]:
+    session, _ = _http()
+    params = {
+        "symbol": symbol.upper(),
+        "interval": interval,
+        "startTime": start_ms,
+        "endTime": end_ms,
+        "limit": PAGE_LIMIT,
+    }
+    res = session.get(MARKET_HISTORY_URL, params=params, timeout=15)
+    res.raise_for_status()
+    count("fetch_pages")
+    count("fetch_bytes", len(res.content))
+
+    batch = res.json()
+    # Cho phép trường hợp service bọc dữ liệu trong "data"
+    if isinstance(batch, dict):
+        return batch.get("data", [])
+    return batch
+
+
+def _fetch_rows(symbol: str, interval: str, start_ms: int, end_ms: int) -> List[dict]:
+    """Raw CandleDto dicts with start_ms <= openTime <= end_ms, page by page."""
     all_rows = []
-   
-    while start_ms < end_ms:
-        url = " http://market-service:8085/market/history"
-        params = {
-            "symbol": symbol.upper(),
-            "interval": interval,
-            "startTime": start_ms,
-            "endTime": end_ms,
-            "limit": 1000,
-        }
-        res = requests.get(url, params=params, timeout=15)
-        res.raise_for_status()
-
-        batch = res.json()
-        # Cho phép trường hợp service bọc dữ liệu trong "data"
-        if isinstance(batch, dict):
-            data = batch.get("data", [])
-        else:
-            data = batch
 
+    while start_ms < end_ms:
+        data = _get_page(symbol, interval, start_ms, end_ms)
         if not data:
             break
 
@@ -62,35 +130,221 @@ def fetch_all_ohlcv(
         else:
             start_ms = last_open_time + 1
 
-    if not all_rows:
-        return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"])
+    return all_rows
 
-    # Tạo DataFrame từ list[dict] CandleDto
-    df = pd.DataFrame(all_rows)
 
-    # Đổi tên cột sang chuẩn dùng nội bộ
-    rename_map = {
-        "openTime": "Open Time",
-        "open": "Open",
-        "high": "High",
-        "low": "Low",
-        "close": "Close",
-        "volume": "Volume",
-    }
-    missing = [k for k in rename_map.keys() if k not in df.columns]
+_FIELDS = {
+    "open_time": "openTime",
+    "open": "open",
+    "high": "high",
+    "low": "low",
+    "close": "close",
+    "volume": "volume",
+}
+
+
+_OHLCV = {"Open": "open", "High": "high", "Low": "low", "Close": "close", "Volume": "volume"}
+
+# Nến dạng khối: open time (ms) và ma trận (5, n) Open/High/Low/Close/Volume
+Block = Tuple[np.ndarray, np.ndarray]
+
+
+def _check_fields(rows: List[dict]) -> None:
+    missing = [k for k in _FIELDS.values() if k not in rows[0]] if rows else []
     if missing:
         raise ValueError(f"Missing expected fields from service: {missing}")
 
-    df = df.rename(columns=rename_map)
 
-    # Chuẩn hoá thời gian & index
-    df["Open Time"] = pd.to_datetime(df["Open Time"], unit="ms", utc=True).dt.tz_convert(None)
-    df = df.set_index("Open Time").sort_index()
+def _rows_into(rows: List[dict], open_time: np.ndarray, values: np.ndarray, offset: int) -> None:
+    """Parses rows straight into open_time/values[:, offset:offset + len(rows)]."""
+    n = len(rows)
+    open_time[offset:offset + n] = np.fromiter((r["openTime"] for r in rows), dtype=np.int64, count=n)
+    for i, field in enumerate(_OHLCV.values()):
+        values[i, offset:offset + n] = np.fromiter((r[field] for r in rows), dtype=np.float64, count=n)
+
+
+def _rows_to_block(rows: List[dict], dtype: np.dtype) -> Block:
+    _check_fields(rows)
+    block = np.empty(len(rows), dtype=np.int64), np.empty((len(_OHLCV), len(rows)), dtype=dtype)
+    _rows_into(rows, *block, 0)
+    return block
+
+
+def _fetch_page_rows(symbol: str, interval: str, start_ms: int, end_ms: int, interval_ms: int) -> List[dict]:
+    rows = _get_page(symbol, interval, start_ms, end_ms - 1)
+    if len(rows) >= PAGE_LIMIT:
+        # Trang đầy mà nến cuối chưa phải nến cuối của khoảng (dữ liệu bất
+        # thường) -> tải tiếp tuần tự. Trang đầy bình thường dừng ở đây.
+        last_open_time = rows[-1].get("openTime")
+        if last_open_time is not None and last_open_time + interval_ms < end_ms:
+            rows = rows + _fetch_rows(symbol, interval, last_open_time + 1, end_ms - 1)
+    _check_fields(rows)
+    return rows
+
+
+def _concat_blocks(blocks: List[Block]) -> Block:
+    return np.concatenate([b[0] for b in blocks]), np.concatenate([b[1] for b in blocks], axis=1)
+
+
+def _fetch_pages(symbol: str, interval: str, bounds: List[Tuple[int, int]], interval_ms: int,
+                 dtype: np.dtype) -> Block:
+    """
+    Downloads the pages of bounds concurrently. Every page is parsed straight
+    into its slot of one block preallocated for as many candles as the range
+    can hold, which then becomes the frame: no per-page arrays to concatenate
+    and no column-by-column copy into pandas.
+    """
+    slots = np.cumsum([0] + [-(-(e - s) // interval_ms) for s, e in bounds])
+    open_time = np.empty(int(slots[-1]), dtype=np.int64)
+    values = np.empty((len(_OHLCV), int(slots[-1])), dtype=dtype)
+
+    def fill(i: int) -> Union[int, Block]:
+        rows = _fetch_page_rows(symbol, interval, *bounds[i], interval_ms)
+        if len(rows) > slots[i + 1] - slots[i]:
+            # Nhiều nến hơn khoảng chứa được (dữ liệu bất thường): giữ riêng
+            return _rows_to_block(rows, dtype)
+        _rows_into(rows, open_time, values, int(slots[i]))
+        return len(rows)
+
+    _, pool = _http()
+    filled = list(pool.map(in_context(fill), range(len(bounds))))
+    if any(isinstance(f, tuple) for f in filled):
+        return _concat_blocks([
+            f if isinstance(f, tuple) else (open_time[slots[i]:slots[i] + f], values[:, slots[i]:slots[i] + f])
+            for i, f in enumerate(filled)
+        ])
+    # Dồn các trang thiếu nến (khoảng trống dữ liệu) về liền nhau, tại chỗ
+    n = 0
+    for i, k in enumerate(filled):
+        if k and slots[i] != n:
+            open_time[n:n + k] = open_time[slots[i]:slots[i] + k]
+            values[:, n:n + k] = values[:, slots[i]:slots[i] + k]
+        n += k
+    if n < len(open_time) // 2:
+        # Phần lớn khoảng không có nến (vd. symbol niêm yết sau startTime)
+        return open_time[:n].copy(), values[:, :n].copy()
+    return open_time[:n], values[:, :n]
+
+
+def _fetch_block(symbol: str, interval: str, start_ms: int, end_ms: int, dtype: np.dtype) -> Block:
+    """
+    Candles with start_ms <= openTime < end_ms, sorted and de-duplicated.
+
+    With a known candle length the range is cut into pages of PAGE_LIMIT
+    candles up front and the pages are downloaded concurrently.
+    """
+    interval_ms = interval_to_millis(interval)
+    if interval_ms is None:
+        open_time, values = _rows_to_block(_fetch_rows(symbol, interval, start_ms, end_ms - 1), dtype)
+    else:
+        span = PAGE_LIMIT * interval_ms
+        bounds = [(s, min(s + span, end_ms)) for s in range(start_ms, end_ms, span)]
+        if len(bounds) == 1:
+            open_time, values = _rows_to_block(_fetch_page_rows(symbol, interval, *bounds[0], interval_ms), dtype)
+        else:
+            open_time, values = _fetch_pages(symbol, interval, bounds, interval_ms, dtype)
+    if len(open_time) > 1 and not np.all(open_time[1:] > open_time[:-1]):
+        # Giữ bản cuối của nến trùng, như concat_columns
+        order = np.argsort(open_time, kind="stable")
+        keep = np.ones(len(order), dtype=bool)
+        keep[:-1] = open_time[order][1:] != open_time[order][:-1]
+        open_time, values = open_time[order[keep]], values[:, order[keep]]
+    inside = (open_time >= start_ms) & (open_time < end_ms)
+    if not inside.all():
+        open_time, values = open_time[inside], values[:, inside]
+    return open_time, values
+
+
+def _fetch_columns(symbol: str, interval: str, start_ms: int, end_ms: int) -> Columns:
+    """Same as _fetch_block, as the float64 columns of the candle store."""
+    open_time, values = _fetch_block(symbol, interval, start_ms, end_ms, np.dtype(np.float64))
+    cols = {"open_time": open_time}
+    cols.update(zip(_OHLCV.values(), values))
+    return cols
+
+
+def candle_dtype(dtype: Optional[str] = None) -> np.dtype:
+    """The float type of candle frames: dtype, else CANDLE_DTYPE."""
+    name = dtype or CANDLE_DTYPE
+    if name not in ("float32", "float64"):
+        raise ValueError(f"Unsupported candle dtype: {name}")
+    return np.dtype(name)
+
+
+def _block_to_frame(open_time: np.ndarray, values: np.ndarray) -> pd.DataFrame:
+    if not len(open_time):
+        return pd.DataFrame(columns=list(_OHLCV))
+    index = pd.DatetimeIndex(pd.to_datetime(open_time, unit="ms"), name="Open Time")
+    # values.T: pandas giữ khối (5, n) làm block của frame, không copy
+    return pd.DataFrame(values.T, index=index, columns=list(_OHLCV), copy=False)
+
+
+def _columns_to_frame(cols: Columns, dtype: np.dtype) -> pd.DataFrame:
+    values = np.empty((len(_OHLCV), len(cols["open_time"])), dtype=dtype)
+    for i, col in enumerate(_OHLCV.values()):
+        values[i] = cols[col]
+    return _block_to_frame(cols["open_time"], values)
+
+
+def fetch_all_ohlcv(
+    symbol: str,
+    interval: str,
+    start_time: Union[str, datetime],
+    end_time: Union[str, datetime],
+    dtype: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    OHLCV candles with start_time <= open time <= end_time, indexed by open
+    time. Prices are float64, or float32 with dtype (or CANDLE_DTYPE) "float32".
+    """
+    start_ms = datetime_to_millis(start_time)
+    end_ms = datetime_to_millis(end_time)
+
+    if start_ms >= end_ms:
+        raise ValueError("start_time must be before end_time")
+    frame_dtype = candle_dtype(dtype)
+
+    warm = warm_candles.get(symbol, interval, start_ms, end_ms + 1)
+    if warm is None:
+        return _load_frame(symbol, interval, start_ms, end_ms + 1, frame_dtype)
+    frame, covered_ms = warm
+    count("warm_candles", len(frame))
+    if len(frame) and (frame.dtypes != frame_dtype).any():
+        frame = frame.astype(frame_dtype)
+    if covered_ms > end_ms:
+        return frame
+    # Các nến đóng sau lần nạp gần nhất
+    tail = _load_frame(symbol, interval, covered_ms, end_ms + 1, frame_dtype)
+    if not len(frame) or not len(tail):
+        return tail if len(tail) else frame
+    return pd.concat([frame, tail])
+
+
+def _load_frame(symbol: str, interval: str, start_ms: int, end_ms: int, frame_dtype: np.dtype) -> pd.DataFrame:
+    """Candles with start_ms <= open time < end_ms from the candle store or market-service."""
+    def fetch(s: int, e: int) -> Columns:
+        return _fetch_columns(symbol, interval, s, e)
+
+    interval_ms = interval_to_millis(interval)
+    if candle_store is None or interval_ms is None:
+        # Không qua cache: các trang được đọc thẳng vào khối của frame
+        with span("fetch"):
+            open_time, values = _fetch_block(symbol, interval, start_ms, end_ms, frame_dtype)
+        count("fetch_candles", len(open_time))
+        with span("frame"):
+            return _block_to_frame(open_time, values)
+
+    with span("fetch"):
+        # Nến đang hình thành (chưa đóng) không được lưu vào cache
+        now_ms = int(time.time() * 1000)
+        closed_before_ms = now_ms - now_ms % interval_ms
+        cols = candle_store.get_range(symbol, interval, start_ms, end_ms, fetch, closed_before_ms)
+    count("fetch_candles", len(cols["open_time"]))
 
-    # Chỉ giữ các cột OHLCV, ép kiểu float
-    df = df[["Open", "High", "Low", "Close", "Volume"]].astype(float)
+    with span("frame"):
+        return _columns_to_frame(cols, frame_dtype)
 
-    # Loại trùng timestamp nếu có (giữ bản ghi mới nhất)
-    df = df[~df.index.duplicated(keep="last")]
 
-    return df
+def start_warmup() -> None:
+    """Starts loading (then refreshing) the WARMUP_PAIRS candles in the background."""
+    warm_candles.start(lambda symbol, interval, s, e: _load_frame(symbol, interval, s, e, candle_dtype()))
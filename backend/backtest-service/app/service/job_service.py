@@ -0,0 +1,199 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from app.domain.strategy.build_strategy import build_strategy
+from app.dto.request.StrategyConfigDTO import StrategyConfigDTO
+from app.dto.response.JobStatusDTO import JobStatusDTO
+from app.service.backtest_service import DEFAULT_EQUITY_POINTS, run_backtest_strategy
+from app.service.process_pool import process_pool, worker_context
+
+JOB_WORKERS = int(os.getenv("BACKTEST_JOB_WORKERS", str(os.cpu_count() or 1)))
+# Số job tối đa đang chờ + đang chạy; vượt quá thì từ chối (HTTP 429)
+JOB_QUEUE_SIZE = int(os.getenv("BACKTEST_JOB_QUEUE", str(JOB_WORKERS * 4)))
+# Thời gian giữ kết quả của job đã xong (giây)
+JOB_TTL_SECONDS = int(os.getenv("BACKTEST_JOB_TTL", "3600"))
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# Trạng thái chia sẻ của worker process, gắn một lần qua initializer
+_shared: Dict = {}
+
+
+def _init_worker(progress, started, cancel) -> None:
+    _shared.update(progress=progress, started=started, cancel=cancel)
+
+
+def _run_job(slot: int, cfg: StrategyConfigDTO, fmt: str, equity_points: int) -> dict:
+    progress, cancel = _shared["progress"], _shared["cancel"]
+
+    def report(fraction: float) -> None:
+        if cancel[slot]:
+            raise JobCancelled()
+        progress[slot] = fraction
+
+    _shared["started"][slot] = time.time()
+    report(0.0)
+    return run_backtest_strategy(cfg, progress=report, fmt=fmt, equity_points=equity_points)
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+
+
+@dataclass
+class _Job:
+    id: str
+    slot: Optional[int]
+    created: float
+    future: Optional[Future] = None
+    status: str = "queued"
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+
+class JobManager:
+    """
+    Runs /backtest jobs on a fixed pool of worker processes.
+
+    Every queued or running job holds one of `capacity` slots; submissions
+    beyond that are rejected instead of piling up. A slot indexes shared
+    arrays where the worker publishes its progress and start time and reads
+    its cancel flag, so polling and cancelling never wait on the worker.
+    """
+
+    def __init__(self, workers: int, capacity: int, ttl_seconds: int):
+        self.workers = max(1, workers)
+        self.capacity = max(1, capacity)
+        self.ttl_seconds = ttl_seconds
+        ctx = worker_context()
+        self._progress = ctx.Array("d", self.capacity, lock=False)
+        self._started = ctx.Array("d", self.capacity, lock=False)
+        self._cancel = ctx.Array("b", self.capacity, lock=False)
+        self._free: List[int] = list(range(self.capacity))
+        self._jobs: Dict[str, _Job] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = process_pool(
+                self.workers,
+                initializer=_init_worker,
+                initargs=(self._progress, self._started, self._cancel),
+            )
+        return self._pool
+
+    def _purge(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        expired = [jid for jid, j in self._jobs.items() if j.finished and j.finished < cutoff]
+        for jid in expired:
+            del self._jobs[jid]
+
+    def submit(self, cfg: StrategyConfigDTO, fmt: str = "rows",
+               equity_points: int = DEFAULT_EQUITY_POINTS) -> JobStatusDTO:
+        # Điều kiện sai báo lỗi ngay, không chiếm slot
+        build_strategy(cfg)
+        if fmt not in ("rows", "columnar"):
+            raise ValueError(f"Unknown result format: {fmt}")
+        with self._lock:
+            self._purge()
+            if not self._free:
+                raise JobQueueFull(f"Job queue is full ({self.capacity} jobs queued or running)")
+            slot = self._free.pop()
+            self._progress[slot] = 0.0
+            self._started[slot] = 0.0
+            self._cancel[slot] = 0
+            job = _Job(id=uuid.uuid4().hex, slot=slot, created=time.time())
+            self._jobs[job.id] = job
+            try:
+                job.future = self._executor().submit(_run_job, slot, cfg, fmt, equity_points)
+            except BrokenProcessPool:
+                self._pool = None
+                job.future = self._executor().submit(_run_job, slot, cfg, fmt, equity_points)
+        job.future.add_done_callback(lambda f, job=job: self._finish(job, f))
+        return self.status(job.id)
+
+    def _finish(self, job: _Job, future: Future) -> None:
+        with self._lock:
+            job.finished = time.time()
+            if job.slot is not None:
+                job.started = self._started[job.slot] or None
+            if future.cancelled():
+                job.status = "cancelled"
+            else:
+                exc = future.exception()
+                if exc is None:
+                    job.status, job.result = "done", future.result()
+                elif isinstance(exc, JobCancelled):
+                    job.status = "cancelled"
+                else:
+                    job.status, job.error = "failed", str(exc) or exc.__class__.__name__
+                    if isinstance(exc, BrokenProcessPool):
+                        # Worker chết (vd. OOM): tạo pool mới cho job sau
+                        self._pool = None
+            if job.slot is not None:
+                self._free.append(job.slot)
+                job.slot = None
+
+    def status(self, job_id: str) -> Optional[JobStatusDTO]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            status, started, progress = job.status, job.started, 0.0
+            if job.slot is not None:
+                started = self._started[job.slot] or None
+                if started:
+                    status, progress = "running", min(1.0, max(0.0, self._progress[job.slot]))
+                if self._cancel[job.slot]:
+                    status = "cancelling"
+            elif job.status == "done":
+                progress = 1.0
+            return JobStatusDTO(
+                id=job.id,
+                status=status,
+                progress=round(progress * 100, 1),
+                createdAt=_iso(job.created),
+                startedAt=_iso(started),
+                finishedAt=_iso(job.finished),
+                result=job.result,
+                error=job.error,
+            )
+
+    def cancel(self, job_id: str) -> Optional[JobStatusDTO]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            future = job.future if job.slot is not None else None
+            if future is not None:
+                # Job đã được worker nhận thì dừng ở lần báo tiến độ kế tiếp
+                self._cancel[job.slot] = 1
+        # cancel() chạy _finish ngay nếu job còn trong hàng đợi
+        if future is not None:
+            future.cancel()
+        return self.status(job_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            active = self.capacity - len(self._free)
+            return {"workers": self.workers, "capacity": self.capacity, "active": active, "jobs": len(self._jobs)}
+
+
+job_manager = JobManager(JOB_WORKERS, JOB_QUEUE_SIZE, JOB_TTL_SECONDS)
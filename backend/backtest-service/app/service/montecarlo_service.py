@@ -0,0 +1,121 @@
+import os
+from typing import Dict, List
+
+import numpy as np
+
+from app.dto.request.MonteCarloRequestDTO import MonteCarloRequestDTO
+from app.dto.response.MonteCarloResultDTO import DistributionDTO, MonteCarloResultDTO
+
+MONTECARLO_MAX_RUNS = int(os.getenv("MONTECARLO_MAX_RUNS", "100000"))
+# runs x trades tối đa; mỗi ô là một float64 của ma trận equity
+MONTECARLO_MAX_CELLS = int(os.getenv("MONTECARLO_MAX_CELLS", "20000000"))
+# Số điểm tối đa của equity_bands
+BAND_POINTS = 200
+
+_METHODS = ("bootstrap", "shuffle")
+
+
+def _sample(returns: np.ndarray, runs: int, method: str, rng: np.random.Generator) -> np.ndarray:
+    """(runs, trades) matrix of trade returns, one resampled sequence per row."""
+    n = len(returns)
+    dtype = np.int32 if n < 2 ** 31 else np.int64
+    if method == "bootstrap":
+        idx = rng.integers(0, n, size=(runs, n), dtype=dtype)
+    else:
+        idx = rng.permuted(np.broadcast_to(np.arange(n, dtype=dtype), (runs, n)), axis=1)
+    return returns[idx]
+
+
+def _sharpe(matrix: np.ndarray) -> np.ndarray:
+    """Per-trade Sharpe of every row; 0 where the returns do not vary."""
+    if matrix.shape[1] < 2:
+        return np.zeros(matrix.shape[0])
+    std = matrix.std(axis=1, ddof=1)
+    mean = matrix.mean(axis=1)
+    return np.divide(mean, std, out=np.zeros_like(mean), where=std > 0)
+
+
+def _paths(matrix: np.ndarray, cash: float):
+    """
+    Turns a (runs, trades) return matrix, in place, into equity after each
+    trade, and returns it with the max drawdown (%) of every row. Equity
+    compounds, as every trade of the strategy uses the whole account.
+    """
+    np.add(matrix, 1.0, out=matrix)
+    np.cumprod(matrix, axis=1, out=matrix)
+    np.multiply(matrix, cash, out=matrix)
+    # Đỉnh tính cả vốn ban đầu, như equity curve của backtest
+    peak = np.maximum.accumulate(matrix, axis=1)
+    np.maximum(peak, cash, out=peak)
+    np.divide(matrix, peak, out=peak)
+    return matrix, (peak.min(axis=1) - 1.0) * 100
+
+
+def _distribution(values: np.ndarray, percentiles: List[float]) -> DistributionDTO:
+    q = np.percentile(values, percentiles)
+    return DistributionDTO(
+        mean=float(values.mean()),
+        std=float(values.std()),
+        min=float(values.min()),
+        max=float(values.max()),
+        percentiles={_label(p): float(v) for p, v in zip(percentiles, q)},
+    )
+
+
+def _label(p: float) -> str:
+    return f"p{p:g}"
+
+
+def run_montecarlo(req: MonteCarloRequestDTO) -> dict:
+    returns = np.asarray(req.returns, dtype=np.float64)
+    returns = returns[np.isfinite(returns)]
+    n = len(returns)
+    if n == 0:
+        raise ValueError("trades must contain at least one finite ReturnPct")
+    if req.method not in _METHODS:
+        raise ValueError(f"method must be one of {', '.join(_METHODS)}")
+    if req.runs < 1 or req.runs > MONTECARLO_MAX_RUNS:
+        raise ValueError(f"runs must be between 1 and {MONTECARLO_MAX_RUNS}")
+    if req.runs * n > MONTECARLO_MAX_CELLS:
+        raise ValueError(f"runs x trades must not exceed {MONTECARLO_MAX_CELLS}")
+    if req.cash <= 0:
+        raise ValueError("cash must be positive")
+    if any(p < 0 or p > 100 for p in req.percentiles):
+        raise ValueError("percentiles must be between 0 and 100")
+    percentiles = sorted(set(float(p) for p in req.percentiles))
+
+    original_sharpe = _sharpe(returns[None, :])
+    original_equity, original_dd = _paths(returns[None, :].copy(), req.cash)
+    original = {
+        "final_equity": float(original_equity[0, -1]),
+        "max_drawdown_pct": float(original_dd[0]),
+        "sharpe": float(original_sharpe[0]),
+    }
+
+    rng = np.random.default_rng(req.seed)
+    matrix = _sample(returns, req.runs, req.method, rng)
+    # Hoán vị không đổi trung bình và độ lệch chuẩn
+    sharpe = _sharpe(matrix) if req.method == "bootstrap" else np.repeat(original_sharpe, req.runs)
+    equity, max_dd = _paths(matrix, req.cash)
+    final = equity[:, -1]
+
+    # Bước 0 là vốn ban đầu; các dải chỉ lấy tối đa BAND_POINTS bước
+    steps = np.unique(np.linspace(0, n, min(n + 1, BAND_POINTS)).round().astype(np.int64))
+    inner = steps[steps > 0] - 1
+    bands = np.percentile(equity[:, inner], percentiles, axis=0) if len(inner) else np.empty((len(percentiles), 0))
+    equity_bands: Dict[str, List[float]] = {}
+    for p, band in zip(percentiles, bands):
+        equity_bands[_label(p)] = [float(req.cash)] + band.tolist()
+
+    return MonteCarloResultDTO(
+        method=req.method,
+        runs=req.runs,
+        trades=n,
+        original=original,
+        final_equity=_distribution(final, percentiles),
+        max_drawdown_pct=_distribution(max_dd, percentiles),
+        sharpe=_distribution(sharpe, percentiles),
+        prob_loss=float((final < req.cash).mean()),
+        steps=steps.tolist(),
+        equity_bands=equity_bands,
+    ).to_dict()
@@ -0,0 +1,305 @@
+import heapq
+import itertools
+import math
+import os
+from collections import OrderedDict
+from contextlib import ExitStack
+from dataclasses import replace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.domain.engine.fast_engine import FRACTIONAL_UNIT
+from app.domain.indicator.IndicatorBank import IndicatorBank
+from app.domain.strategy.build_strategy import build_strategy
+from app.domain.strategy.signals import compute_indicator, indicator_key
+from app.dto.request.OptimizeRequestDTO import OptimizeRequestDTO
+from app.dto.request.RuleDTO import RuleDTO
+from app.dto.request.Side import Side
+from app.dto.request.StrategyConfigDTO import StrategyConfigDTO
+from app.dto.response.OptimizeResultDTO import HalvingStageDTO, OptimizeCandidateDTO, OptimizeResultDTO
+from app.dto.response.StatDTO import StatDTO
+from app.service.backtest_service import convert_stats, simulate
+from app.service.historical_service import fetch_all_ohlcv
+from app.service.process_pool import process_pool
+from app.service.shared_candles import SharedMatrix, attach, attach_matrix, share_candles
+
+OPTIMIZE_WORKERS = int(os.getenv("OPTIMIZE_WORKERS", str(os.cpu_count() or 1)))
+OPTIMIZE_MAX_COMBINATIONS = int(os.getenv("OPTIMIZE_MAX_COMBINATIONS", "5000"))
+# Với method "halving": phần lớn ứng viên chỉ chạy trên đoạn nến ngắn
+OPTIMIZE_HALVING_MAX_COMBINATIONS = int(os.getenv("OPTIMIZE_HALVING_MAX_COMBINATIONS", "50000"))
+# Giới hạn bộ nhớ cho indicator bank dùng chung; vượt quá thì worker tự tính
+OPTIMIZE_BANK_MB = float(os.getenv("OPTIMIZE_BANK_MB", "1024"))
+# Bộ nhớ tối đa mỗi worker giữ cho indicator tự tính (ngoài bank), cũ nhất bỏ trước
+OPTIMIZE_WORKER_CACHE_MB = float(os.getenv("OPTIMIZE_WORKER_CACHE_MB", "256"))
+
+Params = Dict[str, Any]
+
+
+def side_key(side: Side) -> str:
+    if side.timeframe:
+        return f"{side.type}_{side.window}@{side.timeframe}"
+    return f"{side.type}_{side.window}"
+
+
+def apply_params(cfg: StrategyConfigDTO, params: Params) -> StrategyConfigDTO:
+    """Copy of cfg with the windows ("SMA_10" -> 20), slPct and tpPct of params."""
+    windows = params.get("windows", {})
+
+    def remap(side: Side) -> Side:
+        if side.type != "CONST" and side_key(side) in windows:
+            return replace(side, window=int(windows[side_key(side)]))
+        return side
+
+    return replace(
+        cfg,
+        rules=[RuleDTO(left=remap(r.left), op=r.op, right=remap(r.right)) for r in cfg.rules],
+        slPct=params.get("slPct", cfg.slPct),
+        tpPct=params.get("tpPct", cfg.tpPct),
+    )
+
+
+def param_grid(req: OptimizeRequestDTO) -> Iterator[Params]:
+    known = {side_key(s) for r in req.config.rules for s in (r.left, r.right) if s.type != "CONST"}
+    unknown = [k for k in req.windows if k not in known]
+    if unknown:
+        raise ValueError(f"Unknown indicators in windows: {', '.join(unknown)}")
+
+    keys = list(req.windows)
+    sl_values = req.slPct or [req.config.slPct]
+    tp_values = req.tpPct or [req.config.tpPct]
+    for combo in itertools.product(*(req.windows[k] for k in keys), sl_values, tp_values):
+        yield {
+            "windows": dict(zip(keys, combo[:len(keys)])),
+            "slPct": combo[-2],
+            "tpPct": combo[-1],
+        }
+
+
+def bank_windows(req: OptimizeRequestDTO) -> Dict[str, List[int]]:
+    """Every window the grid can use on the config's own candles, per indicator type."""
+    windows: Dict[str, set] = {}
+    for r in req.config.rules:
+        for side in (r.left, r.right):
+            if side.type != "CONST" and not side.timeframe:
+                windows.setdefault(side.type, set()).add(int(side.window))
+    for key, values in req.windows.items():
+        # Indicator trên timeframe khác do simulate() tự tính
+        if "@" in key:
+            continue
+        windows.setdefault(key.rsplit("_", 1)[0], set()).update(int(v) for v in values)
+    return {t: sorted(ws) for t, ws in windows.items()}
+
+
+def objective_value(stats: StatDTO, objective: str, maximize: bool) -> float:
+    value = getattr(stats, objective)
+    if not isinstance(value, (int, float)) or math.isnan(value):
+        return -math.inf
+    return value if maximize else -value
+
+
+def warm_indicators(cfg: StrategyConfigDTO, history: pd.DataFrame, start: int,
+                    indicator_cache: Optional[Dict] = None) -> Dict:
+    """
+    indicator_cache for running cfg on history.iloc[start:]: the indicators
+    of its rules computed on all of history, then cut at start, so they are
+    already past their warm-up on the first bar. Keys indicator_cache already
+    has are kept; sides on other timeframes are left to simulate().
+    """
+    cache = {} if indicator_cache is None else indicator_cache
+    close = None
+    for rule in cfg.rules:
+        for side in (rule.left, rule.right):
+            if side.type == "CONST" or side.timeframe or indicator_key(side) in cache:
+                continue
+            if close is None:
+                close = history["Close"].to_numpy(dtype=float) * FRACTIONAL_UNIT
+            cache[indicator_key(side)] = compute_indicator(side, close)[start:]
+    return cache
+
+
+def _held_bytes(values: np.ndarray) -> int:
+    # Một view (vd. indicator cắt tại start) giữ cả mảng gốc
+    return values.base.nbytes if isinstance(values.base, np.ndarray) else values.nbytes
+
+
+class IndicatorLRU:
+    """
+    indicator_cache for simulate() in a worker: the bank rows it starts with
+    stay, and the indicators computed on top (windows without a bank, other
+    timeframes) are kept up to max_bytes, least recently used dropped first.
+    """
+
+    def __init__(self, banked: Dict, max_bytes: float):
+        self.banked = banked
+        self.max_bytes = max_bytes
+        self._computed: "OrderedDict[tuple, Any]" = OrderedDict()
+        self.nbytes = 0
+
+    def __contains__(self, key) -> bool:
+        return key in self.banked or key in self._computed
+
+    def __getitem__(self, key):
+        if key in self.banked:
+            return self.banked[key]
+        self._computed.move_to_end(key)
+        return self._computed[key]
+
+    def __setitem__(self, key, values) -> None:
+        old = self._computed.pop(key, None)
+        if old is not None:
+            self.nbytes -= _held_bytes(old)
+        self._computed[key] = values
+        self.nbytes += _held_bytes(values)
+        # Luôn giữ lại indicator vừa thêm
+        while self.nbytes > self.max_bytes and len(self._computed) > 1:
+            _, dropped = self._computed.popitem(last=False)
+            self.nbytes -= _held_bytes(dropped)
+
+    def __len__(self) -> int:
+        return len(self.banked) + len(self._computed)
+
+
+# Trạng thái của mỗi worker process, gắn một lần qua initializer
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(spec: Dict, cfg: StrategyConfigDTO, banks: Dict[str, Tuple[Dict, List[int]]]) -> None:
+    shm, data = attach(spec)
+    banked: Dict = {}
+    blocks = [shm]
+    # Các hàng của bank là view vào shared memory, không copy
+    for indicator_type, (bank_spec, windows) in banks.items():
+        bank_shm, values = attach_matrix(bank_spec)
+        blocks.append(bank_shm)
+        banked.update(IndicatorBank(indicator_type, windows, values).as_cache())
+    indicators = IndicatorLRU(banked, OPTIMIZE_WORKER_CACHE_MB * 1024 * 1024)
+    _worker.update(shm=blocks, data=data, cfg=cfg, indicators=indicators, banked=banked, sliced=None)
+
+
+def _candles_from(start: int) -> Tuple[pd.DataFrame, IndicatorLRU]:
+    """The worker's candles from bar `start` on, with the bank rows cut the same way."""
+    if start == 0:
+        return _worker["data"], _worker["indicators"]
+    sliced = _worker["sliced"]
+    if sliced is None or sliced[0] != start:
+        # Hàng của bank đã qua khởi động trên cả lịch sử, cắt ra vẫn là view
+        banked = {k: v[start:] for k, v in _worker["banked"].items()}
+        sliced = (start, _worker["data"].iloc[start:],
+                  IndicatorLRU(banked, OPTIMIZE_WORKER_CACHE_MB * 1024 * 1024))
+        _worker["sliced"] = sliced
+    return sliced[1], sliced[2]
+
+
+def _evaluate(params: Params, start: int = 0) -> Tuple[Params, StatDTO]:
+    cfg = apply_params(_worker["cfg"], params)
+    data, indicators = _candles_from(start)
+    # Không có bank: indicator vẫn tính trên cả lịch sử rồi cắt tại start, như
+    # hàng của bank, để ứng viên nào qua vòng không phụ thuộc OPTIMIZE_BANK_MB
+    stats = simulate(cfg, data, warm_indicators(cfg, _worker["data"], start, indicators))
+    return params, convert_stats(stats)
+
+
+def indicator_banks(req: OptimizeRequestDTO, data) -> Dict[str, IndicatorBank]:
+    """
+    One bank per indicator type of the grid, computed on the closes both
+    engines see (scaled by FRACTIONAL_UNIT). Empty when they would not fit
+    in OPTIMIZE_BANK_MB.
+    """
+    windows = bank_windows(req)
+    if sum(len(ws) for ws in windows.values()) * len(data) * 8 > OPTIMIZE_BANK_MB * 1024 * 1024:
+        return {}
+    close = data["Close"].to_numpy(dtype=float) * FRACTIONAL_UNIT
+    return {t: IndicatorBank.compute(t, ws, close) for t, ws in windows.items()}
+
+
+def halving_stages(candidates: int, bars: int, eta: int, min_bars: int, keep: int) -> List[Tuple[int, int]]:
+    """
+    (candidates, bars) of every successive-halving stage: each stage runs
+    eta times more bars than the one before on the 1/eta best candidates of
+    it (never fewer than keep), the last one on all bars. The first stage
+    has at least min_bars bars, and there are no more stages than needed
+    to get down to keep candidates.
+    """
+    keep = max(1, keep)
+    rounds = 0
+    while candidates > keep * eta ** rounds:
+        rounds += 1
+    lengths = [bars]
+    while len(lengths) <= rounds and lengths[0] // eta >= min_bars:
+        lengths.insert(0, lengths[0] // eta)
+    stages = []
+    for length in lengths:
+        stages.append((candidates, length))
+        candidates = max(keep, math.ceil(candidates / eta))
+    return stages
+
+
+def _check_method(req: OptimizeRequestDTO) -> int:
+    """The number of combinations allowed for req's method."""
+    if req.method == "grid":
+        return OPTIMIZE_MAX_COMBINATIONS
+    if req.method != "halving":
+        raise ValueError(f"Unknown optimization method: {req.method}")
+    if req.eta < 2:
+        raise ValueError("eta must be at least 2")
+    if req.minBars < 10:
+        raise ValueError("minBars must be at least 10")
+    return OPTIMIZE_HALVING_MAX_COMBINATIONS
+
+
+def run_optimization(req: OptimizeRequestDTO) -> dict:
+    cfg = req.config
+    if req.objective not in StatDTO.__dataclass_fields__:
+        raise ValueError(f"Unknown objective: {req.objective}")
+
+    max_combinations = _check_method(req)
+    grid = list(param_grid(req))
+    if len(grid) > max_combinations:
+        raise ValueError(f"Too many combinations: {len(grid)} > {max_combinations}")
+    # Invalid conditions fail here rather than in every worker
+    build_strategy(cfg)
+
+    data = fetch_all_ohlcv(cfg.symbol, cfg.interval, cfg.startTime, cfg.endTime)
+    if req.method == "halving":
+        plan = halving_stages(len(grid), len(data), req.eta, req.minBars, req.topN)
+    else:
+        plan = [(len(grid), len(data))]
+    workers = max(1, min(OPTIMIZE_WORKERS, len(grid)))
+
+    def score(r: Tuple[Params, StatDTO]) -> float:
+        return objective_value(r[1], req.objective, req.maximize)
+
+    stages: List[HalvingStageDTO] = []
+    evaluated = 0
+    with share_candles(data) as shared, ExitStack() as stack:
+        banks = {
+            t: (stack.enter_context(SharedMatrix(bank.values)).spec, bank.windows)
+            for t, bank in indicator_banks(req, data).items()
+        }
+        with process_pool(workers, initializer=_init_worker, initargs=(shared.spec, cfg, banks)) as pool:
+            candidates = grid
+            # Mỗi vòng chạy trên đoạn nến gần nhất; chỉ những ứng viên tốt nhất đi tiếp
+            for i, (_, bars) in enumerate(plan):
+                start = len(data) - bars
+                chunksize = max(1, len(candidates) // (workers * 4))
+                results: List[Tuple[Params, StatDTO]] = list(
+                    pool.map(_evaluate, candidates, itertools.repeat(start), chunksize=chunksize)
+                )
+                evaluated += len(results)
+                stages.append(HalvingStageDTO(bars=bars, start=str(data.index[start]) if bars else "",
+                                              candidates=len(candidates)))
+                if i + 1 < len(plan):
+                    candidates = [p for p, _ in heapq.nlargest(plan[i + 1][0], results, key=score)]
+
+    best = heapq.nlargest(max(0, req.topN), results, key=score)
+    full_work = len(grid) * len(data)
+    return OptimizeResultDTO(
+        objective=req.objective,
+        evaluated=evaluated,
+        results=[OptimizeCandidateDTO(params=p, stats=s) for p, s in best],
+        method=req.method,
+        stages=stages if req.method == "halving" else None,
+        work_ratio=sum(s.candidates * s.bars for s in stages) / full_work if full_work else 1.0,
+    ).to_dict()
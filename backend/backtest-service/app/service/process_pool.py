@@ -0,0 +1,21 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Cách khởi động worker process: "spawn" hoặc "forkserver". Không dùng fork vì
+# server Flask chạy nhiều thread (warmup, pool tải nến) có thể đang giữ lock
+# đúng lúc fork, và worker sẽ kẹt mãi ở lock đó
+WORKER_START_METHOD = os.getenv("WORKER_START_METHOD", "spawn")
+
+
+def worker_context():
+    return multiprocessing.get_context(WORKER_START_METHOD)
+
+
+def process_pool(max_workers: int, **kwargs) -> ProcessPoolExecutor:
+    """
+    ProcessPoolExecutor started with WORKER_START_METHOD. Workers import the
+    app modules afresh, so everything they need goes through initargs or the
+    task arguments.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=worker_context(), **kwargs)
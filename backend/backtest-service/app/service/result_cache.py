@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.dto.request.Side import Side
+from app.dto.request.StrategyConfigDTO import StrategyConfigDTO
+
+
+def _num(v) -> str:
+    # 0.1, 0.10 và 1e-1 cho cùng một chuỗi
+    return repr(float(round(float(v), 12)))
+
+
+def _side_key(side: Side) -> str:
+    if side.type == "CONST":
+        return f"CONST:{_num(side.const)}"
+    if side.timeframe:
+        return f"{side.type}:{int(side.window)}@{side.timeframe}"
+    return f"{side.type}:{int(side.window)}"
+
+
+def canonical_config(cfg: StrategyConfigDTO) -> dict:
+    """
+    The parts of cfg that decide a result, in a fixed form: whitespace and
+    float spelling normalized. Rule order is kept, because the trade rows'
+    Entry_fn/Exit_fn come from the last indicator in creation order.
+    Symbol, interval and time range are covered by the candle fingerprint
+    instead.
+    """
+    def condition(expr: str) -> str:
+        return re.sub(r"\s+", "", expr or "")
+
+    return {
+        "rules": [f"{_side_key(r.left)} {r.op} {_side_key(r.right)}" for r in cfg.rules],
+        "buy": condition(cfg.buyCondition),
+        "sell": condition(cfg.sellCondition),
+        "lots": _num(cfg.lots),
+        "slPct": _num(cfg.slPct),
+        "tpPct": _num(cfg.tpPct),
+        "engine": cfg.engine,
+    }
+
+
+def config_hash(cfg: StrategyConfigDTO) -> str:
+    payload = json.dumps(canonical_config(cfg), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def candles_fingerprint(data: pd.DataFrame) -> str:
+    """Digest of the exact candles a backtest ran on."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(data.index.values.astype("datetime64[ns]").view(np.int64)).tobytes())
+    for col in ("Open", "High", "Low", "Close", "Volume"):
+        h.update(np.ascontiguousarray(data[col].to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Backtest responses keyed by config hash + candle fingerprint.
+
+    Entries are kept as serialized JSON in an LRU bounded by total bytes, and
+    optionally written to `disk_dir` so they survive restarts and LRU
+    eviction. A range whose end is still open gets new candles over time and
+    thus a new fingerprint; `put(..., series=...)` drops the entry it replaces
+    so stale results of that series do not linger.
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None, disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir or None
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._series: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def key(cfg: StrategyConfigDTO, data: pd.DataFrame) -> str:
+        return f"{config_hash(cfg)}-{candles_fingerprint(data)}"
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is not None:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+        if blob is None and self.disk_dir:
+            try:
+                with open(self._disk_path(key), "rb") as f:
+                    blob = f.read()
+            except OSError:
+                blob = None
+            if blob is not None:
+                with self._lock:
+                    self._counters["disk_hits"] += 1
+                    self._insert(key, blob)
+        if blob is None:
+            with self._lock:
+                self._counters["misses"] += 1
+            return None
+        return json.loads(blob)
+
+    def put(self, key: str, result: dict, series: Optional[str] = None) -> None:
+        """series names an open-ended range; its previous entry is invalidated."""
+        blob = json.dumps(result, separators=(",", ":")).encode()
+        with self._lock:
+            stale = None
+            if series is not None:
+                stale = self._series.get(series)
+                self._series[series] = key
+                if stale == key:
+                    stale = None
+                if stale is not None:
+                    self._remove(stale)
+                    self._counters["invalidations"] += 1
+            self._insert(key, blob)
+        if self.disk_dir:
+            self._write_disk(key, blob, stale)
+
+    def _insert(self, key: str, blob: bytes) -> None:
+        if len(blob) > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = blob
+        self._bytes += len(blob)
+        while self._bytes > self.max_bytes:
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= len(old)
+            self._counters["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+
+    def _write_disk(self, key: str, blob: bytes, stale: Optional[str]) -> None:
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            tmp = f"{self._disk_path(key)}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(blob)
+            os.replace(tmp, self._disk_path(key))
+            if stale is not None:
+                os.remove(self._disk_path(stale))
+        except OSError:
+            pass
+        if self.disk_max_bytes:
+            self._trim_disk()
+
+    def _trim_disk(self) -> None:
+        # Xoá file cũ nhất (theo mtime) cho tới khi dưới giới hạn
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".json"):
+                try:
+                    st = os.stat(os.path.join(self.disk_dir, name))
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.disk_dir, name))
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._series.clear()
+            self._bytes = 0
+        if self.disk_dir and os.path.isdir(self.disk_dir):
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(self.disk_dir, name))
+                    except OSError:
+                        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["disk_hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_rate": (self._counters["hits"] + self._counters["disk_hits"]) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk_dir": self.disk_dir,
+            }
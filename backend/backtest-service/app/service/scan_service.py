@@ -0,0 +1,107 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.domain.engine.fast_engine import FRACTIONAL_UNIT
+from app.domain.strategy.signals import latest_signals
+from app.dto.request.ScanRequestDTO import ScanRequestDTO
+from app.dto.request.StrategyConfigDTO import StrategyConfigDTO
+from app.dto.response.ScanResultDTO import ScanResultDTO, ScanSymbolDTO
+from app.service.historical_service import fetch_all_ohlcv, interval_to_millis
+
+SCAN_MAX_SYMBOLS = int(os.getenv("SCAN_MAX_SYMBOLS", "1000"))
+# Số symbol tải nến song song
+SCAN_FETCH_WORKERS = int(os.getenv("SCAN_FETCH_WORKERS", "16"))
+# EMA/RSI/MACD là bộ lọc đệ quy: cần chừng này lần window để quên điểm bắt đầu
+SCAN_WARMUP_FACTOR = int(os.getenv("SCAN_WARMUP_FACTOR", "10"))
+SCAN_MAX_LOOKBACK = 5000
+
+_RECURSIVE = {"EMA", "RSI", "MACD"}
+
+
+def required_bars(cfg: StrategyConfigDTO) -> int:
+    """History the rules need so the last two bars match a full-history run."""
+    need = 1
+    for r in cfg.rules:
+        for side in (r.left, r.right):
+            if side.type == "CONST":
+                continue
+            if side.timeframe:
+                raise ValueError("Scans do not support rules on another timeframe")
+            window = int(side.window)
+            if side.type == "MACD":
+                # EMA 26 của đường MACD rồi EMA `window` của đường signal
+                window += 26
+            need = max(need, window * SCAN_WARMUP_FACTOR if side.type in _RECURSIVE else window + 1)
+    # +1 cho nến trước đó (CrossesUp/CrossesDown)
+    return need + 1
+
+
+def _latest_closes(symbol: str, cfg: StrategyConfigDTO, lookback: int, interval_ms: int,
+                   now: datetime, closed_only: bool) -> Tuple[np.ndarray, pd.Timestamp]:
+    start = now - timedelta(milliseconds=(lookback + 2) * interval_ms)
+    data = fetch_all_ohlcv(symbol, cfg.interval, start, now)
+    if closed_only and len(data):
+        now_ms = int(now.timestamp() * 1000)
+        open_ms = data.index.values.astype("datetime64[ms]").astype(np.int64)
+        data = data[open_ms + interval_ms <= now_ms]
+    if len(data) < lookback:
+        raise ValueError(f"Not enough candles ({len(data)} < {lookback})")
+    return data["Close"].to_numpy(dtype=float)[-lookback:], data.index[-1]
+
+
+def run_scan(req: ScanRequestDTO) -> dict:
+    """
+    Which symbols have the buy or sell condition firing on their latest bar.
+    Candles are fetched concurrently, stacked into one (symbols x lookback)
+    matrix and evaluated in one vectorized pass.
+    """
+    cfg = req.config
+    if len(req.symbols) > SCAN_MAX_SYMBOLS:
+        raise ValueError(f"Too many symbols: {len(req.symbols)} > {SCAN_MAX_SYMBOLS}")
+    interval_ms = interval_to_millis(cfg.interval)
+    if interval_ms is None:
+        raise ValueError(f"Unsupported interval for scan: {cfg.interval}")
+    lookback = req.lookback or required_bars(cfg)
+    if not 2 <= lookback <= SCAN_MAX_LOOKBACK:
+        raise ValueError(f"lookback must be between 2 and {SCAN_MAX_LOOKBACK}")
+    # Kiểm tra rule/điều kiện trước khi tải nến
+    latest_signals(cfg, np.ones((1, 2)))
+
+    now = datetime.now()
+    results: Dict[str, ScanSymbolDTO] = {}
+    rows: List[np.ndarray] = []
+    loaded: List[Tuple[str, pd.Timestamp, float]] = []
+
+    def load(symbol: str):
+        try:
+            return symbol, _latest_closes(symbol, cfg, lookback, interval_ms, now, req.closedOnly), None
+        except Exception as e:
+            return symbol, None, str(e) or e.__class__.__name__
+
+    workers = max(1, min(SCAN_FETCH_WORKERS, len(req.symbols)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan-fetch") as pool:
+        for symbol, got, error in pool.map(load, req.symbols):
+            if error is not None:
+                results[symbol] = ScanSymbolDTO(symbol=symbol, error=error)
+                continue
+            closes, last_time = got
+            rows.append(closes)
+            loaded.append((symbol, last_time, float(closes[-1])))
+
+    if rows:
+        # Cùng thang giá với backtest (FractionalBacktest), để ngưỡng CONST có cùng nghĩa
+        buy, sell = latest_signals(cfg, np.stack(rows) * FRACTIONAL_UNIT)
+        for k, (symbol, last_time, close) in enumerate(loaded):
+            results[symbol] = ScanSymbolDTO(symbol=symbol, time=str(last_time), close=close,
+                                            buy=bool(buy[k]), sell=bool(sell[k]))
+
+    return ScanResultDTO(
+        interval=cfg.interval,
+        lookback=lookback,
+        results=[results[s] for s in req.symbols],
+    ).to_dict()
@@ -0,0 +1,176 @@
+import os
+import tempfile
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+# Thư mục cho file nến memory-mapped chia cho worker; rỗng = dùng SharedMemory
+# (/dev/shm, tính vào giới hạn bộ nhớ của container)
+SHARED_CANDLES_DIR = os.getenv("SHARED_CANDLES_DIR", "")
+
+
+class SharedCandles:
+    """
+    An OHLCV frame copied once into a SharedMemory block so worker processes
+    can map it instead of receiving a pickled copy with every task.
+
+    Layout: int64 open times (ns) followed by a (5, n) OHLCV matrix of the
+    frame's float type (float64 or float32). Pass `spec` to the workers and
+    call attach(spec) there; the creating process calls close() once the
+    workers are done.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        n = len(data)
+        dtype = _dtype(data)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, _nbytes(n, dtype)))
+        index, values = _views(self._shm.buf, n, dtype)
+        _fill(index, values, data)
+        self.spec: Dict = {"name": self._shm.name, "n": n, "dtype": dtype.str, "index_name": data.index.name}
+
+    def close(self) -> None:
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedCandles":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class MappedCandles:
+    """
+    Same as SharedCandles, but the block is a file in `directory` that the
+    workers memory-map read-only: the candles live in the page cache, which
+    the kernel shares between processes and can drop under memory pressure,
+    instead of in /dev/shm. The file is removed by close(); mappings made
+    before stay valid.
+    """
+
+    def __init__(self, data: pd.DataFrame, directory: str = SHARED_CANDLES_DIR):
+        n = len(data)
+        dtype = _dtype(data)
+        os.makedirs(directory, exist_ok=True)
+        fd, self._path = tempfile.mkstemp(prefix="candles-", suffix=".bin", dir=directory)
+        os.close(fd)
+        try:
+            block = np.memmap(self._path, dtype=np.uint8, mode="w+", shape=(max(1, _nbytes(n, dtype)),))
+            _fill(*_views(block, n, dtype), data)
+            block.flush()
+            del block
+        except BaseException:
+            os.remove(self._path)
+            raise
+        self.spec: Dict = {"path": self._path, "n": n, "dtype": dtype.str, "index_name": data.index.name}
+
+    def close(self) -> None:
+        try:
+            os.remove(self._path)
+        except OSError:
+            pass
+
+    def __enter__(self) -> "MappedCandles":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def share_candles(data: pd.DataFrame) -> Union[SharedCandles, MappedCandles]:
+    """MappedCandles in SHARED_CANDLES_DIR when it is set, else SharedCandles."""
+    if SHARED_CANDLES_DIR:
+        return MappedCandles(data, SHARED_CANDLES_DIR)
+    return SharedCandles(data)
+
+
+def _dtype(data: pd.DataFrame) -> np.dtype:
+    # Giữ float32 nếu khung nến đã ở dạng gọn, còn lại là float64
+    if all(data[c].dtype == np.float32 for c in OHLCV):
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
+def _nbytes(n: int, dtype: np.dtype) -> int:
+    return 8 * n + dtype.itemsize * n * len(OHLCV)
+
+
+def _fill(index: np.ndarray, values: np.ndarray, data: pd.DataFrame) -> None:
+    index[:] = data.index.values.astype("datetime64[ns]").view(np.int64)
+    for i, col in enumerate(OHLCV):
+        values[i] = data[col].to_numpy()
+
+
+def _views(buf, n: int, dtype: np.dtype = np.dtype(np.float64)) -> Tuple[np.ndarray, np.ndarray]:
+    index = np.ndarray((n,), dtype=np.int64, buffer=buf)
+    values = np.ndarray((len(OHLCV), n), dtype=dtype, buffer=buf, offset=8 * n)
+    return index, values
+
+
+def _open(name: str) -> shared_memory.SharedMemory:
+    # Only the creator owns (and unlinks) the block. Attaching would register
+    # it with the resource tracker again, which then unlinks it or warns about
+    # a leak when a worker exits.
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None if rtype == "shared_memory" else register(name, rtype)
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def attach(spec: Dict) -> Tuple[Any, pd.DataFrame]:
+    """
+    Maps a SharedCandles or MappedCandles block as a DataFrame without
+    copying the values (read-only for MappedCandles). Keep the returned
+    handle referenced for as long as the frame is used.
+    """
+    dtype = np.dtype(spec.get("dtype", "<f8"))
+    if "path" in spec:
+        shm = np.memmap(spec["path"], dtype=np.uint8, mode="r", shape=(max(1, _nbytes(spec["n"], dtype)),))
+        index, values = _views(shm, spec["n"], dtype)
+    else:
+        shm = _open(spec["name"])
+        index, values = _views(shm.buf, spec["n"], dtype)
+    frame = pd.DataFrame(
+        values.T,
+        index=pd.DatetimeIndex(index.view("datetime64[ns]"), name=spec["index_name"]),
+        columns=OHLCV,
+        copy=False,
+    )
+    return shm, frame
+
+
+class SharedMatrix:
+    """
+    A float64 array copied once into a SharedMemory block, e.g. an indicator
+    bank. Workers map it read-only with attach_matrix(spec); the creating
+    process calls close() once they are done.
+    """
+
+    def __init__(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, values.nbytes))
+        np.ndarray(values.shape, dtype=np.float64, buffer=self._shm.buf)[...] = values
+        self.spec: Dict = {"name": self._shm.name, "shape": values.shape}
+
+    def close(self) -> None:
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedMatrix":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def attach_matrix(spec: Dict) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    """Maps a SharedMatrix block; the array is a read-only view of it."""
+    shm = _open(spec["name"])
+    values = np.ndarray(spec["shape"], dtype=np.float64, buffer=shm.buf)
+    values.flags.writeable = False
+    return shm, values
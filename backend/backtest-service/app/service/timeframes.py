@@ -0,0 +1,146 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.domain.engine.fast_engine import FRACTIONAL_UNIT
+from app.domain.strategy.signals import compute_indicator, indicator_key
+from app.dto.request.Side import Side
+from app.dto.request.StrategyConfigDTO import StrategyConfigDTO
+from app.profiling import span
+from app.service.historical_service import interval_to_millis
+from app.service.result_cache import candles_fingerprint
+
+# Số khung resample giữ trong bộ nhớ (theo nến gốc + timeframe)
+TIMEFRAME_CACHE_ENTRIES = int(os.getenv("TIMEFRAME_CACHE_ENTRIES", "64"))
+
+# Nến tuần của Binance mở vào thứ Hai; epoch (1970-01-01) là thứ Năm
+_ORIGIN_MS = {"1w": 4 * 86_400_000}
+
+
+def _open_ms(data: pd.DataFrame) -> np.ndarray:
+    return data.index.values.astype("datetime64[ms]").astype(np.int64)
+
+
+def resample_ohlcv(data: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    OHLCV candles of `timeframe` built from the (sorted) candles of data,
+    bucketed on the exchange's candle boundaries like pandas' resample. A
+    bucket only partly covered by data is built from the bars it has.
+    """
+    tf_ms = interval_to_millis(timeframe)
+    if tf_ms is None:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    if not len(data):
+        return data.iloc[:0].copy()
+    origin = _ORIGIN_MS.get(timeframe, 0)
+    bucket = (_open_ms(data) - origin) // tf_ms
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(bucket)] - 1
+
+    def col(name: str) -> np.ndarray:
+        return data[name].to_numpy(dtype=np.float64)
+
+    index = pd.DatetimeIndex(pd.to_datetime(bucket[starts] * tf_ms + origin, unit="ms"), name=data.index.name)
+    return pd.DataFrame(
+        {
+            "Open": col("Open")[starts],
+            "High": np.maximum.reduceat(col("High"), starts),
+            "Low": np.minimum.reduceat(col("Low"), starts),
+            "Close": col("Close")[ends],
+            "Volume": np.add.reduceat(col("Volume"), starts),
+        },
+        index=index,
+    )
+
+
+def align_to_base(higher: pd.DataFrame, timeframe: str, data: pd.DataFrame, interval: str) -> np.ndarray:
+    """
+    For every bar of data, the position in `higher` of the last candle that
+    had closed when that bar closed, -1 before the first one. A bar never
+    sees the candle it is still part of, so there is no look-ahead.
+    """
+    close_ms = _open_ms(higher) + interval_to_millis(timeframe)
+    return np.searchsorted(close_ms, _open_ms(data) + interval_to_millis(interval), side="right") - 1
+
+
+class _TimeframeCache:
+    """Resampled closes and their alignment, LRU by (candles, interval, timeframe)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, data: pd.DataFrame, fingerprint: str, interval: str,
+            timeframe: str) -> Tuple[np.ndarray, np.ndarray]:
+        key = (fingerprint, interval, timeframe)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        with span("resample", timeframe):
+            higher = resample_ohlcv(data, timeframe)
+            entry = (higher["Close"].to_numpy(dtype=np.float64), align_to_base(higher, timeframe, data, interval))
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+timeframe_cache = _TimeframeCache(TIMEFRAME_CACHE_ENTRIES)
+
+
+def _timeframe_sides(cfg: StrategyConfigDTO):
+    return [s for r in cfg.rules for s in (r.left, r.right) if s.type != "CONST" and s.timeframe]
+
+
+def uses_timeframes(cfg: StrategyConfigDTO) -> bool:
+    return bool(_timeframe_sides(cfg))
+
+
+def _check_timeframe(side: Side, interval: str) -> None:
+    tf_ms = interval_to_millis(side.timeframe)
+    base_ms = interval_to_millis(interval)
+    if tf_ms is None:
+        raise ValueError(f"Unsupported timeframe: {side.timeframe}")
+    if base_ms is None:
+        raise ValueError(f"Timeframes cannot be derived from {interval} candles")
+    if tf_ms < base_ms or tf_ms % base_ms:
+        raise ValueError(f"Timeframe {side.timeframe} is not a multiple of the {interval} interval")
+
+
+def timeframe_indicators(cfg: StrategyConfigDTO, data: pd.DataFrame, indicator_cache: Dict) -> None:
+    """
+    Adds the indicators cfg computes on other timeframes to indicator_cache,
+    one value per bar of data: the indicator of the last higher-timeframe
+    candle closed by that bar, 0.0 before the first one (like a warm-up).
+    Computed on closes scaled by FRACTIONAL_UNIT, as the engines do.
+    """
+    sides = [s for s in _timeframe_sides(cfg) if indicator_key(s) not in indicator_cache]
+    if not sides:
+        return
+    for side in sides:
+        _check_timeframe(side, cfg.interval)
+    fingerprint = candles_fingerprint(data)
+    # Chỉ báo trên khung lớn, dùng chung cho các side cùng timeframe
+    higher_cache: Dict[str, Dict] = {}
+    for side in sides:
+        close, pos = timeframe_cache.get(data, fingerprint, cfg.interval, side.timeframe)
+        values = compute_indicator(
+            Side(type=side.type, window=side.window),
+            close * FRACTIONAL_UNIT,
+            higher_cache.setdefault(side.timeframe, {}),
+        )
+        aligned = values[np.maximum(pos, 0)] if len(values) else np.zeros(len(pos))
+        aligned[pos < 0] = 0.0
+        indicator_cache[indicator_key(side)] = aligned
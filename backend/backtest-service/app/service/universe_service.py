@@ -0,0 +1,110 @@
+import os
+from concurrent.futures import Future
+from dataclasses import replace
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.domain.engine.stats import compute_stats
+from app.domain.strategy.build_strategy import build_strategy
+from app.dto.request.UniverseRequestDTO import UniverseRequestDTO
+from app.dto.response.StatDTO import StatDTO
+from app.dto.response.UniverseResultDTO import UniverseResultDTO, UniverseSymbolDTO
+from app.service.backtest_service import DEFAULT_EQUITY_POINTS, convert_stats, equity_curve, simulate
+from app.service.historical_service import fetch_all_ohlcv
+from app.service.process_pool import process_pool
+
+UNIVERSE_WORKERS = int(os.getenv("UNIVERSE_WORKERS", str(os.cpu_count() or 1)))
+UNIVERSE_MAX_SYMBOLS = int(os.getenv("UNIVERSE_MAX_SYMBOLS", "500"))
+
+# Các cột của _trades cần để tính stats danh mục
+_TRADE_COLUMNS = ["EntryTime", "ExitTime", "PnL", "ReturnPct", "Duration"]
+
+
+def _run_symbol(cfg, data: pd.DataFrame) -> Tuple[StatDTO, np.ndarray, pd.DataFrame]:
+    """Worker task: stats, equity per bar and trades of cfg on one symbol's candles."""
+    stats = simulate(cfg, data)
+    equity = stats._equity_curve["Equity"].to_numpy(dtype=float)
+    return convert_stats(stats), equity, stats._trades[_TRADE_COLUMNS]
+
+
+def portfolio_stats(runs: List[Tuple[pd.DatetimeIndex, np.ndarray, np.ndarray, pd.DataFrame]],
+                    cash: float) -> pd.Series:
+    """
+    Stats of the sum of the per-symbol accounts, each started with `cash`.
+    runs holds (index, close, equity, trades) per symbol. Accounts are
+    aligned on the union of their bar times and hold their last value (or
+    the starting cash) on bars they do not have; buy & hold is the same
+    equal-weight split held from the first bar.
+    """
+    index = runs[0][0]
+    for idx, *_ in runs[1:]:
+        index = index.union(idx)
+    equity = np.zeros(len(index))
+    hold = np.zeros(len(index))
+    trades = []
+    for idx, close, eq, tr in runs:
+        pos = index.get_indexer(idx)
+        # Giá trị tại mỗi bar = giá trị bar gần nhất của symbol, trước bar đầu là cash
+        last = np.searchsorted(pos, np.arange(len(index)), side="right") - 1
+        have = last >= 0
+        equity += np.where(have, eq[np.maximum(last, 0)], cash)
+        hold += np.where(have, cash * close[np.maximum(last, 0)] / close[0], cash)
+        tr = tr.assign(
+            EntryBar=index.get_indexer(pd.DatetimeIndex(tr["EntryTime"])),
+            ExitBar=index.get_indexer(pd.DatetimeIndex(tr["ExitTime"])),
+        )
+        trades.append(tr)
+    all_trades = pd.concat(trades, ignore_index=True).sort_values("EntryTime", kind="stable")
+    return compute_stats(all_trades.reset_index(drop=True), equity, hold, index)
+
+
+def run_universe(req: UniverseRequestDTO, equity_points: int = DEFAULT_EQUITY_POINTS) -> dict:
+    """
+    Runs req.config on every symbol with an equal share of its lots.
+    Candles are loaded here one symbol after another while the worker
+    processes simulate the symbols already loaded.
+    """
+    if len(req.symbols) > UNIVERSE_MAX_SYMBOLS:
+        raise ValueError(f"Too many symbols: {len(req.symbols)} > {UNIVERSE_MAX_SYMBOLS}")
+    build_strategy(req.config)
+    cash = float(req.config.lots) / len(req.symbols)
+    # Cùng một "hiện tại" cho mọi symbol khi không có endTime
+    end_time = req.config.endTime or datetime.now()
+
+    results: Dict[str, UniverseSymbolDTO] = {}
+    pending: List[Tuple[str, pd.DataFrame, Future]] = []
+    workers = max(1, min(UNIVERSE_WORKERS, len(req.symbols)))
+    with process_pool(workers) as pool:
+        # Nến của symbol kế tiếp được tải trong lúc worker chạy các symbol trước
+        for symbol in req.symbols:
+            try:
+                data = fetch_all_ohlcv(symbol, req.config.interval, req.config.startTime, end_time)
+                if len(data) == 0:
+                    raise ValueError("No candles in the requested range")
+            except Exception as e:
+                results[symbol] = UniverseSymbolDTO(symbol=symbol, error=str(e))
+                continue
+            cfg = replace(req.config, symbol=symbol, lots=cash, endTime=end_time)
+            pending.append((symbol, data, pool.submit(_run_symbol, cfg, data)))
+
+        runs = []
+        for symbol, data, future in pending:
+            try:
+                stats, equity, trades = future.result()
+            except Exception as e:
+                results[symbol] = UniverseSymbolDTO(symbol=symbol, error=str(e) or e.__class__.__name__)
+                continue
+            results[symbol] = UniverseSymbolDTO(symbol=symbol, stats=stats)
+            runs.append((data.index, data["Close"].to_numpy(dtype=float), equity, trades))
+
+    if not runs:
+        raise ValueError("No symbol could be backtested")
+    pstats = portfolio_stats(runs, cash)
+    return UniverseResultDTO(
+        symbols=[results[s] for s in req.symbols],
+        portfolio=convert_stats(pstats),
+        equity=equity_curve(pstats, equity_points) if equity_points > 0 else None,
+    ).to_dict()
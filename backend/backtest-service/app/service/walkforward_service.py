@@ -0,0 +1,135 @@
+import math
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+
+from app.domain.strategy.build_strategy import build_strategy
+from app.dto.request.WalkForwardRequestDTO import WalkForwardRequestDTO
+from app.dto.response.StatDTO import StatDTO
+from app.dto.response.WalkForwardResultDTO import WalkForwardFoldDTO, WalkForwardResultDTO
+from app.service.backtest_service import convert_stats, simulate
+from app.service.historical_service import fetch_all_ohlcv
+from app.service.optimize_service import (OPTIMIZE_MAX_COMBINATIONS, OPTIMIZE_WORKER_CACHE_MB, OPTIMIZE_WORKERS,
+                                          IndicatorLRU, apply_params, indicator_banks, objective_value,
+                                          param_grid, warm_indicators)
+from app.service.process_pool import process_pool
+from app.service.shared_candles import attach, share_candles
+
+# (train_start, train_end, test_end): in-sample [train_start, train_end),
+# out-of-sample [train_end, test_end), theo chỉ số nến
+Fold = Tuple[int, int, int]
+
+# Số nến tối thiểu của mỗi đoạn in-sample / out-of-sample
+MIN_FOLD_BARS = 10
+
+
+def fold_ranges(n: int, req: WalkForwardRequestDTO) -> List[Fold]:
+    """Rolling (or anchored) train/test windows whose test parts tile the end of n bars."""
+    if req.trainBars is not None and req.testBars is not None:
+        train, test = req.trainBars, req.testBars
+        count = (n - train) // test if test > 0 else 0
+    else:
+        if req.folds < 1:
+            raise ValueError("folds must be at least 1")
+        if not 0 < req.trainRatio < 1:
+            raise ValueError("trainRatio must be between 0 and 1")
+        # n = train + folds * test, train = test * ratio / (1 - ratio)
+        test = int(n / (req.folds + req.trainRatio / (1 - req.trainRatio)))
+        train, count = n - req.folds * test, req.folds
+    if train < MIN_FOLD_BARS or test < MIN_FOLD_BARS or count < 1:
+        raise ValueError(f"Not enough candles ({n}) for the requested folds")
+
+    offset = n - train - count * test
+    folds = []
+    for k in range(count):
+        train_end = offset + train + k * test
+        train_start = offset if req.anchored else train_end - train
+        folds.append((train_start, train_end, train_end + test))
+    return folds
+
+
+# Trạng thái của mỗi worker process, gắn một lần qua initializer
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(spec: Dict, req: WalkForwardRequestDTO) -> None:
+    shm, data = attach(spec)
+    _worker.update(shm=shm, data=data, req=req, grid=list(param_grid(req.optimize)))
+
+
+def _run_fold(fold: Fold) -> Tuple[Dict, StatDTO, StatDTO]:
+    """Optimizes on the in-sample part of one fold and replays the winner out of sample."""
+    opt = _worker["req"].optimize
+    data = _worker["data"]
+    train_start, train_end, test_end = fold
+    train = data.iloc[train_start:train_end]
+    test = data.iloc[train_end:test_end]
+
+    # Indicator tính trên mọi nến trước train_end rồi cắt tại train_start: in-sample
+    # của fold trượt không phải khởi động lại indicator, như out-of-sample.
+    # Có bank thì lấy hàng của bank, không thì tính riêng cho từng tham số
+    history = data.iloc[:train_end]
+    banked: Dict = {}
+    for bank in indicator_banks(opt, history).values():
+        banked.update({k: v[train_start:] for k, v in bank.as_cache().items()})
+    indicators = IndicatorLRU(banked, OPTIMIZE_WORKER_CACHE_MB * 1024 * 1024)
+    best, best_stats, best_value = None, None, -math.inf
+    for params in _worker["grid"]:
+        cfg = apply_params(opt.config, params)
+        stats = convert_stats(simulate(cfg, train, warm_indicators(cfg, history, train_start, indicators)))
+        value = objective_value(stats, opt.objective, opt.maximize)
+        if best is None or value > best_value:
+            best, best_stats, best_value = params, stats, value
+
+    # Tham số thắng chạy tiếp trên out-of-sample với indicator đã khởi động từ trước
+    best_cfg = apply_params(opt.config, best)
+    oos = convert_stats(simulate(best_cfg, test, warm_indicators(best_cfg, data.iloc[:test_end], train_end)))
+    return best, best_stats, oos
+
+
+def _time(data: pd.DataFrame, i: int) -> str:
+    return str(data.index[min(i, len(data) - 1)])
+
+
+def run_walkforward(req: WalkForwardRequestDTO) -> dict:
+    opt = req.optimize
+    cfg = opt.config
+    if opt.objective not in StatDTO.__dataclass_fields__:
+        raise ValueError(f"Unknown objective: {opt.objective}")
+    grid_size = sum(1 for _ in param_grid(opt))
+    if grid_size > OPTIMIZE_MAX_COMBINATIONS:
+        raise ValueError(f"Too many combinations: {grid_size} > {OPTIMIZE_MAX_COMBINATIONS}")
+    build_strategy(cfg)
+
+    data = fetch_all_ohlcv(cfg.symbol, cfg.interval, cfg.startTime, cfg.endTime)
+    folds = fold_ranges(len(data), req)
+    workers = max(1, min(OPTIMIZE_WORKERS, len(folds)))
+    with share_candles(data) as shared:
+        with process_pool(workers, initializer=_init_worker, initargs=(shared.spec, req)) as pool:
+            results = list(pool.map(_run_fold, folds))
+
+    fold_dtos = [
+        WalkForwardFoldDTO(
+            fold=k,
+            trainStart=_time(data, a),
+            trainEnd=_time(data, b - 1),
+            testStart=_time(data, b),
+            testEnd=_time(data, c - 1),
+            params=params,
+            inSample=in_sample,
+            outOfSample=oos,
+        )
+        for k, ((a, b, c), (params, in_sample, oos)) in enumerate(zip(folds, results))
+    ]
+    growth = 1.0
+    for f in fold_dtos:
+        growth *= 1 + f.outOfSample.return_pct / 100
+    is_ann = sum(f.inSample.return_ann_pct for f in fold_dtos) / len(fold_dtos)
+    oos_ann = sum(f.outOfSample.return_ann_pct for f in fold_dtos) / len(fold_dtos)
+    return WalkForwardResultDTO(
+        objective=opt.objective,
+        evaluated=grid_size * len(folds),
+        folds=fold_dtos,
+        oos_return_pct=(growth - 1) * 100,
+        efficiency=oos_ann / is_ann if is_ann > 0 else 0.0,
+    ).to_dict()
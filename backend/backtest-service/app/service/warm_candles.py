@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# load(symbol, interval, start_ms, end_ms) -> candles with start_ms <= open time < end_ms
+Loader = Callable[[str, str, int, int], pd.DataFrame]
+
+
+def parse_pairs(spec: str) -> List[Tuple[str, str]]:
+    """"BTCUSDT:1m, ethusdt:1h" -> [("BTCUSDT", "1m"), ("ETHUSDT", "1h")]."""
+    pairs = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        symbol, sep, interval = item.partition(":")
+        if not sep or not symbol.strip() or not interval.strip():
+            raise ValueError(f"Invalid warmup pair (expected SYMBOL:interval): {item}")
+        pair = (symbol.strip().upper(), interval.strip())
+        if pair not in pairs:
+            pairs.append(pair)
+    return pairs
+
+
+def _iso(ms: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).isoformat() if ms else None
+
+
+@dataclass
+class _Entry:
+    symbol: str
+    interval: str
+    interval_ms: int
+    status: str = "pending"
+    frame: Optional[pd.DataFrame] = None
+    # Khoảng open time [start_ms, end_ms) đang giữ; end_ms là mốc nến đóng cuối cùng
+    start_ms: int = 0
+    end_ms: int = 0
+    loaded_at: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "symbol": self.symbol,
+            "interval": self.interval,
+            "status": self.status,
+            "candles": 0 if self.frame is None else len(self.frame),
+            "start": _iso(self.start_ms) if self.frame is not None else None,
+            "end": _iso(self.end_ms) if self.frame is not None else None,
+            "loadedAt": _iso(self.loaded_at * 1000) if self.loaded_at else None,
+            "error": self.error,
+        }
+
+
+class WarmCandles:
+    """
+    The last `window_ms` of closed candles of a fixed list of (symbol,
+    interval) pairs, kept in memory so backtests on them skip the download.
+
+    start() loads every pair on a background thread, then appends the
+    candles closed since the last load every `refresh_seconds` and drops
+    those that left the window. A refresh replaces the frame rather than
+    changing it, so get() hands out slices of it without copying.
+    """
+
+    def __init__(self, pairs: List[Tuple[str, str, int]], window_ms: int, refresh_seconds: float):
+        self.window_ms = window_ms
+        self.refresh_seconds = refresh_seconds
+        self._entries: Dict[Tuple[str, str], _Entry] = {
+            (symbol, interval): _Entry(symbol, interval, interval_ms) for symbol, interval, interval_ms in pairs
+        }
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, load: Loader) -> None:
+        """Starts the loading thread once; does nothing without pairs."""
+        with self._lock:
+            if not self._entries or self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(load,), name="candle-warmup", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=10)
+        self._thread = None
+
+    def _run(self, load: Loader) -> None:
+        while not self._stop.is_set():
+            for entry in list(self._entries.values()):
+                if self._stop.is_set():
+                    return
+                self._refresh(entry, load)
+            self._stop.wait(self.refresh_seconds)
+
+    def _refresh(self, entry: _Entry, load: Loader) -> None:
+        now_ms = int(time.time() * 1000)
+        # Chỉ giữ nến đã đóng: nến đang hình thành còn thay đổi
+        end_ms = now_ms - now_ms % entry.interval_ms
+        start_ms = end_ms - self.window_ms
+        start_ms -= start_ms % entry.interval_ms
+        frame = entry.frame
+        if frame is not None and entry.start_ms <= start_ms < entry.end_ms:
+            # Chỉ tải phần nến mới đóng từ lần trước
+            fetch_from = entry.end_ms
+        else:
+            frame, fetch_from = None, start_ms
+        with self._lock:
+            if entry.status != "ready":
+                entry.status = "loading"
+        try:
+            fresh = load(entry.symbol, entry.interval, fetch_from, end_ms) if fetch_from < end_ms else None
+        except Exception as e:
+            logger.warning("Warmup of %s %s failed: %s", entry.symbol, entry.interval, e)
+            with self._lock:
+                entry.error = str(e)
+                if entry.status != "ready":
+                    entry.status = "error"
+            return
+
+        if frame is None:
+            frame = fresh
+        elif len(frame):
+            # Bỏ các nến đã ra khỏi cửa sổ trước khi nối, để chỉ copy một lần
+            frame = frame.iloc[frame.index.searchsorted(np.datetime64(start_ms, "ms")):]
+            if fresh is not None and len(fresh):
+                frame = pd.concat([frame, fresh])
+        elif fresh is not None:
+            frame = fresh
+        with self._lock:
+            entry.frame = frame
+            entry.start_ms, entry.end_ms = start_ms, end_ms
+            entry.loaded_at = time.time()
+            entry.status = "ready"
+            entry.error = None
+
+    def get(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> Optional[Tuple[pd.DataFrame, int]]:
+        """
+        (candles with start_ms <= open time < min(end_ms, covered), covered)
+        when the pair is loaded and its window starts at or before start_ms;
+        candles from `covered` on must be fetched. None otherwise.
+        """
+        with self._lock:
+            entry = self._entries.get((symbol.upper(), interval))
+            if entry is None or entry.frame is None:
+                return None
+            frame, window_start, covered = entry.frame, entry.start_ms, entry.end_ms
+        if start_ms < window_start:
+            return None
+        if not len(frame):
+            return frame, covered
+        lo, hi = frame.index.searchsorted(
+            [np.datetime64(start_ms, "ms"), np.datetime64(min(end_ms, covered), "ms")], side="left"
+        )
+        return frame.iloc[lo:hi], covered
+
+    def status(self) -> dict:
+        with self._lock:
+            pairs = [e.to_dict() for e in self._entries.values()]
+        loaded = sum(1 for p in pairs if p["status"] == "ready")
+        return {
+            "ready": loaded == len(pairs),
+            "progress": loaded / len(pairs) if pairs else 1.0,
+            "pairs": pairs,
+        }
@@ -0,0 +1,269 @@
+"""
+End-to-end benchmark of run_backtest_strategy on synthetic candles.
+
+Run from backend/backtest-service:
+
+    python -m benchmarks.bench_backtest [--sizes 10000 100000 1000000] [--rules 1 5 20]
+        [--generators gbm regime] [--engines fast] [--repeat 3] [--no-memory]
+
+Candles come from benchmarks.synthetic and are served by a local
+MarketStub, so every run pays for the HTTP paging, parsing, indicators,
+simulation, stats and serialization of a real request. The result and
+checkpoint caches and the candle store are turned off so runs are cold.
+
+Strategy shapes go from 1 rule to 20 rules joined by nested &, | and !
+expressions. For every (generator, bars, rules, engine) the script prints
+the best-of-N wall time, throughput in bars/s (end to end, and without
+the candle download as "compute"), the peak traced memory of
+one more run (tracemalloc; skipped with --no-memory) and how the time
+splits between phases (see app.profiling).
+
+Every run is appended to --out as one JSON line with the git commit and
+library versions, and compared with the latest stored run of another
+commit: changes beyond --threshold are flagged, and --fail-on-regression
+turns a slower or bigger case into a non-zero exit.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.mapper.JsonToStratefyConfig import parse_strategy_config
+from app.profiling import collect_timings
+from app.service import backtest_service, historical_service
+from app.service.backtest_service import run_backtest_strategy
+from benchmarks.market_stub import MarketStub
+from benchmarks.synthetic import GENERATORS
+
+INTERVAL = "1m"
+DEFAULT_OUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "bench_backtest.jsonl")
+
+# (type, windows); các indicator dao động quanh hằng số được so với CONST
+_TRENDS = (("SMA", (5, 10, 20, 50, 100, 200)), ("EMA", (5, 12, 26, 50, 100)), ("BBANDS", (20, 50)))
+_OSCILLATORS = (("RSI", (7, 14, 21), (30.0, 50.0, 70.0)), ("MOM", (5, 10, 20), (0.0,)),
+                ("ROC", (5, 10, 20), (0.0,)), ("MACD", (9,), (0.0,)))
+_OPS = ("Above", "Below", "AboveOrEqual", "BelowOrEqual", "CrossesUp", "CrossesDown")
+
+
+def _side(type_: str, window: int = 0, const=None) -> dict:
+    return {"type": type_, "window": window, "const": const}
+
+
+def _rule(rng: np.random.Generator) -> dict:
+    op = _OPS[rng.integers(len(_OPS))]
+    if rng.random() < 0.5:
+        (left, lw), (right, rw) = (_TRENDS[i] for i in rng.integers(len(_TRENDS), size=2))
+        return {"left": _side(left, int(rng.choice(lw))), "op": op, "right": _side(right, int(rng.choice(rw)))}
+    kind, windows, consts = _OSCILLATORS[rng.integers(len(_OSCILLATORS))]
+    return {"left": _side(kind, int(rng.choice(windows))), "op": op,
+            "right": _side("CONST", const=float(rng.choice(consts)))}
+
+
+def _expression(ids: List[str], rng: np.random.Generator) -> str:
+    """Every id once, in a random tree of &, | and ! of depth ~log2(len(ids))."""
+    if len(ids) == 1:
+        return f"!{ids[0]}" if rng.random() < 0.3 else ids[0]
+    cut = int(rng.integers(1, len(ids)))
+    op = " & " if rng.random() < 0.6 else " | "
+    expr = f"{_expression(ids[:cut], rng)}{op}{_expression(ids[cut:], rng)}"
+    return f"!({expr})" if rng.random() < 0.2 else f"({expr})"
+
+
+def strategy_shape(rules: int, seed: int = 11) -> dict:
+    """Rules, buy and sell condition of a deterministic strategy with `rules` rules."""
+    rng = np.random.default_rng(seed + rules)
+    ids = [f"s{i}" for i in range(rules)]
+    if rules == 1:
+        return {"rules": [_rule(rng)], "buyCondition": "s0", "sellCondition": "!s0"}
+    return {
+        "rules": [_rule(rng) for _ in ids],
+        "buyCondition": _expression(ids, rng),
+        "sellCondition": _expression([ids[i] for i in rng.permutation(rules)], rng),
+    }
+
+
+def _config(symbol: str, data: pd.DataFrame, rules: int, engine: str):
+    # datetime_to_millis đọc giờ không múi giờ là giờ địa phương
+    start, end = (datetime.fromtimestamp(t.value / 1e9) for t in (data.index[0], data.index[-1]))
+    return parse_strategy_config({
+        "symbol": symbol, "interval": INTERVAL, "lots": 10000, "slPct": 0.02, "tpPct": 0.03,
+        "startTime": start.isoformat(), "endTime": end.isoformat(), "engine": engine,
+        **strategy_shape(rules),
+    })
+
+
+def _phases(timings: dict) -> Dict[str, float]:
+    phases: Dict[str, float] = {}
+    for name, span in timings["spans"].items():
+        phase = name.split(":", 1)[0]
+        phases[phase] = phases.get(phase, 0.0) + span["ms"]
+    return {k: round(v, 3) for k, v in sorted(phases.items())}
+
+
+def run_case(cfg, bars: int, repeat: int, memory: bool) -> dict:
+    best, best_timings, result = float("inf"), None, None
+    for _ in range(repeat):
+        with collect_timings() as timings:
+            t0 = time.perf_counter()
+            result = run_backtest_strategy(cfg)
+            elapsed = time.perf_counter() - t0
+        if elapsed < best:
+            best, best_timings = elapsed, timings.to_dict()
+    if len(result["trades"]) == 0:
+        warnings.warn(f"{cfg.symbol} {len(cfg.rules)} rules made no trades")
+    phases = _phases(best_timings)
+    # Không tính thời gian tải nến: phần của chính backtest-service
+    compute = max(best - phases.get("fetch", 0.0) / 1e3, 1e-9)
+    case = {
+        "seconds": round(best, 6),
+        "bars_per_sec": round(bars / best, 1),
+        "compute_bars_per_sec": round(bars / compute, 1),
+        "trades": len(result["trades"]),
+        "phases_ms": phases,
+        "fetch_pages": best_timings["counters"].get("fetch_pages", 0),
+    }
+    if memory:
+        tracemalloc.start()
+        try:
+            run_backtest_strategy(cfg)
+            case["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+        finally:
+            tracemalloc.stop()
+    return case
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _case_key(case: dict) -> str:
+    return f"{case['generator']}/{case['bars']}/{case['rules']}/{case['engine']}"
+
+
+def _baseline(path: str, commit: Optional[str]) -> Optional[dict]:
+    """Latest stored run of another commit, else the latest run."""
+    try:
+        with open(path) as f:
+            runs = [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        return None
+    other = [r for r in runs if r.get("commit") != commit]
+    return (other or runs or [None])[-1]
+
+
+def compare(run: dict, baseline: dict, threshold: float) -> List[str]:
+    """Prints the change of every case against baseline; returns the regressions."""
+    before = {_case_key(c): c for c in baseline["cases"]}
+    regressions = []
+    print(f"\nagainst {baseline.get('commit')} ({baseline.get('timestamp')}):")
+    for case in run["cases"]:
+        old = before.get(_case_key(case))
+        if old is None:
+            continue
+        speed = case["bars_per_sec"] / old["bars_per_sec"] - 1
+        notes = [f"bars/s {speed:+.1%}"]
+        slower = speed < -threshold
+        if "compute_bars_per_sec" in old:
+            compute = case["compute_bars_per_sec"] / old["compute_bars_per_sec"] - 1
+            notes.append(f"compute {compute:+.1%}")
+            slower |= compute < -threshold
+        bigger = False
+        if "peak_mb" in case and old.get("peak_mb"):
+            growth = case["peak_mb"] / old["peak_mb"] - 1
+            bigger = growth > threshold
+            notes.append(f"peak {growth:+.1%}")
+        flag = "  REGRESSION" if slower or bigger else ""
+        print(f"  {_case_key(case):<32}{', '.join(notes)}{flag}")
+        if flag:
+            regressions.append(_case_key(case))
+    return regressions
+
+
+def run(args) -> dict:
+    # Mọi lần chạy đều "lạnh": không cache kết quả, checkpoint hay nến trên đĩa
+    backtest_service.result_cache = None
+    backtest_service.checkpoints = None
+    historical_service.candle_store = None
+
+    cases = []
+    print(f"{'generator':<10}{'bars':>10}{'rules':>6}{'engine':>12}{'trades':>8}{'ms':>10}{'bars/s':>12}"
+          f"{'compute':>12}{'peak MB':>9}  phases (ms)")
+    with MarketStub() as stub:
+        for name in args.generators:
+            for bars in args.sizes:
+                data = GENERATORS[name](bars, seed=args.seed, interval=INTERVAL)
+                if data.index[-1] >= pd.Timestamp.now("UTC").tz_localize(None):
+                    raise SystemExit(f"{bars} {INTERVAL} bars from {data.index[0]} run past now")
+                symbol = f"{name.upper()}{bars}"
+                stub.add(symbol, INTERVAL, data)
+                for rules in args.rules:
+                    for engine in args.engines:
+                        case = run_case(_config(symbol, data, rules, engine), bars, args.repeat, not args.no_memory)
+                        case = {"generator": name, "bars": bars, "rules": rules, "engine": engine, **case}
+                        cases.append(case)
+                        phases = " ".join(f"{k}={v:.0f}" for k, v in case["phases_ms"].items())
+                        print(f"{name:<10}{bars:>10}{rules:>6}{engine:>12}{case['trades']:>8}"
+                              f"{case['seconds'] * 1e3:>10.1f}{case['bars_per_sec']:>12,.0f}{case['compute_bars_per_sec']:>12,.0f}"
+                              f"{case.get('peak_mb', float('nan')):>9.1f}  {phases}")
+                del data
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": f"{platform.system()} {platform.machine()} x{os.cpu_count()}",
+        "repeat": args.repeat,
+        "seed": args.seed,
+        # ru_maxrss: KB trên Linux
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "cases": cases,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--rules", type=int, nargs="+", default=[1, 2, 5, 10, 20])
+    parser.add_argument("--generators", nargs="+", choices=sorted(GENERATORS), default=sorted(GENERATORS))
+    parser.add_argument("--engines", nargs="+", choices=["fast", "backtesting"], default=["fast"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="JSON lines file the run is appended to ('' = none)")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative change flagged as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", module="backtesting")
+
+    result = run(args)
+    regressions = []
+    if args.out:
+        baseline = _baseline(args.out, result["commit"])
+        if baseline is not None:
+            regressions = compare(result, baseline, args.threshold)
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "a") as f:
+            f.write(json.dumps(result, separators=(",", ":")) + "\n")
+        print(f"\nstored in {args.out}")
+    if regressions and args.fail_on_regression:
+        raise SystemExit(f"{len(regressions)} regressed: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark of engine="fast" against backtesting.py's FractionalBacktest.
+
+Run from backend/backtest-service:
+
+    python -m benchmarks.bench_engines [--sizes 5000 50000] [--repeat 3]
+
+Every fixture strategy runs on synthetic candles with both engines and the
+script prints the best-of-N time of each. tests/test_engine_parity.py
+checks that the two report the same trades and stats on these fixtures.
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from app.mapper.JsonToStratefyConfig import parse_strategy_config
+from app.service.backtest_service import simulate
+
+
+def _side(type_: str, window: int = 0, const=None) -> dict:
+    return {"type": type_, "window": window, "const": const}
+
+
+FIXTURES = {
+    "sma_cross": (
+        [{"left": _side("SMA", 10), "op": "CrossesUp", "right": _side("SMA", 30)},
+         {"left": _side("SMA", 10), "op": "CrossesDown", "right": _side("SMA", 30)}],
+        "s0", "s1"),
+    "rsi_ema": (
+        [{"left": _side("RSI", 14), "op": "Below", "right": _side("CONST", const=30.0)},
+         {"left": _side("RSI", 14), "op": "Above", "right": _side("CONST", const=70.0)},
+         {"left": _side("EMA", 20), "op": "AboveOrEqual", "right": _side("SMA", 50)}],
+        "s0 & !s1 | (s2 & s0)", "s1 & !s2"),
+    "roc_mom_bbands": (
+        [{"left": _side("ROC", 5), "op": "CrossesUp", "right": _side("CONST", const=0.0)},
+         {"left": _side("MOM", 9), "op": "BelowOrEqual", "right": _side("CONST", const=0.0)},
+         {"left": _side("BBANDS", 20), "op": "Above", "right": _side("EMA", 5)}],
+        "!(s1 | s2) & s0", "s1 & (s2 | !s0)"),
+    "rsi_fast": (
+        [{"left": _side("RSI", 3), "op": "Above", "right": _side("CONST", const=50.0)},
+         {"left": _side("RSI", 3), "op": "Below", "right": _side("CONST", const=50.0)}],
+        "s0", "s1"),
+    "macd": (
+        [{"left": _side("MACD", 9), "op": "CrossesUp", "right": _side("CONST", const=0.0)},
+         {"left": _side("MACD", 9), "op": "CrossesDown", "right": _side("CONST", const=0.0)}],
+        "s0", "s1"),
+}
+
+
+def fixture_candles(n: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 30000.0 * np.exp(np.cumsum(rng.normal(0.0, 0.004, n)))
+    open_ = np.r_[close[0], close[:-1]] * (1 + rng.normal(0.0, 0.001, n))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0.0, 0.003, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0.0, 0.003, n))
+    index = pd.date_range("2023-01-01", periods=n, freq="5min", name="Open Time")
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close,
+                         "Volume": rng.uniform(1.0, 10.0, n)}, index=index)
+
+
+def fixture_config(rules, buy: str, sell: str, engine: str):
+    return parse_strategy_config({
+        "symbol": "BTCUSDT", "interval": "5m", "lots": 10000, "slPct": 0.02, "tpPct": 0.03,
+        "rules": rules, "buyCondition": buy, "sellCondition": sell, "engine": engine,
+    })
+
+
+def _timed(cfg, data, repeat: int):
+    best, stats = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        stats = simulate(cfg, data)
+        best = min(best, time.perf_counter() - t0)
+    return best, stats
+
+
+def run(sizes, repeat: int):
+    print(f"{'strategy':<16}{'bars':>10}{'trades':>8}{'backtesting ms':>16}{'fast ms':>10}{'speedup':>10}")
+    for n in sizes:
+        data = fixture_candles(n)
+        for name, (rules, buy, sell) in FIXTURES.items():
+            t_bt, stats = _timed(fixture_config(rules, buy, sell, "backtesting"), data, repeat)
+            t_fast, _ = _timed(fixture_config(rules, buy, sell, "fast"), data, repeat)
+            print(f"{name:<16}{n:>10}{stats['# Trades']:>8}{t_bt * 1e3:>16.1f}{t_fast * 1e3:>10.1f}"
+                  f"{t_bt / t_fast:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5_000, 50_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", module="backtesting")
+    run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark of app.domain.indicator.numpy_ta against pandas_ta.
+
+Run from backend/backtest-service:
+
+    python -m benchmarks.bench_indicators [--sizes 10000 100000 1000000] [--bank]
+
+For every indicator and size it prints the best-of-N time of both
+implementations. --bank times IndicatorBank over BANK_WINDOWS instead,
+against computing each window on its own. Equivalence of the outputs is
+checked by tests/test_numpy_ta.py.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.domain.indicator import numpy_ta
+from app.domain.indicator.IndicatorBank import IndicatorBank
+from app.factory.IndicatorFactory import IndicatorFactory
+
+WINDOW = 20
+BANK_WINDOWS = range(5, 201)
+
+
+def _close(n: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 30000.0 * np.exp(np.cumsum(rng.normal(0.0, 0.002, n)))
+
+
+def _pandas_ta_cases(ta, close: pd.Series):
+    return {
+        "sma": lambda: ta.sma(close, length=WINDOW),
+        "ema": lambda: ta.ema(close, length=WINDOW),
+        "rsi": lambda: ta.rsi(close, length=WINDOW),
+        "mom": lambda: ta.mom(close, length=WINDOW),
+        "roc": lambda: ta.roc(close, length=WINDOW),
+        "bbands": lambda: ta.bbands(close, length=WINDOW),
+        "macd": lambda: ta.macd(close),
+    }
+
+
+def _numpy_cases(close: np.ndarray):
+    return {
+        "sma": lambda: numpy_ta.sma(close, WINDOW),
+        "ema": lambda: numpy_ta.ema(close, WINDOW),
+        "rsi": lambda: numpy_ta.rsi(close, WINDOW),
+        "mom": lambda: numpy_ta.mom(close, WINDOW),
+        "roc": lambda: numpy_ta.roc(close, WINDOW),
+        "bbands": lambda: numpy_ta.bbands(close, WINDOW),
+        "macd": lambda: numpy_ta.macd(close),
+    }
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(sizes, repeat: int):
+    import pandas_ta as ta
+
+    print(f"{'indicator':<10}{'bars':>10}{'pandas_ta ms':>15}{'numpy ms':>12}{'speedup':>10}")
+    for n in sizes:
+        close = _close(n)
+        ta_cases = _pandas_ta_cases(ta, pd.Series(close))
+        np_cases = _numpy_cases(close)
+        for name, ta_fn in ta_cases.items():
+            t_ta = _best_of(ta_fn, repeat)
+            t_np = _best_of(np_cases[name], repeat)
+            print(f"{name:<10}{n:>10}{t_ta * 1e3:>15.2f}{t_np * 1e3:>12.2f}{t_ta / t_np:>9.1f}x")
+
+
+def run_banks(sizes, repeat: int):
+    windows = list(BANK_WINDOWS)
+    print(f"{'indicator':<10}{'bars':>10}{'windows':>9}{'per-window ms':>15}{'bank ms':>10}{'speedup':>10}")
+    for n in sizes:
+        close = _close(n)
+        for name in ("SMA", "EMA", "RSI", "MOM", "ROC", "BBANDS", "MACD"):
+            fns = [IndicatorFactory.create(name, w).bt_callable()[0] for w in windows]
+            t_loop = _best_of(lambda: [fn(close) for fn in fns], repeat)
+            t_bank = _best_of(lambda: IndicatorBank.compute(name, windows, close), repeat)
+            print(f"{name:<10}{n:>10}{len(windows):>9}{t_loop * 1e3:>15.2f}{t_bank * 1e3:>10.2f}"
+                  f"{t_loop / t_bank:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--bank", action="store_true", help="benchmark IndicatorBank instead of pandas_ta")
+    args = parser.parse_args()
+    if args.bank:
+        run_banks(args.sizes, args.repeat)
+    else:
+        run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Local stand-in for market-service's GET /market/history, serving candles
+registered with add() over real HTTP so a benchmark goes through the same
+paging, download pool and JSON parsing as production.
+
+    with MarketStub() as stub:
+        stub.add("BTCUSDT", "1m", candles)
+        ...  # historical_service now fetches from the stub
+"""
+import json
+import multiprocessing
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing.connection import Connection
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from app.service import historical_service
+from app.service.historical_service import interval_to_millis
+
+
+class _Series:
+    def __init__(self, symbol: str, interval: str, open_ms: np.ndarray, columns: Dict[str, np.ndarray]):
+        self.symbol = symbol
+        self.interval = interval
+        self.interval_ms = interval_to_millis(interval)
+        self.open_ms = open_ms
+        self.columns = columns
+
+    def page(self, start_ms: int, end_ms: int, limit: int) -> list:
+        lo = int(np.searchsorted(self.open_ms, start_ms, side="left"))
+        hi = min(int(np.searchsorted(self.open_ms, end_ms, side="right")), lo + limit)
+        now_ms = int(time.time() * 1000)
+        # Từng trang chỉ tối đa `limit` dòng nên tạo dict theo trang là đủ nhanh
+        o, h, l, c, v = (self.columns[k][lo:hi].tolist() for k in ("Open", "High", "Low", "Close", "Volume"))
+        return [
+            {"symbol": self.symbol, "interval": self.interval, "openTime": t, "open": o[i], "high": h[i],
+             "low": l[i], "close": c[i], "volume": v[i], "closed": t + self.interval_ms <= now_ms}
+            for i, t in enumerate(self.open_ms[lo:hi].tolist())
+        ]
+
+
+def _handler(series: Dict[Tuple[str, str], _Series]):
+    class Handler(BaseHTTPRequestHandler):
+        # Giữ kết nối như market-service thật (session keep-alive)
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/market/history":
+                self.send_error(404)
+                return
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+            found = series.get((q.get("symbol", "").upper(), q.get("interval", "")))
+            rows = found.page(int(q["startTime"]), int(q["endTime"]), int(q.get("limit", 1000))) if found else []
+            body = json.dumps(rows).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        # Mọi process stub nghe cùng một cổng; kernel chia kết nối giữa chúng
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+
+def _serve(conn: Connection, port: int) -> None:
+    """Server process: answers HTTP on a thread, takes new series from conn until it gets None."""
+    series: Dict[Tuple[str, str], _Series] = {}
+    server = _Server(("127.0.0.1", port), _handler(series))
+    threading.Thread(target=server.serve_forever, name="market-stub", daemon=True).start()
+    conn.send(True)
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        symbol, interval, open_ms, columns = msg
+        series[(symbol, interval)] = _Series(symbol, interval, open_ms, columns)
+        conn.send(True)
+    server.shutdown()
+    server.server_close()
+
+
+class MarketStub:
+    """
+    HTTP server on 127.0.0.1, run by `processes` processes sharing one port
+    (SO_REUSEPORT, Linux) so encoding pages neither competes with the
+    benchmarked code for the GIL nor serializes the concurrent page
+    downloads. Points historical_service at itself while open.
+    """
+
+    def __init__(self, processes: int = historical_service.FETCH_WORKERS):
+        self.processes = max(1, processes)
+        self._workers: List[Tuple[multiprocessing.Process, Connection]] = []
+        self._port = None
+        self._previous_url = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._port}/market/history"
+
+    def _broadcast(self, msg) -> None:
+        for _, conn in self._workers:
+            conn.send(msg)
+        for _, conn in self._workers:
+            conn.recv()
+
+    def add(self, symbol: str, interval: str, data: pd.DataFrame) -> None:
+        open_ms = data.index.values.astype("datetime64[ms]").astype(np.int64)
+        columns = {c: data[c].to_numpy(dtype=np.float64) for c in ("Open", "High", "Low", "Close", "Volume")}
+        self._broadcast((symbol.upper(), interval, open_ms, columns))
+
+    def __enter__(self) -> "MarketStub":
+        # Giữ cổng trống cho tới khi các process đã bind
+        probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        probe.bind(("127.0.0.1", 0))
+        self._port = probe.getsockname()[1]
+        try:
+            ctx = multiprocessing.get_context("spawn")
+            for i in range(self.processes):
+                conn, child = ctx.Pipe()
+                process = ctx.Process(target=_serve, args=(child, self._port), name=f"market-stub-{i}", daemon=True)
+                process.start()
+                self._workers.append((process, conn))
+            for _, conn in self._workers:
+                conn.recv()
+        finally:
+            probe.close()
+        self._previous_url = historical_service.MARKET_HISTORY_URL
+        historical_service.MARKET_HISTORY_URL = self.url
+        return self
+
+    def __exit__(self, *exc) -> None:
+        historical_service.MARKET_HISTORY_URL = self._previous_url
+        for process, conn in self._workers:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        for process, _ in self._workers:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self._workers = []
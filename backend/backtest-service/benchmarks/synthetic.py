@@ -0,0 +1,58 @@
+"""
+Deterministic synthetic candles for the benchmarks.
+
+gbm() is a geometric Brownian motion; regime_switching() switches between
+calm/trending/volatile (drift, volatility) regimes with a Markov chain, so
+strategies see trends and ranges of different lengths. Drifts are of the
+log price and cancel out on average, so even 5M bars stay far from zero
+and overflow. The same (n, seed) always gives the same candles.
+"""
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.service.historical_service import interval_to_millis
+
+START = "2015-01-01"
+# (drift, volatility) of the log price per bar: range, uptrend, volatile downtrend
+REGIMES: Sequence[Tuple[float, float]] = ((0.0, 0.0008), (0.00005, 0.0015), (-0.00005, 0.003))
+
+
+def _frame(log_returns: np.ndarray, vol: np.ndarray, rng: np.random.Generator, interval: str,
+           start: str, price: float) -> pd.DataFrame:
+    n = len(log_returns)
+    close = price * np.exp(np.cumsum(log_returns))
+    open_ = np.r_[price, close[:-1]]
+    # Râu nến tỉ lệ với độ biến động của chính nến đó
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0.0, 1.0, n)) * vol * 0.5)
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0.0, 1.0, n)) * vol * 0.5)
+    volume = rng.lognormal(2.0, 0.5, n) * (1.0 + np.abs(log_returns) / np.maximum(vol, 1e-12))
+    index = pd.date_range(start, periods=n, freq=pd.Timedelta(milliseconds=interval_to_millis(interval)),
+                          name="Open Time")
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index)
+
+
+def gbm(n: int, seed: int = 7, drift: float = 0.0, volatility: float = 0.001, interval: str = "1m",
+        start: str = START, price: float = 30000.0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    log_returns = drift + volatility * rng.standard_normal(n)
+    return _frame(log_returns, np.full(n, volatility), rng, interval, start, price)
+
+
+def regime_switching(n: int, seed: int = 7, regimes: Sequence[Tuple[float, float]] = REGIMES,
+                     switch_prob: float = 0.001, interval: str = "1m", start: str = START,
+                     price: float = 30000.0) -> pd.DataFrame:
+    """Each bar leaves its regime with switch_prob, for one of the other regimes picked uniformly."""
+    rng = np.random.default_rng(seed)
+    k = len(regimes)
+    switches = rng.random(n) < switch_prob
+    switches[0] = False
+    step = np.where(switches, rng.integers(1, max(k, 2), n), 0)
+    state = np.cumsum(step) % k
+    drift, volatility = (np.asarray([r[i] for r in regimes])[state] for i in range(2))
+    log_returns = drift + volatility * rng.standard_normal(n)
+    return _frame(log_returns, volatility, rng, interval, start, price)
+
+
+GENERATORS = {"gbm": gbm, "regime": regime_switching}
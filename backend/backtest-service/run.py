@@ -2,8 +2,9 @@
 import os
 from app import create_app
 
-app = create_app()
-
 if __name__ == "__main__":
+    # Tạo app trong guard: worker process (spawn) import lại module này và
+    # không được dựng thêm một app/thread warmup
+    app = create_app()
     port = int(os.getenv("PORT", "5005"))
     app.run(host="0.0.0.0", port=port, debug=False)  # <- quan trọng: 0.0.0.0
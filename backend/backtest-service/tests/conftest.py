@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Chạy được cả khi pytest được gọi từ ngoài thư mục service
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_configure(config):
+    # backtesting.py cảnh báo về lệnh còn mở/không đủ tiền trên dữ liệu ngẫu nhiên
+    config.addinivalue_line("filterwarnings", "ignore::UserWarning:backtesting")
@@ -0,0 +1,41 @@
+import re
+
+import pytest
+
+from app import create_app
+from app.profiling import render_metrics
+from app.service import backtest_service
+from benchmarks.bench_engines import fixture_candles
+
+CONFIG = {
+    "symbol": "BTCUSDT", "interval": "5m", "lots": 10000, "slPct": 0.02, "tpPct": 0.03,
+    "startTime": "2023-01-01T00:00:00", "endTime": "2023-01-08T00:00:00",
+    "rules": [{"left": {"type": "SMA", "window": 10}, "op": "CrossesUp", "right": {"type": "SMA", "window": 30}}],
+    "buyCondition": "s0", "sellCondition": "!s0", "engine": "fast",
+}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    data = fixture_candles(2000)
+    monkeypatch.setattr(backtest_service, "result_cache", None)
+    monkeypatch.setattr(backtest_service, "checkpoints", None)
+    monkeypatch.setattr(backtest_service, "fetch_all_ohlcv", lambda *args, **kwargs: data)
+    return create_app().test_client()
+
+
+def _phase_count(phase: str) -> int:
+    found = re.search(rf'backtest_phase_seconds_count{{phase="{phase}"}} (\d+)', render_metrics())
+    return int(found.group(1)) if found else 0
+
+
+@pytest.mark.parametrize("fmt", ["rows", "columnar"])
+def test_serialize_span_times_the_json_encoding(client, fmt):
+    before = _phase_count("serialize")
+    res = client.post(f"/backtest?timings=true&format={fmt}", json=CONFIG)
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["stats"]["trades_count"] > 0
+    # Span "serialize" bao quanh jsonify, sau khi khối timings đã chốt
+    assert "simulate" in body["timings"]["spans"] and "serialize" not in body["timings"]["spans"]
+    assert _phase_count("serialize") == before + 1
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from app.dto.response.BacktestResultDTO import BacktestResultDTO
+from app.mapper.JsonToStratefyConfig import parse_strategy_config
+from app.service.backtest_service import backtest_result, simulate
+from benchmarks.bench_engines import fixture_candles
+
+RULES = [
+    {"left": {"type": "EMA", "window": 8}, "op": "CrossesUp", "right": {"type": "EMA", "window": 21}},
+    {"left": {"type": "RSI", "window": 14}, "op": "Above", "right": {"type": "CONST", "const": 70}},
+]
+
+
+def _dump(obj) -> str:
+    # Tag là NaN nên so sánh qua JSON thay vì ==
+    return json.dumps(obj, sort_keys=True, default=str)
+
+
+@pytest.fixture(scope="module")
+def result() -> BacktestResultDTO:
+    cfg = parse_strategy_config({
+        "symbol": "BTCUSDT", "interval": "5m", "lots": 10000, "slPct": 0.02, "tpPct": 0.03, "rules": RULES,
+        "buyCondition": "s0", "sellCondition": "s1", "engine": "fast",
+    })
+    res = backtest_result(simulate(cfg, fixture_candles(3000)), equity_points=200)
+    assert res.trade_count() > 10
+    return res
+
+
+def test_columnar_round_trips_to_rows(result):
+    columnar = json.loads(_dump(result.to_columnar_dict()))
+    assert columnar["format"] == "columnar"
+    back = BacktestResultDTO.from_columnar_dict(columnar)
+    assert _dump(back.to_dict()) == _dump(result.to_dict())
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 1000])
+def test_ndjson_matches_rows(result, chunk):
+    lines = "".join(result.iter_ndjson(chunk=chunk)).splitlines()
+    header = json.loads(lines[0])
+    rows = result.to_dict()
+    assert header["tradeCount"] == len(rows["trades"]) == len(lines) - 1
+    assert _dump(header["stats"]) == _dump(rows["stats"])
+    assert _dump(header["equity"]) == _dump(rows["equity"])
+    assert _dump([json.loads(line) for line in lines[1:]]) == _dump(rows["trades"])
+
+
+def test_empty_result_in_every_format(result):
+    empty = BacktestResultDTO(trades={k: [] for k in result.trades}, stats=result.stats)
+    assert empty.to_dict()["trades"] == []
+    assert BacktestResultDTO.from_columnar_dict(empty.to_columnar_dict()).to_dict() == empty.to_dict()
+    lines = list(empty.iter_ndjson())
+    assert len(lines) == 1 and json.loads(lines[0])["tradeCount"] == 0
@@ -0,0 +1,68 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from app.mapper.JsonToStratefyConfig import parse_strategy_config
+from app.service import backtest_service, batch_service
+from app.service.backtest_service import DEFAULT_EQUITY_POINTS, backtest_on
+from app.service.batch_service import run_batch
+from benchmarks.bench_engines import fixture_candles
+
+SMA_CROSS = {"left": {"type": "SMA", "window": 10}, "op": "CrossesUp", "right": {"type": "SMA", "window": 30}}
+RSI_LOW = {"left": {"type": "RSI", "window": 14}, "op": "Below", "right": {"type": "CONST", "const": 40}}
+EMA_UP = {"left": {"type": "EMA", "window": 10}, "op": "Above", "right": {"type": "SMA", "window": 30}}
+END = datetime(2023, 1, 8)
+CANDLES = {"BTCUSDT": fixture_candles(2000, seed=7), "ETHUSDT": fixture_candles(2000, seed=11)}
+
+
+def _config(symbol, rules, buy, sell, engine="fast"):
+    return parse_strategy_config({
+        "symbol": symbol, "interval": "5m", "lots": 10000, "slPct": 0.02, "tpPct": 0.03,
+        "startTime": "2023-01-01T00:00:00", "endTime": "2023-01-08T00:00:00", "rules": rules,
+        "buyCondition": buy, "sellCondition": sell, "engine": engine,
+    })
+
+
+def _dump(obj) -> str:
+    # NaN (vd. Tag) không bằng chính nó trong dict
+    return json.dumps(obj, sort_keys=True, default=str)
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    monkeypatch.setattr(backtest_service, "result_cache", None)
+    monkeypatch.setattr(backtest_service, "checkpoints", None)
+    calls = []
+
+    def fetch(symbol, interval, start, end):
+        calls.append((symbol, interval, start, end))
+        return CANDLES[symbol]
+
+    monkeypatch.setattr(batch_service, "fetch_all_ohlcv", fetch)
+    return calls
+
+
+@pytest.mark.parametrize("fmt", ["rows", "columnar"])
+def test_batch_matches_individual_runs(fetches, fmt):
+    configs = [
+        _config("BTCUSDT", [SMA_CROSS, RSI_LOW], "s0 | s1", "!s0 & !s1"),
+        _config("ETHUSDT", [SMA_CROSS, EMA_UP], "s0 & s1", "!s1"),
+        _config("BTCUSDT", [EMA_UP, SMA_CROSS], "s0", "!s0", engine="backtesting"),
+        _config("BTCUSDT", [RSI_LOW], "s0", "!s0"),
+    ]
+    out = run_batch(configs, fmt=fmt)
+    # Mỗi (symbol, interval, khoảng thời gian) chỉ tải nến một lần
+    assert out["groups"] == 2 and len(fetches) == 2
+    for cfg, got in zip(configs, out["results"]):
+        res = backtest_on(cfg, CANDLES[cfg.symbol], END, DEFAULT_EQUITY_POINTS)
+        assert _dump(got) == _dump(res.to_columnar_dict() if fmt == "columnar" else res.to_dict())
+
+
+def test_one_bad_config_does_not_stop_the_batch(fetches):
+    good = _config("BTCUSDT", [SMA_CROSS], "s0", "!s0")
+    bad = _config("BTCUSDT", [SMA_CROSS], "s0 &", "!s0")
+    out = run_batch([bad, good])
+    assert "error" in out["results"][0]
+    alone = backtest_on(good, CANDLES["BTCUSDT"], END, DEFAULT_EQUITY_POINTS)
+    assert _dump(out["results"][1]) == _dump(alone.to_dict())
@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.mapper.JsonToStratefyConfig import parse_strategy_config
+from app.service import historical_service
+from app.service.backtest_service import backtest_result, simulate
+from app.service.shared_candles import MappedCandles, SharedCandles, attach
+from benchmarks.bench_engines import fixture_candles
+
+RULES = [
+    {"left": {"type": "SMA", "window": 10}, "op": "CrossesUp", "right": {"type": "SMA", "window": 30}},
+    {"left": {"type": "RSI", "window": 14}, "op": "Above", "right": {"type": "CONST", "const": 65}},
+    {"left": {"type": "BBANDS", "window": 20}, "op": "Below", "right": {"type": "EMA", "window": 5}},
+]
+# Nến float32 làm tròn sẵn: cùng giá trị ở cả hai kiểu
+DATA32 = fixture_candles(3000).astype(np.float32)
+DATA64 = DATA32.astype(np.float64)
+
+
+def _config(engine):
+    return parse_strategy_config({
+        "symbol": "BTCUSDT", "interval": "5m", "lots": 10000, "slPct": 0.02, "tpPct": 0.03, "rules": RULES,
+        "buyCondition": "s0 | s2", "sellCondition": "s1", "engine": engine,
+    })
+
+
+def _run(engine, data) -> str:
+    # NaN (vd. Tag) không bằng chính nó trong dict
+    return json.dumps(backtest_result(simulate(_config(engine), data)).to_dict(), sort_keys=True, default=str)
+
+
+@pytest.mark.parametrize("engine", ["fast", "backtesting"])
+def test_float32_frame_gives_float64_stats(engine):
+    assert _run(engine, DATA32) == _run(engine, DATA64)
+
+
+@pytest.mark.parametrize("kind", ["shared", "mapped"])
+@pytest.mark.parametrize("data", [DATA32, DATA64], ids=["float32", "float64"])
+def test_shared_candles_round_trip(tmp_path, kind, data):
+    block = SharedCandles(data) if kind == "shared" else MappedCandles(data, str(tmp_path))
+    with block:
+        handle, frame = attach(block.spec)
+        assert (frame.dtypes == data.dtypes).all()
+        assert frame.index.equals(data.index)
+        np.testing.assert_array_equal(frame.to_numpy(), data.to_numpy())
+        assert _run("fast", frame) == _run("fast", DATA64)
+        if kind == "mapped":
+            assert not frame["Close"].to_numpy().flags.writeable
+        del frame
+        if kind == "shared":
+            handle.close()
+
+
+def test_mapped_file_is_removed_on_close(tmp_path):
+    block = MappedCandles(DATA32, str(tmp_path))
+    handle, frame = attach(block.spec)
+    block.close()
+    assert list(tmp_path.iterdir()) == []
+    # Mapping đã mở vẫn đọc được sau khi file bị xoá
+    np.testing.assert_array_equal(frame["Close"].to_numpy(), DATA32["Close"].to_numpy())
+
+
+def test_fetch_in_both_dtypes(monkeypatch):
+    hour = historical_service.interval_to_millis("1h")
+    prices = DATA64["Close"].to_numpy()[:500]
+
+    def get_page(symbol, interval, start_ms, end_ms):
+        lo, hi = -(-start_ms // hour), min(end_ms // hour + 1, len(prices))
+        return [{"openTime": i * hour, "open": p, "high": p * 1.01, "low": p * 0.99, "close": p, "volume": 1.0}
+                for i, p in zip(range(lo, hi), prices[lo:hi])]
+
+    monkeypatch.setattr(historical_service, "_get_page", get_page)
+    monkeypatch.setattr(historical_service, "candle_store", None)
+    end = "1970-01-21T19:00:00"
+    f64 = historical_service.fetch_all_ohlcv("BTCUSDT", "1h", "1970-01-01T00:00:00", end, dtype="float64")
+    f32 = historical_service.fetch_all_ohlcv("BTCUSDT", "1h", "1970-01-01T00:00:00", end, dtype="float32")
+    assert (f64.dtypes == np.float64).all() and (f32.dtypes == np.float32).all()
+    assert len(f64) == len(f32) == 500
+    np.testing.assert_array_equal(f64["Close"].to_numpy(), prices)
+    np.testing.assert_array_equal(f32.to_numpy(), f64.to_numpy().astype(np.float32))
+    with pytest.raises(ValueError):
+        historical_service.fetch_all_ohlcv("BTCUSDT", "1h", "1970-01-01T00:00:00", end, dtype="float16")
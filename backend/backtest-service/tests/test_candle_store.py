@@ -0,0 +1,55 @@
+import multiprocessing
+import os
+
+import numpy as np
+
+from app.service.candle_store import COLUMNS, DTYPES, CandleStore
+
+STEP = 60_000
+
+
+def _fetch(start_ms: int, end_ms: int):
+    t = np.arange(start_ms - start_ms % STEP + (STEP if start_ms % STEP else 0), end_ms, STEP, dtype=np.int64)
+    cols = {c: (t / STEP).astype(DTYPES[c]) for c in COLUMNS if c != "open_time"}
+    cols["open_time"] = t
+    return cols
+
+
+def test_fetches_only_missing_ranges(tmp_path):
+    store = CandleStore(str(tmp_path))
+    calls = []
+
+    def fetch(s, e):
+        calls.append((s, e))
+        return _fetch(s, e)
+
+    store.get_range("btcusdt", "1m", 100 * STEP, 200 * STEP, fetch, closed_before_ms=10_000 * STEP)
+    cols = store.get_range("BTCUSDT", "1m", 50 * STEP, 250 * STEP, fetch, closed_before_ms=10_000 * STEP)
+    assert calls == [(100 * STEP, 200 * STEP), (50 * STEP, 100 * STEP), (200 * STEP, 250 * STEP)]
+    np.testing.assert_array_equal(cols["open_time"], np.arange(50, 250) * STEP)
+    # Chỉ còn bản mới nhất, không sót file tạm
+    assert sorted(os.listdir(tmp_path / "BTCUSDT" / "1m")) == sorted(
+        [".lock", "meta.json"] + [f"{c}.2.npy" for c in COLUMNS])
+
+
+def _extend(root: str, worker: int, rounds: int):
+    store = CandleStore(root)
+    for i in range(rounds):
+        end = (worker * rounds + i + 2) * 100 * STEP
+        cols = store.get_range("BTCUSDT", "1m", 0, end, _fetch, closed_before_ms=10 ** 12)
+        assert np.array_equal(cols["open_time"], np.arange(0, end, STEP))
+
+
+def test_concurrent_processes_share_a_directory(tmp_path):
+    # Nhiều process cùng mở rộng một thư mục: không file nào bị ghi đè khi
+    # đang được đọc và meta.json luôn trỏ tới các cột đầy đủ
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_extend, args=(str(tmp_path), w, 5)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+    assert [p.exitcode for p in procs] == [0] * len(procs)
+    cols = CandleStore(str(tmp_path)).get_range("BTCUSDT", "1m", 0, 2100 * STEP, _fetch, 10 ** 12)
+    np.testing.assert_array_equal(cols["open_time"], np.arange(0, 2100 * STEP, STEP))
+    assert not [name for name in os.listdir(tmp_path / "BTCUSDT" / "1m") if name.endswith(".tmp")]
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from app.service.downsample import lttb
+
+
+def _series(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.integers(1, 5, n)).astype(np.int64)
+    y = np.cumsum(rng.normal(0, 1, n))
+    return x, y
+
+
+@pytest.mark.parametrize("n,n_out", [(10, 3), (10, 9), (100, 7), (1000, 50), (5000, 999), (1001, 1000)])
+def test_keeps_ends_and_increasing_indices(n, n_out):
+    x, y = _series(n, seed=n_out)
+    idx = lttb(x, y, n_out)
+    assert len(idx) == n_out
+    assert idx[0] == 0 and idx[-1] == n - 1
+    assert (np.diff(idx) > 0).all()
+
+
+@pytest.mark.parametrize("n,n_out", [(5, 5), (5, 6), (100, 100), (100, 10 ** 6), (2, 2), (1, 1), (2, 1000)])
+def test_returns_everything_when_n_out_covers_n(n, n_out):
+    x, y = _series(n)
+    assert lttb(x, y, n_out).tolist() == list(range(n))
+
+
+@pytest.mark.parametrize("n_out,expected", [(0, []), (1, [0]), (2, [0, 99]), (-3, [])])
+def test_fewer_than_three_points_keeps_the_ends(n_out, expected):
+    x, y = _series(100)
+    assert lttb(x, y, n_out).tolist() == expected
+
+
+def test_empty_input():
+    assert lttb(np.array([], dtype=np.int64), np.array([]), 10).tolist() == []
+
+
+def test_keeps_a_spike():
+    # Đỉnh duy nhất tạo tam giác lớn nhất trong bucket của nó
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[437] = 50.0
+    y[802] = -20.0
+    idx = lttb(x, y, 20)
+    assert 437 in idx and 802 in idx
@@ -0,0 +1,44 @@
+"""engine="fast" against backtesting.py's FractionalBacktest on the benchmark fixtures."""
+import math
+
+import pytest
+
+from app.service.backtest_service import convert_backtest_result, simulate
+from benchmarks.bench_engines import FIXTURES, fixture_candles, fixture_config
+
+BARS = 3000
+RTOL = 1e-9
+
+
+@pytest.fixture(scope="module")
+def candles():
+    return fixture_candles(BARS)
+
+
+def _same(a, b) -> bool:
+    if isinstance(a, float) and isinstance(b, float):
+        return a == b or (math.isnan(a) and math.isnan(b)) or abs(a - b) <= RTOL * max(1.0, abs(a))
+    return a == b
+
+
+def _mismatch(ref: dict, got: dict):
+    if len(ref["trades"]) != len(got["trades"]):
+        return f"{len(ref['trades'])} vs {len(got['trades'])} trades"
+    for i, (a, b) in enumerate(zip(ref["trades"], got["trades"])):
+        for key in a:
+            if not _same(a[key], b[key]):
+                return f"trade {i} {key}: {a[key]} vs {b[key]}"
+    for key in ref["stats"]:
+        if not _same(ref["stats"][key], got["stats"][key]):
+            return f"{key}: {ref['stats'][key]} vs {got['stats'][key]}"
+    return None
+
+
+@pytest.mark.parametrize("name", list(FIXTURES))
+def test_fast_engine_matches_backtesting(candles, name):
+    rules, buy, sell = FIXTURES[name]
+    ref = convert_backtest_result(simulate(fixture_config(rules, buy, sell, "backtesting"), candles))
+    got = convert_backtest_result(simulate(fixture_config(rules, buy, sell, "fast"), candles))
+    assert ref["trades"], "fixture should trade"
+    problem = _mismatch(ref, got)
+    assert problem is None, problem
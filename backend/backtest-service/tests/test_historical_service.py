@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from app.service import historical_service
+from app.service.historical_service import PAGE_LIMIT, interval_to_millis
+
+HOUR = interval_to_millis("1h")
+
+
+class _Market:
+    """_get_page over an in-memory series of 1h candles; records every request."""
+
+    def __init__(self, open_times):
+        self.open_times = np.asarray(open_times, dtype=np.int64)
+        self.calls = []
+
+    def get_page(self, symbol, interval, start_ms, end_ms):
+        self.calls.append((start_ms, end_ms))
+        lo = int(np.searchsorted(self.open_times, start_ms, side="left"))
+        hi = min(int(np.searchsorted(self.open_times, end_ms, side="right")), lo + PAGE_LIMIT)
+        return [{"openTime": int(t), "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 10.0}
+                for t in self.open_times[lo:hi]]
+
+
+@pytest.fixture
+def market(monkeypatch):
+    def install(open_times):
+        m = _Market(open_times)
+        monkeypatch.setattr(historical_service, "_get_page", m.get_page)
+        return m
+    return install
+
+
+@pytest.mark.parametrize("pages", [1, 5])
+def test_full_pages_take_one_request_each(market, pages):
+    m = market(np.arange(pages * PAGE_LIMIT) * HOUR)
+    open_time, _ = historical_service._fetch_block("BTCUSDT", "1h", 0, pages * PAGE_LIMIT * HOUR, np.dtype("f8"))
+    assert len(m.calls) == pages
+    np.testing.assert_array_equal(open_time, np.arange(pages * PAGE_LIMIT) * HOUR)
+
+
+def test_overfull_page_is_completed_sequentially(market):
+    # Trang đầu trả nhiều nến hơn khoảng chứa được (openTime lệch nửa giờ)
+    times = np.r_[np.arange(2 * PAGE_LIMIT) * HOUR // 2, np.arange(PAGE_LIMIT, 2 * PAGE_LIMIT) * HOUR]
+    m = market(np.unique(times))
+    open_time, _ = historical_service._fetch_block("BTCUSDT", "1h", 0, 2 * PAGE_LIMIT * HOUR, np.dtype("f8"))
+    np.testing.assert_array_equal(open_time, np.unique(times))
+    assert len(m.calls) > 2
+
+
+def test_gaps_are_closed_up(market):
+    times = np.r_[np.arange(300), np.arange(1500, 2500)] * HOUR
+    market(times)
+    open_time, values = historical_service._fetch_block("BTCUSDT", "1h", 0, 3000 * HOUR, np.dtype("f4"))
+    np.testing.assert_array_equal(open_time, times)
+    assert values.dtype == np.float32 and values.shape == (5, len(times))
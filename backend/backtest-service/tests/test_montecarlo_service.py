@@ -0,0 +1,87 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from app.dto.request.MonteCarloRequestDTO import MonteCarloRequestDTO
+from app.mapper.JsonToStratefyConfig import parse_montecarlo_request
+from app.service.montecarlo_service import run_montecarlo
+
+RETURNS = [0.10, -0.05, 0.02, -0.10, 0.05]
+CASH = 1000.0
+RUNS = 20000
+
+
+def _exact(sequences):
+    """final equity, max drawdown (%) and Sharpe of every sequence, enumerated by hand."""
+    finals, drawdowns, sharpes = [], [], []
+    for seq in sequences:
+        equity = CASH * np.cumprod(1.0 + np.asarray(seq))
+        peak = np.maximum(np.maximum.accumulate(equity), CASH)
+        finals.append(equity[-1])
+        drawdowns.append((equity / peak).min() * 100 - 100)
+        std = np.std(seq, ddof=1)
+        sharpes.append(np.mean(seq) / std if std > 0 else 0.0)
+    return np.array(finals), np.array(drawdowns), np.array(sharpes)
+
+
+def _assert_mean(dist: dict, exact: np.ndarray):
+    # Trung bình của RUNS lần rút nằm trong 5 sai số chuẩn quanh giá trị đúng
+    assert abs(dist["mean"] - exact.mean()) <= 5 * exact.std() / np.sqrt(RUNS) + 1e-9
+    assert dist["min"] >= exact.min() - 1e-9 and dist["max"] <= exact.max() + 1e-9
+
+
+def test_same_seed_same_result():
+    req = MonteCarloRequestDTO(returns=RETURNS, runs=500, seed=42)
+    assert run_montecarlo(req) == run_montecarlo(req)
+    assert run_montecarlo(MonteCarloRequestDTO(returns=RETURNS, runs=500, seed=43)) != run_montecarlo(req)
+
+
+def test_bootstrap_matches_the_enumerated_distribution():
+    res = run_montecarlo(MonteCarloRequestDTO(returns=RETURNS, runs=RUNS, cash=CASH, seed=1))
+    # Rút có hoàn lại: mọi dãy 5^5 đồng khả năng
+    finals, drawdowns, sharpes = _exact(itertools.product(RETURNS, repeat=len(RETURNS)))
+    _assert_mean(res["final_equity"], finals)
+    _assert_mean(res["max_drawdown_pct"], drawdowns)
+    _assert_mean(res["sharpe"], sharpes)
+    p_loss = (finals < CASH).mean()
+    assert abs(res["prob_loss"] - p_loss) <= 5 * np.sqrt(p_loss * (1 - p_loss) / RUNS)
+    assert res["final_equity"]["percentiles"]["p50"] == pytest.approx(np.median(finals), rel=0.02)
+
+
+def test_shuffle_keeps_final_equity_and_sharpe():
+    res = run_montecarlo(MonteCarloRequestDTO(returns=RETURNS, runs=RUNS, method="shuffle", cash=CASH, seed=2))
+    finals, drawdowns, sharpes = _exact(itertools.permutations(RETURNS))
+    final = res["final_equity"]
+    # Tích không phụ thuộc thứ tự; chỉ drawdown thay đổi
+    assert final["min"] == pytest.approx(finals[0], rel=1e-12) and final["max"] == pytest.approx(finals[0], rel=1e-12)
+    assert res["sharpe"]["std"] == pytest.approx(0.0, abs=1e-12) and res["sharpe"]["mean"] == pytest.approx(sharpes[0])
+    _assert_mean(res["max_drawdown_pct"], drawdowns)
+    assert res["original"]["final_equity"] == pytest.approx(finals[0])
+    assert res["original"]["max_drawdown_pct"] == pytest.approx(drawdowns[0])
+
+
+def test_equity_bands_start_at_cash_and_end_at_final_percentiles():
+    res = run_montecarlo(MonteCarloRequestDTO(returns=RETURNS, runs=2000, cash=CASH, seed=3))
+    assert res["steps"] == list(range(len(RETURNS) + 1))
+    for label, band in res["equity_bands"].items():
+        assert band[0] == CASH and len(band) == len(res["steps"])
+        assert band[-1] == pytest.approx(res["final_equity"]["percentiles"][label])
+
+
+def test_one_trade():
+    for method in ("bootstrap", "shuffle"):
+        res = run_montecarlo(MonteCarloRequestDTO(returns=[0.04], runs=100, method=method, cash=CASH, seed=4))
+        assert res["trades"] == 1 and res["steps"] == [0, 1]
+        assert res["final_equity"]["min"] == res["final_equity"]["max"] == pytest.approx(1040.0)
+        assert res["max_drawdown_pct"]["min"] == res["max_drawdown_pct"]["max"] == 0.0
+        assert res["sharpe"]["mean"] == 0.0 and res["prob_loss"] == 0.0
+        assert res["equity_bands"]["p50"] == [CASH, pytest.approx(1040.0)]
+
+
+def test_zero_trades_is_an_error():
+    with pytest.raises(ValueError):
+        run_montecarlo(MonteCarloRequestDTO(returns=[]))
+    # ReturnPct không hữu hạn bị bỏ trước khi đếm
+    with pytest.raises(ValueError):
+        run_montecarlo(parse_montecarlo_request({"trades": {"ReturnPct": [float("nan"), None]}}))
@@ -0,0 +1,259 @@
+"""
+numpy_ta against the pandas_ta 0.3.14b0 formulas it replaces, its banks
+against the single-window functions, and IndicatorFactory/IndicatorBank
+against numpy_ta. The pandas_ta cross-check runs only where it is installed.
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.domain.indicator import numpy_ta
+from app.domain.indicator.IndicatorBank import IndicatorBank
+from app.factory.IndicatorFactory import IndicatorFactory
+
+WINDOW = 20
+WINDOWS = [2, 3, 5, 9, 14, 20, 50, 200]
+# Sai số tương đối theo độ lớn của giá trị; dải Bollinger lấy căn của phương sai
+# tính từ tổng tích luỹ nên chỉ chính xác cỡ 1e-9 * giá / độ rộng dải
+RTOL = 1e-9
+RTOL_BANDS = 1e-4
+
+
+@pytest.fixture(scope="module")
+def close() -> np.ndarray:
+    rng = np.random.default_rng(7)
+    close = 30000.0 * np.exp(np.cumsum(rng.normal(0.0, 0.002, 3000)))
+    # Một đoạn giá đứng yên: RSI 0/0 và dải Bollinger rộng 0
+    close[1000:1060] = close[999]
+    return close
+
+
+# Công thức của pandas_ta 0.3.14b0, viết lại bằng pandas
+
+def _ref_sma(c: pd.Series, length: int) -> pd.Series:
+    return c.rolling(length, min_periods=length).mean()
+
+
+def _ref_ema(c: pd.Series, length: int) -> pd.Series:
+    c = c.copy()
+    seed = c.iloc[:length].mean()
+    c.iloc[:length - 1] = np.nan
+    c.iloc[length - 1] = seed
+    return c.ewm(span=length, adjust=False).mean()
+
+
+def _ref_rsi(c: pd.Series, length: int) -> pd.Series:
+    neg = c.diff(1)
+    pos = neg.copy()
+    pos[pos < 0] = 0
+    neg[neg > 0] = 0
+    pos_avg = pos.ewm(alpha=1.0 / length, min_periods=length).mean()
+    neg_avg = neg.ewm(alpha=1.0 / length, min_periods=length).mean()
+    return 100 * pos_avg / (pos_avg + neg_avg.abs())
+
+
+def _ref_mom(c: pd.Series, length: int) -> pd.Series:
+    return c.diff(length)
+
+
+def _ref_roc(c: pd.Series, length: int) -> pd.Series:
+    return 100 * c.diff(length) / c.shift(length)
+
+
+def _non_zero_range(high: pd.Series, low: pd.Series) -> pd.Series:
+    diff = high - low
+    if diff.eq(0).any():
+        diff += sys.float_info.epsilon
+    return diff
+
+
+def _ref_bbands(c: pd.Series, length: int, std: float = 2.0) -> dict:
+    # Độ lệch chuẩn tổng thể tính lại trên từng cửa sổ, tránh sai số của rolling().std()
+    windows = np.lib.stride_tricks.sliding_window_view(c.to_numpy(), length)
+    sd = pd.Series(np.r_[np.full(length - 1, np.nan), windows.std(axis=1)], index=c.index)
+    mid = _ref_sma(c, length)
+    lower, upper = mid - std * sd, mid + std * sd
+    width = _non_zero_range(upper, lower)
+    return {"lower": lower, "middle": mid, "upper": upper,
+            "bandwidth": 100 * width / mid, "percent": _non_zero_range(c, lower) / width}
+
+
+def _ref_macd(c: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> dict:
+    line = _ref_ema(c, fast) - _ref_ema(c, slow)
+    signal_line = _ref_ema(line.loc[line.first_valid_index():], signal).reindex(c.index)
+    return {"macd": line, "signal": signal_line, "histogram": line - signal_line}
+
+
+def _assert_close(ref, got, rtol: float = RTOL):
+    ref = np.asarray(ref, dtype=float)
+    np.testing.assert_array_equal(np.isnan(got), np.isnan(ref))
+    mask = ~np.isnan(ref)
+    if mask.any():
+        scale = max(1.0, float(np.max(np.abs(ref[mask]))))
+        assert np.max(np.abs(ref[mask] - got[mask])) <= rtol * scale
+
+
+@pytest.mark.parametrize("length", WINDOWS)
+def test_sma(close, length):
+    _assert_close(_ref_sma(pd.Series(close), length), numpy_ta.sma(close, length))
+
+
+@pytest.mark.parametrize("length", WINDOWS)
+def test_ema(close, length):
+    _assert_close(_ref_ema(pd.Series(close), length), numpy_ta.ema(close, length))
+
+
+@pytest.mark.parametrize("length", WINDOWS)
+def test_rsi(close, length):
+    _assert_close(_ref_rsi(pd.Series(close), length), numpy_ta.rsi(close, length))
+
+
+@pytest.mark.parametrize("length", WINDOWS)
+def test_mom(close, length):
+    _assert_close(_ref_mom(pd.Series(close), length), numpy_ta.mom(close, length))
+
+
+@pytest.mark.parametrize("length", WINDOWS)
+def test_roc(close, length):
+    _assert_close(_ref_roc(pd.Series(close), length), numpy_ta.roc(close, length))
+
+
+@pytest.mark.parametrize("length", WINDOWS)
+def test_bbands(close, length):
+    ref = _ref_bbands(pd.Series(close), length)
+    got = numpy_ta.bbands(close, length)
+    assert set(got) == set(ref)
+    _assert_close(ref["middle"], got["middle"])
+    _assert_close(ref["lower"], got["lower"], rtol=RTOL_BANDS)
+    _assert_close(ref["upper"], got["upper"], rtol=RTOL_BANDS)
+    # Trên cửa sổ giá đứng yên độ rộng dải chỉ còn là sai số làm tròn và percent
+    # là nhiễu chia nhiễu ở cả hai phía: bỏ qua
+    wide = (ref["upper"] - ref["lower"]).to_numpy() > 1e-6 * ref["middle"].to_numpy()
+    _assert_close(ref["bandwidth"][wide], got["bandwidth"][wide], rtol=RTOL_BANDS)
+    _assert_close(ref["percent"][wide], got["percent"][wide], rtol=RTOL_BANDS)
+
+
+@pytest.mark.parametrize("signal", [3, 9, 20])
+def test_macd(close, signal):
+    ref = _ref_macd(pd.Series(close), signal=signal)
+    got = numpy_ta.macd(close, signal=signal)
+    assert set(got) == set(ref)
+    for key in ref:
+        _assert_close(ref[key], got[key])
+
+
+@pytest.mark.parametrize("fn", [numpy_ta.sma, numpy_ta.ema, numpy_ta.rsi, numpy_ta.mom, numpy_ta.roc])
+def test_short_series_is_all_warmup(fn):
+    assert np.isnan(fn(np.arange(1.0, 10.0), WINDOW)).all()
+
+
+@pytest.mark.parametrize("fn", [numpy_ta.sma, numpy_ta.ema, numpy_ta.rsi, numpy_ta.mom, numpy_ta.roc])
+def test_rows_match_1d(close, fn):
+    rows = np.stack([close, close[::-1], close * 0.5])
+    got = fn(rows, WINDOW)
+    for row, values in zip(rows, got):
+        np.testing.assert_array_equal(values, fn(row, WINDOW))
+
+
+# Ma trận bank: dòng i phải giống hệt hàm một window, với giai đoạn khởi động = warmup
+
+def _assert_bank_rows(bank_fn, single_fn, close, lengths, warmup=np.nan):
+    values = bank_fn(close, lengths, warmup=warmup)
+    assert values.shape == (len(lengths), close.size)
+    for row, length in zip(values, lengths):
+        expected = single_fn(close, length)
+        if not np.isnan(warmup):
+            # Chỉ giai đoạn khởi động đầu chuỗi được thay
+            lead = np.argmax(~np.isnan(expected)) if (~np.isnan(expected)).any() else close.size
+            expected[:lead] = warmup
+        np.testing.assert_array_equal(row, expected)
+
+
+@pytest.mark.parametrize("warmup", [np.nan, 0.0])
+def test_sma_bank(close, warmup):
+    _assert_bank_rows(numpy_ta.sma_bank, numpy_ta.sma, close, WINDOWS, warmup)
+
+
+@pytest.mark.parametrize("warmup", [np.nan, 0.0])
+def test_ema_bank(close, warmup):
+    _assert_bank_rows(numpy_ta.ema_bank, numpy_ta.ema, close, WINDOWS, warmup)
+
+
+@pytest.mark.parametrize("warmup", [np.nan, 0.0])
+def test_rsi_bank(close, warmup):
+    _assert_bank_rows(numpy_ta.rsi_bank, numpy_ta.rsi, close, WINDOWS, warmup)
+
+
+@pytest.mark.parametrize("warmup", [np.nan, 0.0])
+def test_mom_bank(close, warmup):
+    _assert_bank_rows(numpy_ta.mom_bank, numpy_ta.mom, close, WINDOWS, warmup)
+
+
+@pytest.mark.parametrize("warmup", [np.nan, 0.0])
+def test_roc_bank(close, warmup):
+    _assert_bank_rows(numpy_ta.roc_bank, numpy_ta.roc, close, WINDOWS, warmup)
+
+
+@pytest.mark.parametrize("which", ["macd", "signal", "histogram"])
+@pytest.mark.parametrize("warmup", [np.nan, 0.0])
+def test_macd_bank(close, which, warmup):
+    def single(c, signal):
+        return numpy_ta.macd(c, signal=signal)[which]
+
+    def bank(c, signals, warmup):
+        return numpy_ta.macd_bank(c, signals, which=which, warmup=warmup)
+
+    _assert_bank_rows(bank, single, close, WINDOWS, warmup)
+
+
+def test_banks_on_short_series():
+    close = np.arange(1.0, 10.0)
+    for bank in (numpy_ta.sma_bank, numpy_ta.ema_bank, numpy_ta.rsi_bank, numpy_ta.mom_bank, numpy_ta.roc_bank):
+        assert (bank(close, [WINDOW], warmup=0.0) == 0.0).all()
+
+
+@pytest.mark.parametrize("indicator_type", ["SMA", "EMA", "RSI", "MOM", "ROC", "BBANDS", "MACD"])
+def test_indicator_bank_matches_factory(close, indicator_type):
+    bank = IndicatorBank.compute(indicator_type, WINDOWS, close)
+    for w in WINDOWS:
+        fn, args = IndicatorFactory.create(indicator_type, w).bt_callable()
+        np.testing.assert_array_equal(bank.row(w), fn(close, *args))
+
+
+@pytest.mark.parametrize("indicator_type,single", [
+    ("SMA", numpy_ta.sma), ("EMA", numpy_ta.ema), ("RSI", numpy_ta.rsi), ("MOM", numpy_ta.mom),
+    ("ROC", numpy_ta.roc), ("BBANDS", lambda c, w: numpy_ta.bbands(c, w)["middle"]),
+    ("MACD", lambda c, w: numpy_ta.macd(c, signal=w)["histogram"]),
+])
+def test_factory_zeroes_warmup(close, indicator_type, single):
+    fn, args = IndicatorFactory.create(indicator_type, WINDOW).bt_callable()
+    np.testing.assert_array_equal(fn(close, *args), np.nan_to_num(single(close, WINDOW), nan=0.0))
+
+
+# Đối chiếu với chính pandas_ta khi có cài
+
+def _pandas_ta_cases(ta, close: pd.Series):
+    bb = ta.bbands(close, length=WINDOW)
+    macd = ta.macd(close)
+    return {
+        "sma": (ta.sma(close, length=WINDOW), numpy_ta.sma(close, WINDOW)),
+        "ema": (ta.ema(close, length=WINDOW), numpy_ta.ema(close, WINDOW)),
+        "rsi": (ta.rsi(close, length=WINDOW), numpy_ta.rsi(close, WINDOW)),
+        "mom": (ta.mom(close, length=WINDOW), numpy_ta.mom(close, WINDOW)),
+        "roc": (ta.roc(close, length=WINDOW), numpy_ta.roc(close, WINDOW)),
+        "bbands_lower": (bb.iloc[:, 0], numpy_ta.bbands(close, WINDOW)["lower"]),
+        "bbands_middle": (bb.iloc[:, 1], numpy_ta.bbands(close, WINDOW)["middle"]),
+        "bbands_upper": (bb.iloc[:, 2], numpy_ta.bbands(close, WINDOW)["upper"]),
+        "macd": (macd.iloc[:, 0], numpy_ta.macd(close)["macd"]),
+        "macd_histogram": (macd.iloc[:, 1], numpy_ta.macd(close)["histogram"]),
+        "macd_signal": (macd.iloc[:, 2], numpy_ta.macd(close)["signal"]),
+    }
+
+
+def test_matches_pandas_ta(close):
+    ta = pytest.importorskip("pandas_ta")
+    for name, (ref, got) in _pandas_ta_cases(ta, pd.Series(close)).items():
+        # Phương sai trượt online của pandas chỉ chính xác cỡ 1e-5 trên chuỗi dài
+        _assert_close(ref, got, rtol=RTOL_BANDS if name.startswith("bbands") else RTOL)
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from app.mapper.JsonToStratefyConfig import parse_optimize_request
+from app.service import optimize_service
+from app.service.backtest_service import convert_stats, simulate
+from app.service.optimize_service import IndicatorLRU, apply_params, param_grid, run_optimization, warm_indicators
+from app.service.shared_candles import share_candles
+from benchmarks.bench_engines import fixture_candles
+
+RULES = [
+    {"left": {"type": "SMA", "window": 10}, "op": "CrossesUp", "right": {"type": "SMA", "window": 30}},
+    {"left": {"type": "RSI", "window": 14}, "op": "Above", "right": {"type": "CONST", "const": 60.0}},
+]
+
+
+def _request(**extra):
+    return parse_optimize_request({
+        "config": {"symbol": "BTCUSDT", "interval": "5m", "lots": 10000, "slPct": 0.02, "tpPct": 0.03,
+                   "rules": RULES, "buyCondition": "s0", "sellCondition": "s1", "engine": "fast"},
+        "windows": {"SMA_10": [5, 10], "RSI_14": [7, 14]},
+        "tpPct": [0.03, 0.05],
+        "objective": "return_pct",
+        "topN": 8,
+        **extra,
+    })
+
+
+@pytest.fixture
+def candles(monkeypatch):
+    data = fixture_candles(2000)
+    monkeypatch.setattr(optimize_service, "fetch_all_ohlcv", lambda *args, **kwargs: data)
+    return data
+
+
+def _expected(req, data):
+    return {repr(p): convert_stats(simulate(apply_params(req.config, p), data)) for p in param_grid(req)}
+
+
+@pytest.mark.parametrize("bank_mb", [optimize_service.OPTIMIZE_BANK_MB, 0])
+def test_workers_match_in_process_runs(monkeypatch, candles, bank_mb):
+    # Hai worker (spawn), có và không có indicator bank dùng chung
+    monkeypatch.setattr(optimize_service, "OPTIMIZE_WORKERS", 2)
+    monkeypatch.setattr(optimize_service, "OPTIMIZE_BANK_MB", bank_mb)
+    req = _request()
+    res = run_optimization(req)
+    expected = _expected(req, candles)
+    assert res["evaluated"] == len(expected) == 8
+    for r in res["results"]:
+        assert r["stats"] == expected[repr(r["params"])].__dict__
+
+
+def test_lru_keeps_bank_rows_and_drops_least_recently_used():
+    row = np.zeros(100)
+    cache = IndicatorLRU({("SMA", 5): row}, max_bytes=2 * row.nbytes)
+    cache[("EMA", 5)] = np.ones(100)
+    cache[("EMA", 6)] = np.ones(100)
+    # Đọc EMA 5 làm nó thành mới dùng nhất
+    cache[("EMA", 5)]
+    cache[("EMA", 7)] = np.ones(100)
+    assert ("EMA", 6) not in cache
+    assert ("EMA", 5) in cache and ("EMA", 7) in cache and cache[("SMA", 5)] is row
+    assert cache.nbytes == 2 * row.nbytes
+
+
+@pytest.mark.parametrize("start", [0, 500])
+def test_worker_cache_stays_bounded_without_banks(monkeypatch, candles, start):
+    # Không có bank (vượt OPTIMIZE_BANK_MB): indicator tự tính không được tích luỹ mãi
+    monkeypatch.setattr(optimize_service, "OPTIMIZE_WORKER_CACHE_MB", 3 * len(candles) * 8 / (1024 * 1024))
+    req = _request(windows={"SMA_10": list(range(5, 25)), "RSI_14": [7, 14]})
+    with share_candles(candles) as shared:
+        optimize_service._init_worker(shared.spec, req.config, {})
+        try:
+            for params in param_grid(req):
+                _, stats = optimize_service._evaluate(params, start)
+                cfg = apply_params(req.config, params)
+                expected = convert_stats(simulate(cfg, candles.iloc[start:], warm_indicators(cfg, candles, start)))
+                assert stats == expected
+                cache = optimize_service._candles_from(start)[1]
+                assert cache.nbytes <= 3 * len(candles) * 8
+        finally:
+            optimize_service._worker.clear()
+
+
+def test_halving_does_not_depend_on_banks(monkeypatch, candles):
+    # Không có bank, các vòng ngắn vẫn dùng indicator khởi động trên cả lịch sử
+    monkeypatch.setattr(optimize_service, "OPTIMIZE_WORKERS", 2)
+    req = _request(windows={"SMA_10": [5, 10], "SMA_30": [100, 200], "RSI_14": [7, 14]},
+                   method="halving", eta=3, minBars=100, topN=2)
+    with_banks = run_optimization(req)
+    monkeypatch.setattr(optimize_service, "OPTIMIZE_BANK_MB", 0)
+    without_banks = run_optimization(req)
+    assert len(with_banks["stages"]) > 1
+    assert without_banks == with_banks
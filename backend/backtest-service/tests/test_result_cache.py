@@ -0,0 +1,89 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from app.mapper.JsonToStratefyConfig import parse_strategy_config
+from app.service import backtest_service
+from app.service.backtest_service import backtest_on
+from app.service.result_cache import ResultCache, config_hash
+from benchmarks.bench_engines import fixture_candles
+
+SMA_CROSS = {"left": {"type": "SMA", "window": 10}, "op": "CrossesUp", "right": {"type": "SMA", "window": 30}}
+RSI_LOW = {"left": {"type": "RSI", "window": 14}, "op": "Below", "right": {"type": "CONST", "const": 40}}
+
+
+def _config(rules, buy="s0 | s1", sell="!s0 & !s1", engine="fast", **extra):
+    return parse_strategy_config({
+        "symbol": "BTCUSDT", "interval": "5m", "lots": 10000, "slPct": 0.02, "tpPct": 0.03,
+        "startTime": "2023-01-01T00:00:00", "endTime": "2023-01-08T00:00:00", "rules": rules,
+        "buyCondition": buy, "sellCondition": sell, "engine": engine, **extra,
+    })
+
+
+def test_hash_ignores_spelling():
+    a = _config([SMA_CROSS, RSI_LOW], buy="s0 | s1", slPct=0.02)
+    b = _config([SMA_CROSS, {**RSI_LOW, "right": {"type": "CONST", "const": 40.0}}], buy="s0|s1", slPct=2e-2)
+    assert config_hash(a) == config_hash(b)
+
+
+def test_hash_keeps_rule_order():
+    # Cùng điều kiện nhưng thứ tự rule khác: Entry_fn/Exit_fn lấy từ indicator tạo sau cùng
+    a = _config([SMA_CROSS, RSI_LOW], buy="s0 | s1", sell="!s0 & !s1")
+    b = _config([RSI_LOW, SMA_CROSS], buy="s1 | s0", sell="!s1 & !s0")
+    assert config_hash(a) != config_hash(b)
+
+
+def test_hit_miss_and_lru_eviction():
+    cache = ResultCache(max_bytes=40)
+    assert cache.get("a") is None
+    cache.put("a", {"v": "x" * 10})
+    assert cache.get("a") == {"v": "x" * 10}
+    cache.put("b", {"v": "y" * 10})
+    cache.get("a")
+    # "b" là mục ít dùng gần đây nhất
+    cache.put("c", {"v": "z" * 10})
+    assert cache.get("b") is None and cache.get("a") is not None and cache.get("c") is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["misses"] == 2 and stats["hits"] == 4
+
+
+def test_series_put_invalidates_previous_entry(tmp_path):
+    cache = ResultCache(max_bytes=1 << 20, disk_dir=str(tmp_path))
+    cache.put("old", {"end": 1}, series="BTC-5m")
+    cache.put("new", {"end": 2}, series="BTC-5m")
+    assert cache.get("old") is None
+    assert not (tmp_path / "old.json").exists()
+    assert cache.get("new") == {"end": 2}
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    ResultCache(max_bytes=1 << 20, disk_dir=str(tmp_path)).put("k", {"v": 1})
+    cache = ResultCache(max_bytes=1 << 20, disk_dir=str(tmp_path))
+    assert cache.get("k") == {"v": 1}
+    assert cache.stats()["disk_hits"] == 1
+
+
+def _run(cfg, data, end) -> str:
+    # So sánh qua JSON: NaN (vd. Tag) không bằng chính nó trong dict
+    return json.dumps(backtest_on(cfg, data, end).to_dict(), sort_keys=True, default=str)
+
+
+@pytest.mark.parametrize("engine", ["fast", "backtesting"])
+def test_reordered_rules_do_not_share_a_result(monkeypatch, engine):
+    monkeypatch.setattr(backtest_service, "result_cache", ResultCache(max_bytes=64 << 20))
+    monkeypatch.setattr(backtest_service, "checkpoints", None)
+    data = fixture_candles(2000)
+    end = datetime(2023, 1, 8)
+    a = _config([SMA_CROSS, RSI_LOW], buy="s0 | s1", sell="!s0 & !s1", engine=engine)
+    b = _config([RSI_LOW, SMA_CROSS], buy="s1 | s0", sell="!s1 & !s0", engine=engine)
+
+    first = _run(a, data, end)
+    assert _run(a, data, end) == first
+    assert backtest_service.result_cache.stats()["hits"] == 1
+
+    reordered = _run(b, data, end)
+    assert backtest_service.result_cache.stats()["misses"] == 2
+    monkeypatch.setattr(backtest_service, "result_cache", None)
+    assert reordered == _run(b, data, end)
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from app.domain.engine.fast_engine import FRACTIONAL_UNIT
+from app.domain.strategy.signals import compute_signals, latest_signals
+from app.factory.IndicatorFactory import IndicatorFactory
+from app.mapper.JsonToStratefyConfig import parse_scan_request
+from app.service import scan_service
+from app.service.scan_service import SCAN_WARMUP_FACTOR, required_bars, run_scan
+from benchmarks.bench_engines import fixture_candles
+
+# Sai số làm tròn khi bắt đầu ở nến khác, cho indicator không đệ quy
+ROUNDING = 1e-9
+
+RULE_SETS = [
+    ([{"left": {"type": "EMA", "window": 9}, "op": "CrossesUp", "right": {"type": "EMA", "window": 21}},
+      {"left": {"type": "EMA", "window": 9}, "op": "CrossesDown", "right": {"type": "EMA", "window": 21}}],
+     "s0", "s1"),
+    ([{"left": {"type": "RSI", "window": 14}, "op": "Below", "right": {"type": "CONST", "const": 40}},
+      {"left": {"type": "RSI", "window": 14}, "op": "Above", "right": {"type": "CONST", "const": 60}},
+      {"left": {"type": "SMA", "window": 20}, "op": "Above", "right": {"type": "SMA", "window": 50}}],
+     "s0 & s2", "s1 | !s2"),
+    ([{"left": {"type": "MACD", "window": 9}, "op": "CrossesUp", "right": {"type": "CONST", "const": 0}},
+      {"left": {"type": "MACD", "window": 9}, "op": "CrossesDown", "right": {"type": "CONST", "const": 0}}],
+     "s0", "s1"),
+    ([{"left": {"type": "MOM", "window": 10}, "op": "AboveOrEqual", "right": {"type": "CONST", "const": 0}},
+      {"left": {"type": "ROC", "window": 5}, "op": "BelowOrEqual", "right": {"type": "CONST", "const": -0.2}},
+      {"left": {"type": "BBANDS", "window": 20}, "op": "CrossesDown", "right": {"type": "EMA", "window": 5}}],
+     "s0 & s2", "s1"),
+]
+
+
+def _request(rules, buy, sell, **extra):
+    return parse_scan_request({"symbols": ["BTCUSDT", "ETHUSDT", "SOLUSDT"], "interval": "5m", "rules": rules,
+                               "buyCondition": buy, "sellCondition": sell, **extra})
+
+
+def _tolerance(side) -> float:
+    """
+    How far a recursive filter started required_bars() back can still be off,
+    relative to its scale: its decay per bar to the power of the bars it gets.
+    """
+    if side.type == "CONST":
+        return 0.0
+    bars = SCAN_WARMUP_FACTOR * side.window
+    if side.type == "EMA":
+        return (1 - 2 / (side.window + 1)) ** bars
+    if side.type == "RSI":
+        return (1 - 1 / side.window) ** bars
+    if side.type == "MACD":
+        # EMA 26 chậm nhất, trên SCAN_WARMUP_FACTOR * (window + 26) nến
+        return (1 - 2 / 27) ** (SCAN_WARMUP_FACTOR * (side.window + 26))
+    return 0.0
+
+
+def _near_tie(cfg, close: np.ndarray, t: int) -> bool:
+    """Whether a rule's two sides are closer than that error on bar t or t - 1 of the full history."""
+    for r in cfg.rules:
+        a, b = (np.full(len(close), s.const) if s.type == "CONST" else
+                IndicatorFactory.create(s.type, s.window).bt_callable()[0](close) for s in (r.left, r.right))
+        tolerance = 10 * max(_tolerance(r.left), _tolerance(r.right), ROUNDING)
+        # Sai số của MACD/MOM quanh 0 tính theo giá, của RSI theo chính nó
+        scale = max(abs(a[t]), abs(b[t]), close[t])
+        if np.abs(a[t - 1:t + 1] - b[t - 1:t + 1]).min() < tolerance * scale:
+            return True
+    return False
+
+
+@pytest.mark.parametrize("rules,buy,sell", RULE_SETS)
+def test_truncated_history_matches_full_history(rules, buy, sell):
+    cfg = _request(rules, buy, sell).config
+    need = required_bars(cfg)
+    close = fixture_candles(3000)["Close"].to_numpy() * FRACTIONAL_UNIT
+    full = compute_signals(cfg, close)
+    ends = range(need, len(close), 7)
+    # Mỗi hàng là nến [t - need + 1, t] của cùng một chuỗi
+    rows = np.stack([close[t - need + 1:t + 1] for t in ends])
+    buy_last, sell_last = latest_signals(cfg, rows)
+    ties = 0
+    for k, t in enumerate(ends):
+        if _near_tie(cfg, close, t):
+            ties += 1
+            continue
+        assert (buy_last[k], sell_last[k]) == (full.long_entry[t], full.short_entry[t]), t
+    assert ties <= len(ends) // 50
+    assert full.long_entry[need:].any() and full.short_entry[need:].any()
+
+
+@pytest.mark.parametrize("rules,buy,sell", RULE_SETS)
+def test_scan_matches_full_history_backtest_signals(monkeypatch, rules, buy, sell):
+    data = {s: fixture_candles(4000, seed=seed) for s, seed in [("BTCUSDT", 1), ("ETHUSDT", 2), ("SOLUSDT", 3)]}
+    monkeypatch.setattr(scan_service, "fetch_all_ohlcv", lambda symbol, *args: data[symbol])
+    req = _request(rules, buy, sell)
+    res = run_scan(req)
+    assert res["lookback"] == required_bars(req.config)
+    for row in res["results"]:
+        close = data[row["symbol"]]["Close"].to_numpy()
+        full = compute_signals(req.config, close * FRACTIONAL_UNIT)
+        assert row["close"] == close[-1] and row["time"] == str(data[row["symbol"]].index[-1])
+        assert (row["buy"], row["sell"]) == (full.long_entry[-1], full.short_entry[-1])
+
+
+def test_required_bars_covers_recursive_warm_up():
+    cfg = _request(*RULE_SETS[2]).config
+    # MACD: EMA 26 rồi EMA 9 của đường signal
+    assert required_bars(cfg) == (9 + 26) * SCAN_WARMUP_FACTOR + 1
+    cfg = _request(*RULE_SETS[3]).config
+    assert required_bars(cfg) == max(5 * SCAN_WARMUP_FACTOR, 21) + 1
@@ -0,0 +1,126 @@
+"""Streaming indicators against the batch ones (bt_callable()), bar by bar and after warm()."""
+import math
+from functools import partial
+
+import numpy as np
+import pytest
+
+from app.domain.indicator.BBANDSIndicator import BBANDSIndicator
+from app.domain.indicator.MACDIndicator import MACDIndicator
+from app.domain.indicator.streaming import StreamingBBANDS, StreamingMACD, _RollingSum
+from app.factory.IndicatorFactory import IndicatorFactory
+
+TYPES = ["SMA", "EMA", "RSI", "MACD", "BBANDS", "MOM", "ROC"]
+WINDOWS = [2, 5, 14, 50]
+RTOL = 1e-9
+# Dải Bollinger lấy căn của phương sai tính từ tổng trượt, như test_numpy_ta
+RTOL_BANDS = 1e-4
+FLAT = slice(400, 460)
+
+
+@pytest.fixture(scope="module")
+def close() -> np.ndarray:
+    rng = np.random.default_rng(3)
+    close = 30000.0 * np.exp(np.cumsum(rng.normal(0.0, 0.002, 800)))
+    # Một đoạn giá đứng yên: RSI 0/0 và dải Bollinger rộng 0
+    close[FLAT] = close[FLAT.start - 1]
+    return close
+
+
+def _batch(indicator, close: np.ndarray) -> np.ndarray:
+    fn, args = indicator.bt_callable()
+    return np.asarray(fn(close, *args), dtype=float)
+
+
+def _assert_close(got, expected, rtol=RTOL):
+    got, expected = np.asarray(got), np.asarray(expected)
+    # Sai số tuyệt đối theo độ lớn của cả chuỗi (vd. MOM, MACD quanh 0)
+    atol = rtol * max(1.0, float(np.nanmax(np.abs(expected[np.isfinite(expected)]), initial=0.0)))
+    np.testing.assert_allclose(got, expected, rtol=rtol, atol=atol)
+
+
+def _cases():
+    for t in TYPES:
+        for w in WINDOWS:
+            yield t, w, partial(IndicatorFactory.create, t, w), partial(IndicatorFactory.create_streaming, t, w)
+    for band in ["lower", "upper", "percent", "bandwidth"]:
+        yield f"BBANDS-{band}", 20, partial(BBANDSIndicator, 20, band), partial(StreamingBBANDS, 20, band)
+    for line in ["macd", "signal"]:
+        yield f"MACD-{line}", 9, partial(MACDIndicator, 9, line), partial(StreamingMACD, 9, line)
+
+
+CASES = list(_cases())
+IDS = [f"{name}-{w}" for name, w, _, _ in CASES]
+
+
+def _expected(name, batch_factory, close):
+    expected = _batch(batch_factory(), close)
+    rtol = RTOL_BANDS if name.startswith("BBANDS-") else RTOL
+    mask = np.ones(len(close), dtype=bool)
+    if name in ("BBANDS-percent", "BBANDS-bandwidth"):
+        # Độ rộng 0 trong đoạn đứng yên: giá trị chỉ là epsilon chia epsilon
+        bands = BBANDSIndicator(20, "upper"), BBANDSIndicator(20, "lower"), BBANDSIndicator(20, "middle")
+        upper, lower, mid = (_batch(b, close) for b in bands)
+        mask = (upper - lower) > 1e-6 * np.abs(mid)
+    return expected, rtol, mask
+
+
+@pytest.mark.parametrize("name,window,batch_factory,stream_factory", CASES, ids=IDS)
+def test_update_matches_batch(close, name, window, batch_factory, stream_factory):
+    expected, rtol, mask = _expected(name, batch_factory, close)
+    stream = stream_factory()
+    got = np.array([stream.update(float(c)) for c in close])
+    _assert_close(got[mask], expected[mask], rtol)
+    assert stream.count == len(close)
+
+
+@pytest.mark.parametrize("name,window,batch_factory,stream_factory", CASES, ids=IDS)
+def test_warm_then_update_matches_batch(close, name, window, batch_factory, stream_factory):
+    expected, rtol, mask = _expected(name, batch_factory, close)
+    for k in sorted({0, 1, window - 1, window, window + 1, 35, FLAT.start + 10, len(close) - 1}):
+        stream = stream_factory()
+        warmed = stream.warm(close[:k])
+        # warm() trả về giá trị của nến k - 1
+        if k and mask[k - 1]:
+            _assert_close([warmed], [expected[k - 1]], rtol)
+        got = np.array([stream.update(float(c)) for c in close[k:]])
+        _assert_close(got[mask[k:]], expected[k:][mask[k:]], rtol)
+
+
+@pytest.mark.parametrize("window", [1, 3, 7])
+def test_rolling_sum_resums_every_window(window):
+    rng = np.random.default_rng(window)
+    xs = 1e6 + rng.normal(0.0, 1.0, 10 * window + 3)
+    # Một giá trị rất lớn: trừ nó ra khỏi tổng làm mất hết chữ số có nghĩa
+    xs[window + 1] = 1e17
+    rolling = _RollingSum(window)
+    for i, x in enumerate(xs):
+        rolling.push(float(x))
+        last = xs[max(0, i + 1 - window):i + 1]
+        assert rolling.full() == (i + 1 >= window)
+        if (i + 1) % window == 0:
+            # Vừa cộng lại từ đầu: đúng như tính trực tiếp trên cửa sổ
+            assert rolling._since_resum == 0
+            assert rolling.mean() == pytest.approx(math.fsum(last) / window, rel=1e-12)
+            assert rolling.var() == pytest.approx(float(np.var(last)), rel=1e-6, abs=1e-6)
+        elif i + 1 >= 3 * window:
+            # Giá trị lớn ra khỏi cửa sổ ở nến 2 * window + 1; lần cộng lại
+            # kế tiếp xoá sai số nó để lại
+            assert rolling.mean() == pytest.approx(float(np.mean(last)), rel=1e-12)
+
+
+def test_rolling_sum_warm_matches_push():
+    xs = np.linspace(100.0, 200.0, 37)
+    pushed, warmed = _RollingSum(10), _RollingSum(10)
+    for x in xs:
+        pushed.push(float(x))
+    warmed.warm(xs)
+    assert list(warmed.values) == list(pushed.values)
+    assert warmed.mean() == pytest.approx(pushed.mean(), rel=1e-14)
+    assert warmed.var() == pytest.approx(pushed.var(), rel=1e-9)
+
+
+def test_window_must_be_positive():
+    for t in TYPES:
+        with pytest.raises(ValueError):
+            IndicatorFactory.create_streaming(t, 0)
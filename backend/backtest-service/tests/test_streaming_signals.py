@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from app.domain.strategy.signals import compute_signals
+from app.domain.strategy.streaming_signals import StreamingSignals
+from app.mapper.JsonToStratefyConfig import parse_strategy_config
+
+OPS = ["Above", "Below", "CrossesUp", "CrossesDown", "AboveOrEqual", "BelowOrEqual"]
+# Indicator theo giá so với nhau; dao động so với một hằng số trong khoảng của nó
+PRICE = ["SMA", "EMA", "BBANDS"]
+OSCILLATORS = {"RSI": (30.0, 70.0), "MOM": (-50.0, 50.0), "ROC": (-0.3, 0.3), "MACD": (-20.0, 20.0)}
+
+
+@pytest.fixture(scope="module")
+def close() -> np.ndarray:
+    rng = np.random.default_rng(11)
+    return 30000.0 * np.exp(np.cumsum(rng.normal(0.0, 0.003, 600)))
+
+
+def _side(rng, kind):
+    return {"type": str(kind), "window": int(rng.choice([2, 3, 5, 8, 13, 21, 34]))}
+
+
+def _rule(rng) -> dict:
+    if rng.random() < 0.5:
+        left, right = rng.choice(PRICE, 2)
+        return {"left": _side(rng, left), "op": str(rng.choice(OPS)), "right": _side(rng, right)}
+    kind = str(rng.choice(list(OSCILLATORS)))
+    lo, hi = OSCILLATORS[kind]
+    const = {"type": "CONST", "const": float(np.round(rng.uniform(lo, hi), 2))}
+    return {"left": _side(rng, kind), "op": str(rng.choice(OPS)), "right": const}
+
+
+def _condition(rng, n: int) -> str:
+    terms = [("!" if rng.random() < 0.3 else "") + f"s{i}" for i in rng.permutation(n)[:rng.integers(1, n + 1)]]
+    expr = terms[0]
+    for term in terms[1:]:
+        op = " & " if rng.random() < 0.5 else " | "
+        expr = f"({expr}{op}{term})" if rng.random() < 0.5 else f"{expr}{op}{term}"
+    return expr
+
+
+def _configs(seed: int, count: int):
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(count):
+        rules = [_rule(rng) for _ in range(rng.integers(1, 4))]
+        configs.append(parse_strategy_config({
+            "symbol": "BTCUSDT", "interval": "5m", "lots": 10000, "slPct": 0.02, "tpPct": 0.03, "rules": rules,
+            "buyCondition": _condition(rng, len(rules)), "sellCondition": _condition(rng, len(rules)),
+            "engine": "fast",
+        }))
+    return configs
+
+
+def _expected(configs, close):
+    signals = [compute_signals(cfg, close) for cfg in configs]
+    return [np.stack([s.long_entry, s.short_entry], axis=1) for s in signals]
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_update_matches_compute_signals(close, seed):
+    configs = _configs(seed, 8)
+    expected = _expected(configs, close)
+    stream = StreamingSignals(configs)
+    for t, c in enumerate(close):
+        got = stream.update(c)
+        for j, exp in enumerate(expected):
+            assert got[j] == tuple(exp[t]), (seed, j, t, configs[j])
+    # Mọi config dùng chung một indicator cho mỗi (type, window)
+    keys = {(s.type, s.window) for cfg in configs for r in cfg.rules for s in (r.left, r.right) if s.type != "CONST"}
+    assert stream.indicator_count == len(keys)
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("k", [1, 2, 40, 599])
+def test_warm_then_update_matches_compute_signals(close, seed, k):
+    configs = _configs(100 + seed, 5)
+    expected = _expected(configs, close)
+    stream = StreamingSignals(configs)
+    stream.warm(close[:k])
+    for t in range(k, len(close)):
+        got = stream.update(close[t])
+        for j, exp in enumerate(expected):
+            assert got[j] == tuple(exp[t]), (seed, j, t, configs[j])
+
+
+def test_indicator_values_follow_compute_signals_order(close):
+    cfg = _configs(7, 1)[0]
+    stream = StreamingSignals([cfg])
+    stream.warm(close)
+    last = [values[-1] for values in compute_signals(cfg, close).indicators]
+    np.testing.assert_allclose(stream.indicator_values(), last, rtol=1e-9)
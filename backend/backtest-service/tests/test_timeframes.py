@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.mapper.JsonToStratefyConfig import parse_strategy_config
+from app.service.historical_service import interval_to_millis
+from app.service.timeframes import align_to_base, resample_ohlcv, timeframe_indicators
+from benchmarks.bench_engines import fixture_candles
+
+# Nến tuần của Binance mở vào thứ Hai 00:00 UTC
+FREQ = {"15m": "15min", "1h": "1h", "4h": "4h", "1d": "24h", "1w": "W-MON"}
+
+
+def _candles(n: int, interval: str, start: str = "2023-01-01", gaps=()) -> pd.DataFrame:
+    data = fixture_candles(n)
+    data.index = pd.date_range(start, periods=n, freq=FREQ.get(interval, "5min"), name="Open Time")
+    # Bỏ vài đoạn nến, như khi sàn ngừng giao dịch
+    keep = np.ones(n, dtype=bool)
+    for lo, hi in gaps:
+        keep[lo:hi] = False
+    return data[keep]
+
+
+def _pandas_resample(data: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    # W-MON đã neo vào thứ Hai; các khung theo giờ neo vào epoch như sàn
+    origin = {} if timeframe == "1w" else {"origin": "epoch"}
+    out = data.resample(FREQ[timeframe], label="left", closed="left", **origin).agg(
+        {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"})
+    # Khung không có nến nào bị bỏ, như resample_ohlcv
+    return out[out["Open"].notna()]
+
+
+CASES = [
+    ("5m", "15m", "2023-01-01", ()),
+    ("5m", "1h", "2023-01-01 00:35", ()),
+    ("5m", "4h", "2023-01-01 03:20", [(100, 180), (1000, 1001)]),
+    ("1h", "1d", "2023-01-01 05:00", [(30, 80)]),
+    ("1h", "1w", "2023-01-04 13:00", [(200, 400)]),
+    ("1d", "1w", "2022-12-30", [(10, 12)]),
+]
+
+
+@pytest.mark.parametrize("interval,timeframe,start,gaps", CASES)
+def test_resample_matches_pandas(interval, timeframe, start, gaps):
+    data = _candles(3000 if interval != "1d" else 400, interval, start, gaps)
+    got = resample_ohlcv(data, timeframe)
+    expected = _pandas_resample(data, timeframe)
+    pd.testing.assert_frame_equal(got, expected, check_freq=False, check_index_type=False)
+    if timeframe == "1w":
+        assert (got.index.dayofweek == 0).all()
+
+
+@pytest.mark.parametrize("interval,timeframe,start,gaps", CASES)
+def test_align_sees_only_closed_candles(interval, timeframe, start, gaps):
+    data = _candles(3000 if interval != "1d" else 400, interval, start, gaps)
+    higher = resample_ohlcv(data, timeframe)
+    pos = align_to_base(higher, timeframe, data, interval)
+    bar_close = data.index + pd.Timedelta(milliseconds=interval_to_millis(interval))
+    higher_close = higher.index + pd.Timedelta(milliseconds=interval_to_millis(timeframe))
+    for i in range(0, len(data), 7):
+        closed = np.flatnonzero(higher_close <= bar_close[i])
+        assert pos[i] == (closed[-1] if len(closed) else -1)
+    assert (np.diff(pos) >= 0).all()
+
+
+def _config(rules):
+    return parse_strategy_config({
+        "symbol": "BTCUSDT", "interval": "5m", "lots": 10000, "slPct": 0.02, "tpPct": 0.03, "rules": rules,
+        "buyCondition": "s0", "sellCondition": "!s0", "engine": "fast",
+    })
+
+
+def test_truncating_the_data_keeps_earlier_values():
+    rules = [
+        {"left": {"type": "EMA", "window": 5, "timeframe": "1h"}, "op": "Above",
+         "right": {"type": "SMA", "window": 3, "timeframe": "4h"}},
+        {"left": {"type": "RSI", "window": 14, "timeframe": "1h"}, "op": "Above",
+         "right": {"type": "CONST", "const": 50}},
+    ]
+    cfg = _config(rules)
+    data = _candles(4000, "5m", "2023-01-01 00:35", [(700, 760)])
+    full = {}
+    timeframe_indicators(cfg, data, full)
+    assert len(full) == 3
+    for m in (1, 11, 12, 13, 500, 1234, 3999):
+        part = {}
+        timeframe_indicators(cfg, data.iloc[:m], part)
+        for key, values in part.items():
+            # Không nhìn trước: nến khung lớn chưa đóng không ảnh hưởng giá trị trước đó
+            np.testing.assert_allclose(values, full[key][:m], rtol=1e-12, atol=0)
+
+
+def test_values_before_the_first_closed_candle_are_zero():
+    cfg = _config([{"left": {"type": "SMA", "window": 2, "timeframe": "1h"}, "op": "Above",
+                    "right": {"type": "CONST", "const": 0}}])
+    data = _candles(100, "5m", "2023-01-01 00:35")
+    cache = {}
+    timeframe_indicators(cfg, data, cache)
+    values = cache[("SMA", 2, "1h")]
+    # Nến 1h đầu (00:00, thiếu 7 nến) đóng lúc 01:00, tức sau nến 5m 00:55
+    first_closed = int(np.flatnonzero(data.index == pd.Timestamp("2023-01-01 00:55"))[0])
+    assert (values[:first_closed] == 0.0).all()
+
+
+@pytest.mark.parametrize("timeframe", ["7m", "1M"])
+def test_timeframe_must_be_a_multiple_of_the_interval(timeframe):
+    cfg = _config([{"left": {"type": "SMA", "window": 2, "timeframe": timeframe}, "op": "Above",
+                    "right": {"type": "CONST", "const": 0}}])
+    with pytest.raises(ValueError):
+        timeframe_indicators(cfg, _candles(100, "5m"), {})
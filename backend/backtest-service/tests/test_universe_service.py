@@ -0,0 +1,24 @@
+from dataclasses import replace
+
+from app.mapper.JsonToStratefyConfig import parse_universe_request
+from app.service import universe_service
+from app.service.backtest_service import convert_stats, simulate
+from app.service.universe_service import run_universe
+from benchmarks.bench_engines import fixture_candles
+
+
+def test_workers_match_in_process_runs(monkeypatch):
+    candles = {"BTCUSDT": fixture_candles(2000, seed=1), "ETHUSDT": fixture_candles(1500, seed=2)}
+    monkeypatch.setattr(universe_service, "fetch_all_ohlcv", lambda symbol, *args, **kwargs: candles[symbol])
+    monkeypatch.setattr(universe_service, "UNIVERSE_WORKERS", 2)
+    req = parse_universe_request({
+        "symbols": list(candles), "interval": "5m", "lots": 10000, "slPct": 0.02, "tpPct": 0.03,
+        "rules": [{"left": {"type": "SMA", "window": 10}, "op": "CrossesUp", "right": {"type": "SMA", "window": 30}},
+                  {"left": {"type": "SMA", "window": 10}, "op": "CrossesDown", "right": {"type": "SMA", "window": 30}}],
+        "buyCondition": "s0", "sellCondition": "s1", "endTime": "2023-01-10T00:00:00",
+    })
+    res = run_universe(req, equity_points=0)
+    for row in res["symbols"]:
+        cfg = replace(req.config, symbol=row["symbol"], lots=req.config.lots / len(candles),
+                      endTime=req.config.endTime)
+        assert row["stats"] == convert_stats(simulate(cfg, candles[row["symbol"]])).__dict__
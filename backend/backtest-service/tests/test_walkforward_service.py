@@ -0,0 +1,91 @@
+import pytest
+
+from dataclasses import replace
+
+from app.mapper.JsonToStratefyConfig import parse_walkforward_request
+from app.service import optimize_service, walkforward_service
+from app.service.backtest_service import convert_stats, simulate
+from app.service.optimize_service import apply_params
+from app.service.shared_candles import share_candles
+from app.service.walkforward_service import fold_ranges, run_walkforward, warm_indicators
+from benchmarks.bench_engines import fixture_candles
+
+RULES = [
+    {"left": {"type": "SMA", "window": 10}, "op": "CrossesUp", "right": {"type": "SMA", "window": 30}},
+    {"left": {"type": "RSI", "window": 14}, "op": "Above", "right": {"type": "CONST", "const": 60.0}},
+]
+
+
+def _request(**extra):
+    return parse_walkforward_request({
+        "config": {"symbol": "BTCUSDT", "interval": "5m", "lots": 10000, "slPct": 0.02, "tpPct": 0.03,
+                   "rules": RULES, "buyCondition": "s0", "sellCondition": "s1", "engine": "fast"},
+        "windows": {"SMA_10": [5, 10], "RSI_14": [7, 14]},
+        "objective": "return_pct",
+        "folds": 3,
+        **extra,
+    })
+
+
+@pytest.fixture
+def candles(monkeypatch):
+    data = fixture_candles(3000)
+    monkeypatch.setattr(walkforward_service, "fetch_all_ohlcv", lambda *args, **kwargs: data)
+    return data
+
+
+def _in_process(req, data):
+    """The folds run by this process's own copy of the worker functions."""
+    with share_candles(data) as shared:
+        walkforward_service._init_worker(shared.spec, req)
+        try:
+            return [walkforward_service._run_fold(f) for f in fold_ranges(len(data), req)]
+        finally:
+            walkforward_service._worker.clear()
+
+
+@pytest.mark.parametrize("anchored", [False, True])
+def test_workers_match_in_process_folds(monkeypatch, candles, anchored):
+    monkeypatch.setattr(walkforward_service, "OPTIMIZE_WORKERS", 2)
+    req = _request(anchored=anchored)
+    res = run_walkforward(req)
+    expected = _in_process(req, candles)
+    assert len(res["folds"]) == len(expected) == 3
+    for fold, (params, in_sample, oos) in zip(res["folds"], expected):
+        assert fold["params"] == params
+        assert fold["inSample"] == in_sample.__dict__
+        assert fold["outOfSample"] == oos.__dict__
+
+
+@pytest.mark.parametrize("engine", ["fast", "backtesting"])
+def test_warm_indicators_from_the_first_bar_change_nothing(candles, engine):
+    cfg = replace(_request().optimize.config, engine=engine)
+    warm = warm_indicators(cfg, candles, 0)
+    assert convert_stats(simulate(cfg, candles)) == convert_stats(simulate(cfg, candles, warm))
+
+
+def test_folds_continue_indicators_from_earlier_bars(candles):
+    # Cả in-sample (fold trượt) lẫn out-of-sample dùng indicator tính từ các nến trước đó
+    req = _request(windows={"SMA_10": [5, 10], "SMA_30": [100, 200]})
+    folds = fold_ranges(len(candles), req)
+    results = _in_process(req, candles)
+    assert any(train_start > 0 for train_start, _, _ in folds)
+    for (train_start, train_end, test_end), (params, in_sample, oos) in zip(folds, results):
+        cfg = apply_params(req.optimize.config, params)
+        train = candles.iloc[train_start:train_end]
+        test = candles.iloc[train_end:test_end]
+        assert in_sample == convert_stats(
+            simulate(cfg, train, warm_indicators(cfg, candles.iloc[:train_end], train_start)))
+        assert oos == convert_stats(simulate(cfg, test, warm_indicators(cfg, candles.iloc[:test_end], train_end)))
+        # Không khởi động lại: SMA 200 đã có giá trị từ nến đầu của out-of-sample
+        warm = warm_indicators(cfg, candles.iloc[:test_end], train_end)
+        assert all(values[0] != 0.0 for values in warm.values())
+
+
+def test_folds_without_banks_match_folds_with_banks(monkeypatch, candles):
+    # Vượt OPTIMIZE_BANK_MB: in-sample vẫn dùng indicator đã khởi động trước train_start
+    req = _request(windows={"SMA_10": [5, 10], "SMA_30": [100, 200]})
+    with_banks = _in_process(req, candles)
+    monkeypatch.setattr(optimize_service, "OPTIMIZE_BANK_MB", 0)
+    assert optimize_service.indicator_banks(req.optimize, candles) == {}
+    assert _in_process(req, candles) == with_banks
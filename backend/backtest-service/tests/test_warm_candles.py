@@ -0,0 +1,131 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.service import historical_service, warm_candles
+from app.service.historical_service import interval_to_millis
+from app.service.warm_candles import WarmCandles, parse_pairs
+
+HOUR = interval_to_millis("1h")
+DAY = 24 * HOUR
+# Mốc "hiện tại" giữa một nến, để nến đang hình thành bị bỏ
+NOW_MS = 1000 * DAY + HOUR // 2
+
+
+class _Loader:
+    """Hourly candles whose close is the open time in hours; records every request."""
+
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+
+    def __call__(self, symbol, interval, start_ms, end_ms, dtype=np.float64):
+        self.calls.append((start_ms, end_ms))
+        if self.fail:
+            raise RuntimeError("market-service down")
+        hours = np.arange(-(-start_ms // HOUR), -(-end_ms // HOUR), dtype=np.int64)
+        values = np.repeat((hours.astype(np.float64))[None, :], 5, axis=0).astype(dtype)
+        index = pd.DatetimeIndex(pd.to_datetime(hours * HOUR, unit="ms"), name="Open Time")
+        return pd.DataFrame(values.T, index=index, columns=["Open", "High", "Low", "Close", "Volume"])
+
+
+def _hours(frame: pd.DataFrame) -> list:
+    return frame["Close"].astype(np.int64).tolist()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [NOW_MS / 1000]
+    monkeypatch.setattr(warm_candles, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def _warm(loader, window_days=10):
+    warm = WarmCandles([("BTCUSDT", "1h", HOUR)], window_days * DAY, refresh_seconds=300)
+    warm._refresh(warm._entries[("BTCUSDT", "1h")], loader)
+    return warm
+
+
+def test_parse_pairs():
+    assert parse_pairs(" BTCUSDT:1m, ethusdt:1h,,BTCUSDT:1m ") == [("BTCUSDT", "1m"), ("ETHUSDT", "1h")]
+    with pytest.raises(ValueError):
+        parse_pairs("BTCUSDT")
+
+
+def test_get_slices_the_window(clock):
+    loader = _Loader()
+    warm = _warm(loader)
+    end_ms = 1000 * DAY
+    assert loader.calls == [(end_ms - 10 * DAY, end_ms)]
+
+    frame, covered = warm.get("btcusdt", "1h", end_ms - 2 * DAY, end_ms - DAY)
+    assert covered == end_ms
+    assert _hours(frame) == list(range(998 * 24, 999 * 24))
+    # Phần sau `covered` phải tải thêm
+    frame, covered = warm.get("BTCUSDT", "1h", end_ms - HOUR, end_ms + 5 * HOUR)
+    assert _hours(frame) == [1000 * 24 - 1] and covered == end_ms
+    # Bắt đầu trước cửa sổ, hoặc cặp không nạp sẵn
+    assert warm.get("BTCUSDT", "1h", end_ms - 11 * DAY, end_ms) is None
+    assert warm.get("ETHUSDT", "1h", end_ms - DAY, end_ms) is None
+    assert warm.status()["ready"]
+
+
+def test_refresh_appends_only_new_candles(clock):
+    loader = _Loader()
+    warm = _warm(loader)
+    clock[0] += 3 * HOUR / 1000
+    warm._refresh(warm._entries[("BTCUSDT", "1h")], loader)
+    end_ms = 1000 * DAY + 3 * HOUR
+    assert loader.calls[-1] == (1000 * DAY, end_ms)
+    frame, covered = warm.get("BTCUSDT", "1h", end_ms - 10 * DAY, end_ms)
+    assert covered == end_ms
+    assert _hours(frame) == list(range(990 * 24 + 3, 1000 * 24 + 3))
+
+
+def test_failed_refresh_keeps_the_old_frame(clock):
+    loader = _Loader()
+    warm = _warm(loader)
+    loader.fail = True
+    clock[0] += HOUR / 1000
+    warm._refresh(warm._entries[("BTCUSDT", "1h")], loader)
+    frame, covered = warm.get("BTCUSDT", "1h", 995 * DAY, 1001 * DAY)
+    assert covered == 1000 * DAY and len(frame) == 5 * 24
+    status = warm.status()["pairs"][0]
+    assert status["status"] == "ready" and "down" in status["error"]
+
+
+@pytest.fixture
+def fetch(monkeypatch, clock):
+    warm = _warm(_Loader())
+    tail = _Loader()
+    monkeypatch.setattr(historical_service, "warm_candles", warm)
+    monkeypatch.setattr(historical_service, "_load_frame", lambda s, i, a, b, dtype: tail(s, i, a, b, dtype))
+    return tail
+
+
+def _iso(ms: int) -> str:
+    return pd.Timestamp(ms, unit="ms").isoformat()
+
+
+def test_fetch_within_the_window_loads_nothing(fetch):
+    frame = historical_service.fetch_all_ohlcv("BTCUSDT", "1h", _iso(995 * DAY), _iso(999 * DAY), dtype="float32")
+    assert fetch.calls == []
+    # Cả hai mốc đều tính (open time <= end_time)
+    assert _hours(frame) == list(range(995 * 24, 999 * 24 + 1))
+    assert (frame.dtypes == np.float32).all()
+
+
+def test_fetch_past_the_window_loads_only_the_tail(fetch):
+    end_ms = 1000 * DAY + 6 * HOUR
+    frame = historical_service.fetch_all_ohlcv("BTCUSDT", "1h", _iso(999 * DAY), _iso(end_ms))
+    assert fetch.calls == [(1000 * DAY, end_ms + 1)]
+    assert _hours(frame) == list(range(999 * 24, 1000 * 24 + 7))
+    assert frame.index.is_monotonic_increasing and frame.index.is_unique
+
+
+def test_fetch_before_the_window_loads_everything(fetch):
+    frame = historical_service.fetch_all_ohlcv("BTCUSDT", "1h", _iso(980 * DAY), _iso(999 * DAY))
+    assert fetch.calls == [(980 * DAY, 999 * DAY + 1)]
+    assert _hours(frame) == list(range(980 * 24, 999 * 24 + 1))
@@ -0,0 +1,107 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Tuple
+
+import numpy as np
+
+# Số input tối đa gộp vào một lần forward pass
+PREDICT_BATCH_MAX = int(os.getenv("PREDICT_BATCH_MAX", "32"))
+# Thời gian chờ thêm request kể từ request đầu tiên của batch (ms)
+PREDICT_BATCH_WAIT_MS = float(os.getenv("PREDICT_BATCH_WAIT_MS", "5"))
+# Thời gian tối đa một request chờ kết quả (giây)
+PREDICT_TIMEOUT = float(os.getenv("PREDICT_TIMEOUT", "30"))
+
+
+def _bucket(n: int, max_size: int) -> int:
+    # Làm tròn kích thước batch lên luỹ thừa của 2 để TF không trace lại với mỗi kích thước mới
+    size = 1
+    while size < n:
+        size *= 2
+    return min(size, max(max_size, n))
+
+
+class InferenceBatcher:
+    """
+    Một thread duy nhất chạy model: gom các request đang chờ (tối đa
+    max_size, hoặc wait_ms kể từ request đầu tiên), xếp input của chúng
+    thành một batch (B, seq_len, 1) cho mỗi model và chạy một forward pass,
+    rồi trả từng dòng kết quả về Future của request tương ứng.
+    """
+
+    def __init__(self, max_size: int = PREDICT_BATCH_MAX, wait_ms: float = PREDICT_BATCH_WAIT_MS):
+        self.max_size = max(1, max_size)
+        self.wait_ms = max(0.0, wait_ms)
+        self._queue: "queue.Queue[Tuple[object, np.ndarray, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="lstm-inference", daemon=True)
+                self._thread.start()
+
+    def submit(self, model, x: np.ndarray) -> Future:
+        """x: một input (seq_len, n_features); Future trả về output của model cho x."""
+        future = Future()
+        self._queue.put((model, np.asarray(x, dtype=np.float32), future))
+        self._ensure_started()
+        return future
+
+    def predict(self, model, x: np.ndarray, timeout: float = PREDICT_TIMEOUT) -> np.ndarray:
+        return self.submit(model, x).result(timeout=timeout)
+
+    def _collect(self) -> List[Tuple[object, np.ndarray, Future]]:
+        pending = [self._queue.get()]
+        deadline = time.perf_counter() + self.wait_ms / 1000
+        while len(pending) < self.max_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Hết thời gian chờ vẫn lấy nốt các request đã xếp hàng sẵn
+                pending.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            # Request của các model khác nhau (model người dùng) chạy thành các batch riêng
+            groups = {}
+            for item in pending:
+                groups.setdefault(id(item[0]), []).append(item)
+            for items in groups.values():
+                self._run_batch(items)
+
+    def _run_batch(self, items: List[Tuple[object, np.ndarray, Future]]):
+        items = [item for item in items if item[2].set_running_or_notify_cancel()]
+        if not items:
+            return
+        model = items[0][0]
+        try:
+            batch = np.stack([x for _, x, _ in items])
+            size = _bucket(len(items), self.max_size)
+            if size > len(batch):
+                batch = np.concatenate([batch, np.repeat(batch[-1:], size - len(batch), axis=0)])
+            outputs = np.asarray(model.predict_on_batch(batch))
+            # Output thiếu dòng (hoặc là scalar) phải báo lỗi cho mọi request,
+            # không được làm chết thread và để các Future còn lại chờ mãi
+            if outputs.ndim == 0 or len(outputs) < len(items):
+                raise ValueError(f"Model returned output of shape {outputs.shape} for a batch of {len(batch)}")
+            results = [outputs[i] for i in range(len(items))]
+        except Exception as e:
+            for _, _, future in items:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.items += len(items)
+        for (_, _, future), result in zip(items, results):
+            future.set_result(result)
+
+
+batcher = InferenceBatcher()
@@ -4,6 +4,7 @@ import tensorflow as tf
 from cachetools import TTLCache
 
 from app.model.lstm_model import load_model_and_scaler, load_scaler, load_model_default, load_model_generic as load_model
+from app.service.inference_batcher import batcher
 
 scaler = load_scaler()
 default_model = load_model_default()
@@ -18,9 +19,10 @@ def predict_next_close(closes, seq_len=60, user_id=None, model_name=None, sentim
 
     closes_np = closes.reshape(-1, 1)
     scaled = scaler.transform(closes_np)
-    X_input = scaled[-seq_len:].reshape(1, seq_len, 1)
+    X_input = scaled[-seq_len:].reshape(seq_len, 1)
 
-    pred_scaled = model.predict(X_input, verbose=0)[0][0]
+    # Gộp với các request đồng thời thành một batch, một forward pass
+    pred_scaled = batcher.predict(model, X_input)[0]
     predicted_price = scaler.inverse_transform([[pred_scaled]])[0][0]
     if(sentiment=='POSITIVE'):
         predicted_price *= 1.02
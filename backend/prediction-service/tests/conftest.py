@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Chạy được cả khi pytest được gọi từ ngoài thư mục service
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,98 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.service.inference_batcher import InferenceBatcher, _bucket
+
+SEQ_LEN = 60
+
+
+class _Model:
+    """Stand-in for the Keras model: one output row per input, the sum of its values."""
+
+    def __init__(self, scale: float = 1.0, output=None, error: Exception = None):
+        self.scale = scale
+        self.output = output
+        self.error = error
+        self.batches = []
+
+    def predict_on_batch(self, batch: np.ndarray):
+        self.batches.append(batch.copy())
+        if self.error is not None:
+            raise self.error
+        if self.output is not None:
+            return self.output(batch)
+        return batch.sum(axis=(1, 2))[:, None] * self.scale
+
+
+def _input(k: int) -> np.ndarray:
+    return np.full((SEQ_LEN, 1), float(k))
+
+
+def _submit_together(batcher: InferenceBatcher, requests):
+    """Submits every (model, x) while the inference thread waits for its first item to be batched."""
+    gate = threading.Event()
+    blocker = _Model(output=lambda b: (gate.wait(5), b.sum(axis=(1, 2))[:, None])[1])
+    first = batcher.submit(blocker, _input(0))
+    futures = [batcher.submit(model, x) for model, x in requests]
+    gate.set()
+    first.result(timeout=5)
+    return futures
+
+
+def test_bucket_rounds_up_to_a_power_of_two():
+    assert [_bucket(n, 32) for n in (1, 2, 3, 5, 8, 9, 31, 32)] == [1, 2, 4, 8, 8, 16, 32, 32]
+    # Không vượt max_size, và không bao giờ nhỏ hơn số input
+    assert _bucket(12, 16) == 16 and _bucket(20, 16) == 20
+
+
+def test_requests_are_grouped_per_model():
+    batcher = InferenceBatcher(max_size=32, wait_ms=50)
+    a, b = _Model(1.0), _Model(-1.0)
+    requests = [(a if k % 3 else b, _input(k)) for k in range(1, 11)]
+    futures = _submit_together(batcher, requests)
+    for (model, x), future in zip(requests, futures):
+        np.testing.assert_allclose(future.result(timeout=5), [x.sum() * model.scale])
+    # 7 input của a trong một batch (đệm lên 8), 3 của b (đệm lên 4)
+    assert [len(batch) for batch in a.batches] == [8]
+    assert [len(batch) for batch in b.batches] == [4]
+
+
+def test_padding_repeats_the_last_input():
+    batcher = InferenceBatcher(max_size=8, wait_ms=50)
+    model = _Model()
+    futures = _submit_together(batcher, [(model, _input(k)) for k in (3, 4, 5)])
+    assert [f.result(timeout=5)[0] for f in futures] == [3 * SEQ_LEN, 4 * SEQ_LEN, 5 * SEQ_LEN]
+    batch = model.batches[0]
+    assert batch.shape == (4, SEQ_LEN, 1) and batch.dtype == np.float32
+    np.testing.assert_array_equal(batch[3], batch[2])
+
+
+def test_max_size_splits_the_queue():
+    batcher = InferenceBatcher(max_size=4, wait_ms=50)
+    model = _Model()
+    futures = _submit_together(batcher, [(model, _input(k)) for k in range(10)])
+    assert [f.result(timeout=5)[0] for f in futures] == [k * SEQ_LEN for k in range(10)]
+    assert sum(len(batch) for batch in model.batches) >= 10
+    assert all(len(batch) <= 4 for batch in model.batches)
+
+
+@pytest.mark.parametrize("model", [
+    _Model(error=RuntimeError("model failed")),
+    # Output scalar hoặc thiếu dòng: lỗi cho mọi request thay vì làm chết thread
+    _Model(output=lambda batch: np.float32(1.0)),
+    _Model(output=lambda batch: np.zeros((1, 1))),
+], ids=["raises", "scalar", "short"])
+def test_errors_reach_every_request_and_the_thread_survives(model):
+    batcher = InferenceBatcher(max_size=8, wait_ms=50)
+    good = _Model()
+    futures = _submit_together(batcher, [(model, _input(k)) for k in range(3)] + [(good, _input(7))])
+    for future in futures[:3]:
+        with pytest.raises((RuntimeError, ValueError)):
+            future.result(timeout=5)
+    # Batch của model khác trong cùng lượt vẫn có kết quả
+    assert futures[3].result(timeout=5)[0] == 7 * SEQ_LEN
+    thread = batcher._thread
+    assert batcher.predict(good, _input(2), timeout=5)[0] == 2 * SEQ_LEN
+    assert batcher._thread is thread and thread.is_alive()